@@ -4,7 +4,7 @@ Main API router for v1 endpoints
 
 from fastapi import APIRouter, Depends
 
-from app.api.api_v1.endpoints import admin, auth, trading, users
+from app.api.api_v1.endpoints import admin, auth, instruments, trading, users
 from app.core.deps import get_current_active_superuser
 
 api_router = APIRouter()
@@ -13,6 +13,9 @@ api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(trading.router, prefix="/trading", tags=["trading"])
+api_router.include_router(
+    instruments.router, prefix="/instruments", tags=["instruments"]
+)
 api_router.include_router(
     admin.router,
     prefix="/admin",
@@ -12,6 +12,8 @@ class NewsRequest(BaseModel):
     decay_halflife_s: int
     magnitude: float
     headline: str
+    # macro factors hit by the news, none means market-wide
+    factor_ids: list[str] = []
 
 
 @router.post("/news")
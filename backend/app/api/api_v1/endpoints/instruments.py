@@ -0,0 +1,46 @@
+"""
+Instrument market data endpoints
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.services.price_history import CLOSE, HIGH, LOW, OPEN, VOLUME, PriceHistory
+from dependencies import get_price_history
+
+router = APIRouter()
+
+
+@router.get("/{instrument_id}/bars")
+async def get_bars(
+    instrument_id: str,
+    interval: int = 60,
+    limit: int = Query(100, gt=0),
+    history: PriceHistory = Depends(get_price_history),
+) -> dict:
+    """
+    OHLCV bars of an instrument, oldest first, the last bar is still in progress
+    Served from the in-memory history, nothing is queried or copied before encoding
+    async so it reads on the event loop, not in a thread while the price loop appends
+    """
+    if instrument_id not in history.index:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown instrument '{instrument_id}'",
+        )
+    if interval not in history.bar_series:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Interval must be one of {sorted(history.bar_series)}",
+        )
+
+    starts, bars = history.bars(instrument_id, interval, limit)
+    return {
+        "instrument_id": instrument_id,
+        "interval": interval,
+        "t": starts.tolist(),
+        "open": bars[:, OPEN].tolist(),
+        "high": bars[:, HIGH].tolist(),
+        "low": bars[:, LOW].tolist(),
+        "close": bars[:, CLOSE].tolist(),
+        "volume": bars[:, VOLUME].tolist(),
+    }
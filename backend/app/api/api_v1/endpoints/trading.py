@@ -2,6 +2,7 @@
 Trading endpoints (example of protected endpoints)
 """
 
+import asyncio
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -9,7 +10,14 @@ from sqlmodel import Session
 
 from app.core.deps import get_current_active_user
 from app.db.database import get_db
+from app.schemas.order import OrderBatchCreate
 from app.schemas.user import UserInDB
+from app.services.order_book import OrderStatus
+from app.services.order_book_registry import OrderBookRegistry
+from app.services.order_validation import validate_order_batch
+from app.services.positions import PositionBook
+from dependencies import get_order_book_registry
+from dependencies import get_positions as get_position_book
 
 router = APIRouter()
 
@@ -35,6 +43,17 @@ def get_portfolio(
     }
 
 
+@router.get("/positions")
+def get_positions(
+    current_user: UserInDB = Depends(get_current_active_user),
+    positions: PositionBook = Depends(get_position_book),
+) -> dict:
+    """
+    Live positions and PnL from the user's fills, marked to the last trade price
+    """
+    return {"user_id": current_user.id, "positions": positions.summary(current_user.id)}
+
+
 @router.post("/orders")
 def create_order(
     symbol: str,
@@ -64,6 +83,73 @@ def create_order(
     }
 
 
+# what a submitter sees of each of its fills, the counterparty stays anonymous
+OWN_FILL_FIELDS = ("ticker", "price", "quantity", "aggressor_side")
+
+
+def _own_result(result):
+    """
+    The part of an order result that belongs to the submitter: its order's status and
+    fills without the counterparty's order / user IDs. Stops of other users the order
+    triggered are left out, their owners get those fills on /ws/fills
+    """
+    own = {
+        key: value
+        for key, value in result.items()
+        if key not in ("fills", "triggered_orders")
+    }
+    if "fills" in result:
+        own["fills"] = [
+            {field: fill[field] for field in OWN_FILL_FIELDS}
+            for fill in result["fills"]
+        ]
+    return own
+
+
+@router.post("/orders/batch")
+async def create_orders_batch(
+    batch: OrderBatchCreate,
+    current_user: UserInDB = Depends(get_current_active_user),
+    registry: OrderBookRegistry = Depends(get_order_book_registry),
+    positions: PositionBook = Depends(get_position_book),
+) -> dict:
+    """
+    Submit up to MAX_BATCH_ORDERS orders at once (requires authentication)
+
+    The whole batch is validated together, then the valid orders of each instrument go
+    to that instrument's matching engine as a single command, instruments in parallel
+    The accepted orders are reserved against the user's limits until processed
+    Results come back per order, in the order they were sent
+    """
+    errors, notional = validate_order_batch(
+        batch.orders, registry, current_user.id, positions
+    )
+
+    results = [None] * len(batch.orders)
+    by_ticker = {}
+    for i, (order, error) in enumerate(zip(batch.orders, errors)):
+        if error is not None:
+            results[i] = {"status": OrderStatus.REJECTED, "message": error}
+        else:
+            by_ticker.setdefault(order.ticker, []).append(
+                (i, {**order.model_dump(), "user_id": current_user.id})
+            )
+
+    accepted = sum(len(indexed) for indexed in by_ticker.values())
+    with registry.reserve(current_user.id, accepted, notional):
+        outcomes = await asyncio.gather(
+            *(
+                registry.engine(ticker).process_orders([o for _, o in indexed])
+                for ticker, indexed in by_ticker.items()
+            )
+        )
+    for indexed, outcome in zip(by_ticker.values(), outcomes):
+        for (i, _), result in zip(indexed, outcome):
+            results[i] = _own_result(result)
+
+    return {"results": results}
+
+
 @router.get("/orders")
 def get_orders(
     current_user: UserInDB = Depends(get_current_active_user),
@@ -6,7 +6,7 @@ import json
 import os
 from typing import List, Optional, Union
 
-from pydantic import field_validator
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 
 
@@ -41,8 +41,38 @@ class Settings(BaseSettings):
     # Trading
     MAX_ORDERS_PER_USER: int = 1000
     MAX_POSITION_SIZE: float = 1000000.0
+    PRICE_TICK_SIZE: float = 0.01
+    MAX_BATCH_ORDERS: int = 100
+    MATCHING_QUEUE_SIZE: int = (
+        10000  # pending commands per instrument before backpressure
+    )
     SESSION_DURATION_MINUTES: int = 60
 
+    # Price engine
+    PRICE_ENGINE_SEED: Optional[int] = None  # set to replay the same price paths
+    FACTOR_MODEL_REFRESH_S: int = 60  # how often exposures are checked for changes
+    SHOCK_BLOCK_SIZE: int = 1 << 20  # normal draws pre-generated per shock buffer block
+    PRICE_TICK_RATE_HZ: float = Field(1.0, gt=0, le=50)  # price ticks per second
+    PRICE_TICK_CATCH_UP: bool = False  # replay missed ticks after an overrun, else skip
+    PRICE_TICK_MAX_CATCH_UP: int = 10  # missed ticks replayed at most, the rest skipped
+
+    # Price history
+    PRICE_HISTORY_TICKS: int = 3600  # ticks kept per instrument
+    BAR_INTERVALS_S: List[int] = [1, 60, 300]
+    BAR_HISTORY: int = 1000  # bars kept per instrument and interval
+
+    # News
+    NEWS_EFFECT_EPSILON: float = 1e-6  # decayed news below this is dropped
+    NEWS_RELOAD_S: float = 5.0  # how often new news_events rows are picked up
+    NEWS_LOOKBACK_S: float = 86400.0  # first load starts this far back
+
+    # Liquidity bots
+    BOT_QUOTE_LEVELS: int = 3  # price levels each bot quotes per side
+    BOT_POSITION_FLUSH_S: float = 5.0  # how often bot positions are written
+
+    # Market data websocket
+    WS_SEND_QUEUE_SIZE: int = 256  # frames queued per connection before conflating
+
     # Logging
     LOG_LEVEL: str = "INFO"  # DEBUG, INFO, WARNING, ERROR, CRITICAL
     LOG_FILE: Optional[str] = None  # Set to None to disable file logging
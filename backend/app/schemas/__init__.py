@@ -2,10 +2,13 @@
 Pydantic schemas for API request/response validation
 """
 
+from .order import OrderBatchCreate, OrderCreate
 from .token import Token, TokenData
 from .user import UserCreate, UserInDB, UserPublic, UserUpdate
 
 __all__ = [
+    "OrderBatchCreate",
+    "OrderCreate",
     "Token",
     "TokenData",
     "UserCreate",
@@ -0,0 +1,30 @@
+"""
+Order schemas for API validation
+"""
+
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+from app.services.order_book import OrderSide, OrderType, TimeInForce
+
+
+class OrderCreate(BaseModel):
+    """Order submission schema, price is ignored for market / stop orders"""
+
+    ticker: str
+    side: OrderSide
+    quantity: int = Field(..., gt=0)
+    price: Optional[float] = Field(None, gt=0)
+    type: OrderType = OrderType.LIMIT
+    time_in_force: TimeInForce = TimeInForce.GTC
+    stop_price: Optional[float] = Field(None, gt=0)
+
+
+class OrderBatchCreate(BaseModel):
+    """Batch order submission schema"""
+
+    orders: List[OrderCreate] = Field(
+        ..., min_length=1, max_length=settings.MAX_BATCH_ORDERS
+    )
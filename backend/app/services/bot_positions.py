@@ -0,0 +1,116 @@
+import asyncio
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.deps import get_logger
+from app.db.database import engine
+from app.models.bot_position import BotPosition
+
+logger = get_logger(__name__)
+
+_INSERT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def upsert_bot_positions(db: Session, rows):
+    """
+    Insert or update bot_positions rows (dicts of the BotPosition columns)
+    in a single statement, however many there are
+    """
+    if not rows:
+        return
+    insert = _INSERT[db.get_bind().dialect.name](BotPosition.__table__)
+    statement = insert.on_conflict_do_update(
+        index_elements=["bot_id", "instrument_id"],
+        set_={
+            "qty": insert.excluded.qty,
+            "cash": insert.excluded.cash,
+            "last_updated": insert.excluded.last_updated,
+        },
+    )
+    db.execute(statement, rows)
+    db.commit()
+
+
+class BotPositionStore:
+    """
+    Persists the fleet's inventory and cash to bot_positions
+
+    Fills only touch the fleet's arrays, this writes the slots they marked dirty every
+    BOT_POSITION_FLUSH_S as one batched upsert, so the database sees one statement per
+    interval rather than a write per fill
+    """
+
+    def __init__(self, fleet, db_engine=None):
+        self.fleet = fleet
+        self.db_engine = db_engine or engine
+        self.flushed = 0  # rows written since start
+
+    def load(self, db: Session):
+        """
+        Restore the inventory and cash of the fleet's slots, e.g. after a restart
+        """
+        restored = 0
+        for row in db.exec(select(BotPosition)).all():
+            slot = self.fleet.slots.get((row.bot_id, row.instrument_id))
+            if slot is not None:
+                self.fleet.inventory[slot] = row.qty
+                self.fleet.cash[slot] = row.cash
+                restored += 1
+        return restored
+
+    def take_changes(self):
+        """
+        Rows of every dirty slot, the slots are marked clean
+        """
+        fleet = self.fleet
+        slots = np.flatnonzero(fleet.dirty)
+        fleet.dirty[slots] = False
+        now = datetime.now(timezone.utc)
+        return [
+            {
+                "bot_id": int(fleet.bot_ids[slot]),
+                "instrument_id": fleet.tickers[fleet.instruments[slot]],
+                "qty": int(fleet.inventory[slot]),
+                "cash": float(fleet.cash[slot]),
+                "last_updated": now,
+            }
+            for slot in slots
+        ]
+
+    def _write(self, rows):
+        with Session(self.db_engine) as db:
+            upsert_bot_positions(db, rows)
+
+    async def flush(self):
+        """
+        Rows are taken on the event loop, the fleet is never read from the thread
+        A failed write marks its slots dirty again for the next flush
+        """
+        rows = self.take_changes()
+        if not rows:
+            return 0
+        try:
+            await asyncio.to_thread(self._write, rows)
+        except Exception:
+            for row in rows:
+                slot = self.fleet.slots.get((row["bot_id"], row["instrument_id"]))
+                if slot is not None:
+                    self.fleet.dirty[slot] = True
+            raise
+        self.flushed += len(rows)
+        return len(rows)
+
+    async def flush_on_tick(self):
+        while True:
+            try:
+                await asyncio.sleep(settings.BOT_POSITION_FLUSH_S)
+                await self.flush()
+            except asyncio.CancelledError:
+                await self.flush()  # last positions before shutdown
+                break
+            except Exception as e:
+                logger.error(f"Error flushing bot positions: {e}", exc_info=True)
@@ -0,0 +1,214 @@
+import asyncio
+
+import numpy as np
+
+from app.core.deps import get_logger
+from app.services.order_book import OrderSide
+
+logger = get_logger(__name__)
+
+# side axis of the quote arrays
+SIDES = (OrderSide.BUY, OrderSide.SELL)
+
+
+def bot_user_id(bot_id):
+    """
+    User ID the orders of a bot are placed under
+    """
+    return f"bot:{bot_id}"
+
+
+def bot_id_of(user_id):
+    """
+    Bot ID behind a user ID, None for real users
+    """
+    if isinstance(user_id, str) and user_id.startswith("bot:"):
+        return int(user_id[4:])
+    return None
+
+
+class BotQuoter:
+    """
+    Keeps the fleet's ladders resting as real orders in the instruments' books
+
+    The quotes live in arrays of shape (slots, 2 sides, levels): the resting order ID
+    (0 = nothing resting), its price in ticks and its remaining quantity. Each tick the
+    desired ladders are compared to them in one go and only the differences are sent:
+    - nothing resting (never placed, filled) -> new order
+    - resting at another price or size -> amend
+    - resting but no longer wanted (mid price unknown) -> cancel
+    An unchanged quote costs nothing, so book churn follows how far the quotes moved
+
+    The changes of an instrument go to its matching engine as one command, which reads
+    the live arrays when it runs. An instrument whose previous command has not run yet
+    is skipped for the tick rather than queueing a second diff against stale state
+    Fills of resting quotes and the bots' inventory come in through on_trade
+    """
+
+    def __init__(self, fleet, registry):
+        self.fleet = fleet
+        self.registry = registry
+        self._pending = {}  # instrument -> future of its last command
+        # quotes sent to the books since start
+        self.placed = 0
+        self.amended = 0
+        self.cancelled = 0
+        self._reset()
+
+    def _reset(self):
+        shape = (len(self.fleet), len(SIDES), self.fleet.levels)
+        self.order_ids = np.zeros(shape, dtype=np.int64)
+        self.prices = np.zeros(shape, dtype=np.int64)
+        self.quantities = np.zeros(shape, dtype=np.int64)
+        # order ID -> flat index into the arrays, for fills
+        self._order_slots = {}
+
+    def requote(self, mid_prices, drift=None):
+        """
+        Tick listener, diff the fleet's new ladders against the resting quotes
+        """
+        if self.order_ids.shape[0] != len(self.fleet):  # fleet was reloaded
+            self._reset()
+        if not len(self.fleet):
+            return
+
+        # 1. desired ladders, a slot without a usable mid price quotes nothing
+        mids = np.asarray(mid_prices, dtype=np.float64)
+        with np.errstate(invalid="ignore"):
+            bids, asks = self.fleet.quote(mids, drift)
+        wanted = np.isfinite(mids)[self.fleet.instruments][:, None, None]
+        want_prices = np.stack([bids, asks], axis=1)
+        want_quantities = np.broadcast_to(self.fleet.depth, want_prices.shape)
+
+        # 2. diff against what is resting
+        resting = self.order_ids != 0
+        place = wanted & ~resting
+        amend = (
+            wanted
+            & resting
+            & ((self.prices != want_prices) | (self.quantities != want_quantities))
+        )
+        cancel = resting & ~wanted
+        changed = np.flatnonzero(place | amend | cancel)
+        if not len(changed):
+            return
+
+        # 3. one command per instrument, quotes backing away from the other side go
+        # first so a jump in the mid price doesn't make the bots trade with each other
+        direction = np.array([-1, 1])[None, :, None]  # away: bids down, asks up
+        retreat = cancel | (amend & ((want_prices - self.prices) * direction > 0))
+        per_slot = len(SIDES) * self.fleet.levels
+        instruments = self.fleet.instruments[changed // per_slot]
+        order = np.lexsort((~retreat.flat[changed], instruments))
+        changed, instruments = changed[order], instruments[order]
+        bounds = np.flatnonzero(np.diff(instruments)) + 1
+        flat_prices = want_prices.reshape(-1)
+        flat_quantities = want_quantities.reshape(-1)
+        for indices in np.split(changed, bounds):
+            ticker = self.fleet.tickers[self.fleet.instruments[indices[0] // per_slot]]
+            changes = [
+                (
+                    int(i),
+                    int(flat_prices[i]),
+                    int(flat_quantities[i]),
+                    bool(cancel.flat[i]),
+                )
+                for i in indices
+            ]
+            self._submit(ticker, changes)
+
+    def _submit(self, ticker, changes):
+        pending = self._pending.get(ticker)
+        if pending is not None and not pending.done():
+            return
+        if ticker not in self.registry:
+            return
+        engine = self.registry.engine(ticker)
+        try:
+            self._pending[ticker] = engine.submit_nowait(
+                self._apply, engine.order_processor, ticker, changes
+            )
+        except asyncio.QueueFull:
+            logger.warning(f"Matching queue of {ticker} full, bot quotes not updated")
+
+    def _apply(self, processor, ticker, changes):
+        """
+        Runs on the instrument's matching engine, the only writer of its book
+        changes are (flat index, price in ticks, quantity, cancel) of each quote
+        """
+        book = processor.order_book
+        per_slot = len(SIDES) * self.fleet.levels
+        for i, price, quantity, cancel in changes:
+            order_id = int(self.order_ids.flat[i])  # may have filled since the diff
+
+            if cancel:
+                if order_id:
+                    processor.cancel_order({"id": order_id})
+                    self.cancelled += 1
+                    self._clear(i)
+                continue
+
+            result = None
+            if order_id:
+                result = processor.amend_order(
+                    order_id, quantity, book.from_ticks(price)
+                )
+                self.amended += result is not None
+            if result is None:
+                slot, rest = divmod(i, per_slot)
+                result = processor.process_order(
+                    {
+                        "price": book.from_ticks(price),
+                        "quantity": quantity,
+                        "ticker": ticker,
+                        "user_id": bot_user_id(int(self.fleet.bot_ids[slot])),
+                        "side": SIDES[rest // self.fleet.levels],
+                    }
+                )
+                self.placed += 1
+
+            # whatever crossed has traded, the rest is resting
+            self._clear(i)
+            if result["unprocessed_quantity"] > 0:
+                self.order_ids.flat[i] = result["order_id"]
+                self.prices.flat[i] = price
+                self.quantities.flat[i] = result["unprocessed_quantity"]
+                self._order_slots[result["order_id"]] = i
+
+    def _clear(self, i):
+        self._order_slots.pop(int(self.order_ids.flat[i]), None)
+        self.order_ids.flat[i] = 0
+        self.quantities.flat[i] = 0
+
+    def on_trade(self, event):
+        """
+        Take fills off the resting quotes, a filled quote is placed again next tick
+        Bot inventory and cash move right away, so the next quote is already skewed
+        """
+        for user_id, quantity in (
+            (event.buy_user_id, event.quantity),
+            (event.sell_user_id, -event.quantity),
+        ):
+            bot_id = bot_id_of(user_id)
+            if bot_id is not None:
+                self.fleet.apply_fill(
+                    bot_id, event.instrument_id, quantity, event.price
+                )
+
+        for order_id in (event.buy_order_id, event.sell_order_id):
+            i = self._order_slots.get(order_id)
+            if i is None:
+                continue
+            remaining = self.quantities.flat[i] - event.quantity
+            if remaining > 0:
+                self.quantities.flat[i] = remaining
+            else:
+                self._clear(i)
+
+    def stats(self):
+        return {
+            "resting": len(self._order_slots),
+            "placed": self.placed,
+            "amended": self.amended,
+            "cancelled": self.cancelled,
+        }
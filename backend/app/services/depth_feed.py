@@ -0,0 +1,58 @@
+from app.core.deps import get_logger
+from app.services.order_book import OrderSide
+
+logger = get_logger(__name__)
+
+
+class DepthFeed:
+    """
+    L2 market data for one instrument's book
+
+    The book records which levels changed, the matching engine calls publish() after
+    each batch of commands and listeners get one sequenced update with the new size of
+    every changed level. Several changes to a level within a batch collapse into one.
+
+    Updates carry absolute level sizes, so a client that applies them on top of a
+    snapshot with a lower or equal sequence ends up with the same book, even if the
+    snapshot already included some of the changes
+    """
+
+    def __init__(self, order_book):
+        self.order_book = order_book
+        order_book.changed_levels = {}
+        self.sequence = 0
+        self.listeners = []
+
+    def snapshot(self, levels=None):
+        book = self.order_book
+        return {
+            "type": "book_snapshot",
+            "instrumentId": book.instrument_id,
+            "sequence": self.sequence,
+            "bids": book.depth(OrderSide.BUY, levels),
+            "asks": book.depth(OrderSide.SELL, levels),
+        }
+
+    def publish(self):
+        """
+        Send the level changes since the last publish to every listener
+        Returns the update, or None if the book did not change
+        """
+        if not self.order_book.changed_levels:
+            return None
+
+        bids, asks = self.order_book.take_level_changes()
+        self.sequence += 1
+        update = {
+            "type": "book_update",
+            "instrumentId": self.order_book.instrument_id,
+            "sequence": self.sequence,
+            "bids": bids,
+            "asks": asks,
+        }
+        for listener in self.listeners:
+            try:
+                listener(update)
+            except Exception as e:
+                logger.error(f"Error in depth feed listener: {e}", exc_info=True)
+        return update
@@ -0,0 +1,197 @@
+import numpy as np
+from sqlmodel import Session, select
+
+from app.models.instrument_factor_exposure import InstrumentFactorExposure
+from app.models.instrument_sector_exposure import InstrumentSectorExposure
+from app.models.macro_factor import MacroFactor
+
+
+class FactorModel:
+    """
+    Correlated standard normal shocks from factor exposures
+
+    loadings[i, k] is the exposure of instrument i to factor k, macro factors
+    (InstrumentFactorExposure.beta) and sectors (InstrumentSectorExposure.weight) alike
+    Each tick draws one independent normal per factor and one per instrument:
+        e = scaled_loadings @ z + idio * eps
+    Rows are scaled by 1 / sqrt(1 + sum_k loadings[i, k]^2) so every e_i stays a unit
+    normal, the instrument's own sigma in the GBM is unchanged, only the correlation
+    between instruments (scaled_loadings @ scaled_loadings.T off the diagonal) is added
+
+    The factors have no correlation data of their own, so the factor draws are independent
+    and the loading matrix already plays the role of the Cholesky factor
+    """
+
+    def __init__(self, tickers, factor_ids, loadings):
+        self.tickers = list(tickers)
+        self.factor_ids = list(factor_ids)
+        self.loadings = np.array(loadings, dtype=np.float64).reshape(
+            len(self.tickers), len(self.factor_ids)
+        )
+
+        scale = 1 / np.sqrt(1 + np.square(self.loadings).sum(axis=1))
+        self.scaled_loadings = self.loadings * scale[:, None]
+        self.idio = scale
+
+    @classmethod
+    def from_exposures(cls, tickers, factor_exposures, sector_exposures):
+        """
+        factor_exposures: (instrument_id, factor_id, beta) rows
+        sector_exposures: (instrument_id, sector_id, weight) rows
+        Instruments outside tickers are ignored, tickers without exposures get none
+        """
+        index = {ticker: i for i, ticker in enumerate(tickers)}
+        columns = {}
+        entries = []
+        for prefix, rows in (
+            ("factor", factor_exposures),
+            ("sector", sector_exposures),
+        ):
+            for instrument_id, factor_id, value in rows:
+                if instrument_id not in index:
+                    continue
+                column = columns.setdefault(f"{prefix}:{factor_id}", len(columns))
+                entries.append((index[instrument_id], column, value))
+
+        loadings = np.zeros((len(tickers), len(columns)))
+        for row, column, value in entries:
+            loadings[row, column] = value
+        return cls(tickers, list(columns), loadings)
+
+    def correlation(self):
+        return self.scaled_loadings @ self.scaled_loadings.T + np.diag(
+            np.square(self.idio)
+        )
+
+    def combine(self, z, eps, out=None):
+        """
+        Correlated unit normal shocks from one normal per factor (z)
+        and one per instrument (eps), written into out when given
+        """
+        out = np.multiply(self.idio, eps, out=out)
+        out += self.scaled_loadings @ z
+        return out
+
+    def draw(self, rng, out=None):
+        return self.combine(
+            rng.standard_normal(len(self.factor_ids)),
+            rng.standard_normal(len(self.tickers)),
+            out,
+        )
+
+
+def load_exposures(db: Session):
+    """
+    All exposure rows, sorted so the same table contents always give the same result
+    """
+    factor_exposures = sorted(
+        (row.instrument_id, str(row.factor_id), row.beta)
+        for row in db.exec(select(InstrumentFactorExposure)).all()
+    )
+    sector_exposures = sorted(
+        (row.instrument_id, row.sector_id, row.weight)
+        for row in db.exec(select(InstrumentSectorExposure)).all()
+    )
+    return factor_exposures, sector_exposures
+
+
+class FactorModelCache:
+    """
+    Keeps the FactorModel of a fixed list of tickers, rebuilt only when the exposure
+    tables actually change, so a refresh that finds nothing new costs one query
+    and a comparison
+    """
+
+    def __init__(self, tickers):
+        self.tickers = list(tickers)
+        self.model = None
+        self._exposures = None
+
+    def refresh(self, db: Session):
+        """
+        Returns True if the model was rebuilt
+        """
+        return self.update(load_exposures(db))
+
+    def update(self, exposures):
+        """
+        Same as refresh with exposures already loaded, e.g. in another thread
+        """
+        if exposures == self._exposures:
+            return False
+        self._exposures = exposures
+        self.model = FactorModel.from_exposures(self.tickers, *exposures)
+        return True
+
+
+def load_factor_caps(db: Session):
+    """
+    Macro factor ID -> (cap_up, cap_down), the bounds of that factor's news effect
+    """
+    return {
+        str(row.id): (row.cap_up, row.cap_down)
+        for row in db.exec(select(MacroFactor)).all()
+    }
+
+
+class NewsDrift:
+    """
+    Per-instrument drift from per-factor news effects
+
+        drift = betas @ clip(effects, -cap_down, cap_up)
+
+    effects come from NewsShockSimulator.get_factor_effects, column 0 is market-wide
+    news and hits every instrument with beta 1, the other columns are macro factors
+    and use the instrument's exposure to that factor (the "factor:<id>" loading)
+    Factors without a MacroFactor row are not capped
+
+    The beta matrix only depends on the factor model, the news factors and the caps,
+    so it is rebuilt when one of them changes instead of on every tick
+    """
+
+    def __init__(self, tickers):
+        self.tickers = list(tickers)
+        self.caps = {}
+        self.betas = np.ones((len(self.tickers), 1))
+        self.lower = np.array([-np.inf])
+        self.upper = np.array([np.inf])
+        self._key = None
+        self._clipped = np.zeros(1)
+        self._drift = np.zeros(len(self.tickers))
+
+    def set_caps(self, caps):
+        if caps != self.caps:
+            self.caps = caps
+            self._key = None
+
+    def _rebuild(self, model, factor_ids):
+        columns = (
+            {}
+            if model is None
+            else {name: i for i, name in enumerate(model.factor_ids)}
+        )
+        self.betas = np.zeros((len(self.tickers), len(factor_ids)))
+        self.lower = np.full(len(factor_ids), -np.inf)
+        self.upper = np.full(len(factor_ids), np.inf)
+        for k, factor_id in enumerate(factor_ids):
+            if factor_id is None:
+                self.betas[:, k] = 1.0
+                continue
+            column = columns.get(f"factor:{factor_id}")
+            if column is not None:
+                self.betas[:, k] = model.loadings[:, column]
+            cap = self.caps.get(str(factor_id))
+            if cap is not None:
+                self.upper[k], self.lower[k] = abs(cap[0]), -abs(cap[1])
+        self._clipped = np.zeros(len(factor_ids))
+
+    def compute(self, effects, factor_ids, model=None):
+        """
+        Drift of every instrument, the returned array is reused by the next call
+        """
+        key = (id(model), len(factor_ids))
+        if key != self._key:
+            self._rebuild(model, factor_ids)
+            self._key = key
+        np.clip(effects, self.lower, self.upper, out=self._clipped)
+        return np.matmul(self.betas, self._clipped, out=self._drift)
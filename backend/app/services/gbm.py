@@ -2,6 +2,8 @@ import math
 
 import numpy as np
 
+from app.services.shock_buffer import ShockBuffer
+
 
 class GeometricBrownianMotionAssetSimulator:
     def __init__(self, current_price, mean, variance, delta):
@@ -19,10 +21,11 @@ class GeometricBrownianMotionAssetSimulator:
     def generate_e():
         return np.random.normal(0, 1)  # random sampling E
 
-    def calculate(self):
+    def calculate(self, drift=0):
+        """
+        drift is an additional drift on top of the mean, e.g. from news
+        """
         e = self.generate_e()
-        # TODO: calculate drift
-        drift = 0
 
         next_price = self.current_price * np.exp(
             (self.mean + drift - self.variance / 2) * self.delta
@@ -33,5 +36,120 @@ class GeometricBrownianMotionAssetSimulator:
         self.time += self.delta
         return next_price
 
-    def __call__(self):
-        return self.calculate()
+    def __call__(self, drift=0):
+        return self.calculate(drift)
+
+
+class VectorizedGBMEngine:
+    """
+    Same model as GeometricBrownianMotionAssetSimulator, for every instrument at once
+
+    Prices, means and sigmas live in NumPy arrays indexed like tickers, so a tick is one
+    row of normal draws plus a few in-place array operations however many instruments
+    there are. Draws come from seeded ShockBuffers (pre-generated, refilled in the
+    background), so a session can be replayed exactly with reset() and the same seed
+    """
+
+    def __init__(self, tickers, current_prices, means, variances, delta, seed=None):
+        self.tickers = list(tickers)
+        self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.initial_prices = np.array(current_prices, dtype=np.float64)
+        self.prices = self.initial_prices.copy()
+        self.means = np.array(means, dtype=np.float64)
+        self.variances = np.array(variances, dtype=np.float64)
+        self.sigmas = np.sqrt(self.variances)
+        self.delta = delta
+        self.time = 0.0
+        self.ticks = 0
+
+        # stream 0 holds one draw per instrument, stream 1 one per factor (see shock_model)
+        self.shocks = ShockBuffer(len(self.tickers), seed, stream=0)
+        self.seed_entropy = self.shocks.seed_entropy
+        self._shock_model = None
+        self._factor_shocks = None
+
+        # the parts of the exponent that do not change between ticks
+        self._drift_term = (self.means - self.variances / 2) * delta
+        self._vol_term = self.sigmas * math.sqrt(delta)
+
+        # scratch buffers, reused every tick so stepping allocates nothing
+        self._shocks = np.empty(len(self.tickers))
+        self._exponent = np.empty(len(self.tickers))
+
+    @classmethod
+    def from_instruments(cls, instruments, delta, seed=None):
+        """
+        instruments: dicts with ticker / s_0 / mean / variance,
+        as in PriceEngine.tickers (or the same fields read from the instruments table)
+        """
+        return cls(
+            [i["ticker"] for i in instruments],
+            [i["s_0"] for i in instruments],
+            [i["mean"] for i in instruments],
+            [i["variance"] for i in instruments],
+            delta,
+            seed,
+        )
+
+    def __len__(self):
+        return len(self.tickers)
+
+    @property
+    def shock_model(self):
+        """
+        Optional source of correlated shocks (FactorModel), independent draws when None
+        """
+        return self._shock_model
+
+    @shock_model.setter
+    def shock_model(self, model):
+        self._shock_model = model
+        self._factor_shocks = None
+        if model is not None:
+            self._factor_shocks = ShockBuffer(
+                len(model.factor_ids), self.seed_entropy, stream=1
+            )
+            self._factor_shocks.seek(self.ticks)
+
+    def reset(self):
+        """
+        Back to the initial prices and the first tick's draws, to replay the session
+        """
+        self.prices[:] = self.initial_prices
+        self.time = 0.0
+        self.ticks = 0
+        self.shocks.seek(0)
+        if self._factor_shocks is not None:
+            self._factor_shocks.seek(0)
+
+    def generate_e(self):
+        eps = self.shocks.next()  # random sampling E
+        if self._shock_model is not None:
+            return self._shock_model.combine(
+                self._factor_shocks.next(), eps, out=self._shocks
+            )
+        return eps
+
+    def step(self, drift=None):
+        """
+        Advance every instrument by one tick
+        drift is an additional drift, a scalar or an array with one entry per instrument
+        Returns the prices array (updated in place)
+        """
+        e = self.generate_e()
+
+        exponent = np.multiply(self._vol_term, e, out=self._exponent)
+        exponent += self._drift_term
+        if drift is not None:
+            exponent += np.multiply(drift, self.delta)
+
+        self.prices *= np.exp(exponent, out=exponent)
+        self.time += self.delta
+        self.ticks += 1
+        return self.prices
+
+    def as_dict(self):
+        return dict(zip(self.tickers, self.prices.tolist()))
+
+    def __call__(self, drift=None):
+        return self.step(drift)
@@ -1,7 +1,12 @@
 import json
 import random
 
+import numpy as np
+from sqlmodel import Session, select
+
+from app.core.config import settings
 from app.core.deps import get_logger
+from app.models.bot import Bot
 
 logger = get_logger(__name__)
 
@@ -82,6 +87,147 @@ class LiquidityBot:
         return book_snapshot
 
 
+def load_bots(db: Session):
+    """
+    (bot ID, params) of every row of the bots table, by ID
+    """
+    return [
+        (bot.id, bot.params or {})
+        for bot in db.exec(select(Bot).order_by(Bot.id)).all()
+    ]
+
+
+class LiquidityBotFleet:
+    """
+    Every liquidity bot on every instrument, quoted with a few array operations per tick
+    Same model as LiquidityBot, one row ("slot") per bot and instrument it quotes
+
+    A bot's params (bots.params JSON) may set any of COEFFICIENTS and "instruments", the
+    tickers it quotes (default all of them). Coefficients it leaves out are drawn from
+    the same ranges LiquidityBot uses, so a bot with empty params still behaves like one
+    """
+
+    COEFFICIENTS = (
+        "base_spread",
+        "stress_coefficient",
+        "inventory_coefficient",
+        "quote_noise_sigma",
+    )
+
+    def __init__(self, tickers, bots=(), levels=None, tick_size=None, seed=None):
+        self.tickers = list(tickers)
+        self.levels = levels or settings.BOT_QUOTE_LEVELS
+        self.tick_size = tick_size or settings.PRICE_TICK_SIZE
+        self.rng = np.random.default_rng(seed)
+
+        # depth_curve of every level, the same for every bot
+        level = np.arange(self.levels)
+        self.level_offsets = level.astype(np.float64)
+        self.depth = np.maximum(50 - 10 * level, 10)
+
+        self.load(bots)
+
+    def load(self, bots):
+        """
+        Replace the fleet with bots, (bot ID, params) pairs like load_bots returns
+        """
+        index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        bot_ids, instruments, coefficients = [], [], []
+        for bot_id, params in bots:
+            for ticker in params.get("instruments", self.tickers):
+                if ticker not in index:
+                    continue
+                bot_ids.append(bot_id)
+                instruments.append(index[ticker])
+                coefficients.append([params.get(name) for name in self.COEFFICIENTS])
+
+        n = len(bot_ids)
+        self.bot_ids = np.array(bot_ids, dtype=np.int64)
+        self.instruments = np.array(instruments, dtype=np.intp)
+        values = np.array(coefficients, dtype=np.float64).reshape(n, 4)
+
+        # missing coefficients (NaN) get LiquidityBot's random draws
+        defaults = np.column_stack(
+            [
+                np.full(n, 0.1),
+                self.rng.uniform(0.05, 0.15, n),
+                self.rng.uniform(0.005, 0.05, n),
+                self.rng.uniform(0, 0.05, n),
+            ]
+        )
+        values = np.where(np.isnan(values), defaults, values)
+        (
+            self.base_spread,
+            self.stress_coefficient,
+            self.inventory_coefficient,
+            self.quote_noise_sigma,
+        ) = values.T.copy()
+        self.inventory = np.zeros(n, dtype=np.int64)
+        self.cash = np.zeros(n)
+        # slots whose inventory / cash changed since the last flush to bot_positions
+        self.dirty = np.zeros(n, dtype=bool)
+
+        # slot index of each (bot, instrument)
+        self.slots = {
+            (bot_id, self.tickers[i]): slot
+            for slot, (bot_id, i) in enumerate(zip(bot_ids, instruments))
+        }
+
+    def __len__(self):
+        return len(self.bot_ids)
+
+    def apply_fill(self, bot_id, instrument_id, quantity, price):
+        """
+        quantity is signed, positive for a buy. Takes effect on the next quote
+        """
+        slot = self.slots.get((bot_id, instrument_id))
+        if slot is None:
+            return
+        self.inventory[slot] += quantity
+        self.cash[slot] -= quantity * price
+        self.dirty[slot] = True
+
+    def compute_spreads(self, drift=None):
+        """
+        spread = s0 + k * |Φ_i(t)| + γ * |Q| + η for every slot
+        drift is per instrument (or a scalar), None means no drift
+        """
+        stress = 0.0
+        if drift is not None:
+            stress = np.abs(np.broadcast_to(drift, len(self.tickers)))[self.instruments]
+        eta = self.rng.standard_normal(len(self)) * self.quote_noise_sigma
+        spread = (
+            self.base_spread
+            + self.stress_coefficient * stress
+            + self.inventory_coefficient * np.abs(self.inventory)
+            + eta
+        )
+        # noise can't flip the quotes over
+        return np.maximum(spread, 0, out=spread)
+
+    def quote(self, mid_prices, drift=None):
+        """
+        Bid and ask ladders of every slot, as (bids, asks) in ticks of shape
+        (slots, levels), best level first. Sizes per level are self.depth
+
+        Like LiquidityBot.generate_order_book, level 0 sits at M * (1 -/+ spread / 2)
+        and each further level one spread away. Bids round down and asks up to the tick
+        grid, asks stay at least one tick above the slot's best bid
+        """
+        mids = np.asarray(mid_prices, dtype=np.float64)[self.instruments]
+        spread = self.compute_spreads(drift)
+        offsets = spread[:, None] * self.level_offsets
+
+        bids = (mids * (1 - spread / 2))[:, None] - offsets
+        asks = (mids * (1 + spread / 2))[:, None] + offsets
+        bids = np.floor(bids / self.tick_size + 1e-9).astype(np.int64)
+        asks = np.ceil(asks / self.tick_size - 1e-9).astype(np.int64)
+
+        np.maximum(bids, 1, out=bids)
+        np.maximum(asks, bids[:, :1] + 1, out=asks)
+        return bids, asks
+
+
 # For testing only
 if __name__ == "__main__":
     bot = LiquidityBot(
@@ -0,0 +1,135 @@
+import asyncio
+
+from app.core.config import settings
+from app.core.deps import get_logger
+
+logger = get_logger(__name__)
+
+
+class MatchingEngine:
+    """
+    Single writer for one instrument's book
+
+    Every command for the instrument (new order, cancel, ...) goes through one bounded
+    asyncio.Queue and is executed by a dedicated task, one at a time and in arrival order
+    That task is the only thing touching the book, so the book needs no locks
+    Each submitter gets a future that resolves with the command's result
+
+    Every instrument has its own engine and task, so a flood of orders on one ticker
+    only queues behind that ticker while the others keep matching
+
+    With a depth_feed, the level changes of each batch are published right after it
+    """
+
+    # commands run back to back before the task yields to the rest of the event loop
+    MAX_BATCH = 64
+
+    def __init__(
+        self, instrument_id, order_processor, max_pending=None, depth_feed=None
+    ):
+        self.instrument_id = instrument_id
+        self.order_processor = order_processor
+        self.depth_feed = depth_feed
+        self._queue = asyncio.Queue(maxsize=max_pending or settings.MATCHING_QUEUE_SIZE)
+        self._task = None
+
+    @property
+    def order_book(self):
+        return self.order_processor.order_book
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    @property
+    def is_running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.is_running:
+            self._task = asyncio.create_task(
+                self._run(), name=f"matching-{self.instrument_id}"
+            )
+
+    async def stop(self):
+        """
+        Stop the matching task, commands still queued are failed rather than dropped silently
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(
+                    RuntimeError(f"Matching engine {self.instrument_id} stopped")
+                )
+
+    async def submit(self, action, *args):
+        """
+        Queue action(*args) for the matching task and wait for its result
+        When the queue is full this waits for room, which pushes back on the submitters
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((action, args, future))
+        return await future
+
+    def submit_nowait(self, action, *args):
+        """
+        Like submit but never waits for room, raises asyncio.QueueFull instead
+        so callers can shed load. Returns the future to await
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((action, args, future))
+        return future
+
+    async def process_order(self, order):
+        return await self.submit(self.order_processor.process_order, order)
+
+    async def process_orders(self, orders):
+        # the whole batch is a single command, one queue hop for any number of orders
+        return await self.submit(self.order_processor.process_orders, orders)
+
+    async def cancel_order(self, order):
+        return await self.submit(self.order_processor.cancel_order, order)
+
+    async def amend_order(self, order_id, quantity=None, price=None):
+        # a crossing price matches, so amends go through the engine like new orders
+        return await self.submit(
+            self.order_processor.amend_order, order_id, quantity, price
+        )
+
+    async def cancel_all_orders(self, user_id):
+        return await self.submit(self.order_processor.cancel_all_orders, user_id)
+
+    def _execute(self, action, args, future):
+        if future.done():  # submitter gave up (cancelled / timed out)
+            return
+        try:
+            future.set_result(action(*args))
+        except Exception as e:
+            future.set_exception(e)
+
+    async def _run(self):
+        queue = self._queue
+        while True:
+            self._execute(*await queue.get())
+
+            # drain what is already waiting without going back through the event loop
+            for _ in range(self.MAX_BATCH - 1):
+                if queue.empty():
+                    break
+                self._execute(*queue.get_nowait())
+
+            if self.depth_feed is not None:
+                self.depth_feed.publish()
+
+            # let the other instruments' engines and the submitters run
+            await asyncio.sleep(0)
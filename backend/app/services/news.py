@@ -1,15 +1,80 @@
 import asyncio
+import heapq
+import itertools
+import math
 import time
 
+import numpy as np
+from sqlmodel import Session, select
+
+from app.core.config import settings
 from app.core.deps import get_logger
+from app.db.database import engine
+from app.models.news_event import NewsEvent
+from app.models.news_event_factor import NewsEventFactor
 
 logger = get_logger(__name__)
 
 
+# column of news not tied to any macro factor, it moves every instrument
+MARKET = None
+
+
+class DecayGroup:
+    """
+    Running sums, one per factor, of the effects of all live news sharing a half-life
+    They all decay by the same factor, so the group is decayed once instead of per news
+    """
+
+    __slots__ = ("halflife_s", "total", "updated_s", "live")
+
+    def __init__(self, halflife_s, now_s, n_factors):
+        self.halflife_s = halflife_s
+        self.total = np.zeros(n_factors)
+        self.updated_s = now_s
+        self.live = 0  # news still counted in total
+
+    def decay_to(self, now_s):
+        elapsed_s = now_s - self.updated_s
+        if elapsed_s > 0:
+            self.total *= 2 ** (-elapsed_s / self.halflife_s)
+            self.updated_s = now_s
+        return self.total
+
+
 class NewsShockSimulator:
-    def __init__(self):
-        self.news_objects = []
-        self.NEWS_TICK_DELAY = 60
+    """
+    Sum of exponentially decaying news effects, per macro factor
+
+    A news item hits every factor in its "factor_ids" (NewsEventFactor) with its full
+    magnitude, news without factors goes to the MARKET column. factor_ids lists the
+    columns in order, new factors are appended as they show up
+
+    Released news is added to the DecayGroup of its half-life, and pushed on an expiry
+    heap keyed by the time its own effect drops below epsilon. Each tick pops what has
+    expired (subtracting its remaining effect from its group) and decays every group
+    once, so the cost is O(half-life groups) rather than O(every news ever added)
+
+    Upcoming news from the news_events table waits in a heap by release time,
+    add_news_on_tick sleeps until the earliest release and activates it right then
+    """
+
+    def __init__(self, epsilon=None, db_engine=None):
+        self.epsilon = epsilon or settings.NEWS_EFFECT_EPSILON
+        self.db_engine = db_engine or engine
+        self.groups = {}  # half-life -> DecayGroup
+        self.factor_ids = [MARKET]
+        self._columns = {MARKET: 0}
+        # (release_s, seq, news) for news added ahead of its release time
+        self._pending = []
+        # (expiry_s, seq, halflife_s, magnitude, release_s, columns) of every live news
+        self._expiry = []
+        self._seq = itertools.count()
+        # news_events rows are loaded from ts_release_ms >= watermark, minus the ones
+        # already loaded: ID -> release time of loaded rows not behind the watermark
+        self._watermark_ms = None
+        self._seen_ms = {}
+        self._wakeup = None  # set when news lands ahead of the scheduler's next wake up
 
     """
     Exponential decay formula
@@ -23,7 +88,7 @@ class NewsShockSimulator:
             now_s = time.time()
             t0_s = news.get("ts_release_ms", 0) / 1000
 
-            if now_s > t0_s:  # News has not been released, impossible
+            if now_s < t0_s:  # News has not been released, no effect yet
                 return 0
 
             halflife_s = news.get("decay_halflife_s", 1)
@@ -40,33 +105,219 @@ class NewsShockSimulator:
             logger.error(f"Error calculating news effect: {e}", exc_info=True)
             return 0
 
-    def get_total_eff(self):
-        total_eff = 0  # 0 is the baseline
-        for news_object in self.news_objects:
-            total_eff += self.calculate(news_object)
-        return total_eff
+    @staticmethod
+    def _halflife(news):
+        halflife_s = news.get("decay_halflife_s", 1)
+        # Prevent division by zero or negative halflife
+        return halflife_s if halflife_s > 0 else 1
+
+    def get_total_eff(self, now_s=None):
+        """
+        Every factor's effect added up
+        """
+        return float(self.get_factor_effects(now_s).sum())
+
+    def get_factor_effects(self, now_s=None):
+        """
+        Decayed effect per factor, indexed like factor_ids
+        """
+        now_s = time.time() if now_s is None else now_s
+
+        # 1. news whose release time has come
+        self.release_due(now_s)
+
+        # 2. drop what has decayed below epsilon, exactly what it still adds to its group
+        while self._expiry and self._expiry[0][0] <= now_s:
+            _, _, halflife_s, magnitude, release_s, columns = heapq.heappop(
+                self._expiry
+            )
+            group = self.groups[halflife_s]
+            group.decay_to(now_s)
+            group.live -= 1
+            if group.live == 0:  # also clears any rounding left in the sums
+                del self.groups[halflife_s]
+            else:
+                group.total[columns] -= magnitude * 2 ** (
+                    -(now_s - release_s) / halflife_s
+                )
+
+        # 3. one decay per half-life
+        effects = np.zeros(len(self.factor_ids))  # 0 is the baseline
+        for group in self.groups.values():
+            effects += group.decay_to(now_s)
+        return effects
 
-    def add_news_ad_hoc(self, news_object):
+    def release_due(self, now_s):
+        while self._pending and self._pending[0][0] <= now_s:
+            _, _, news = heapq.heappop(self._pending)
+            self._activate(news, now_s)
+
+    def _factor_columns(self, news):
+        factor_ids = news.get("factor_ids") or [MARKET]
+        columns = []
+        for factor_id in factor_ids:
+            column = self._columns.get(factor_id)
+            if column is None:
+                column = self._columns[factor_id] = len(self.factor_ids)
+                self.factor_ids.append(factor_id)
+            columns.append(column)
+
+        # widen the running sums when a factor is seen for the first time
+        for group in self.groups.values():
+            if len(group.total) < len(self.factor_ids):
+                group.total = np.pad(
+                    group.total, (0, len(self.factor_ids) - len(group.total))
+                )
+        return columns
+
+    def _activate(self, news, now_s):
+        release_s = news["ts_release_ms"] / 1000
+        halflife_s = self._halflife(news)
+        magnitude = news["magnitude"]
+        if abs(magnitude) < self.epsilon:
+            return
+        # |magnitude| * 2^(-t / halflife) < epsilon once t > halflife * log2(|magnitude| / epsilon)
+        expiry_s = release_s + halflife_s * math.log2(abs(magnitude) / self.epsilon)
+        if expiry_s <= now_s:  # already decayed away
+            return
+
+        columns = self._factor_columns(news)
+        group = self.groups.get(halflife_s)
+        if group is None:
+            group = self.groups[halflife_s] = DecayGroup(
+                halflife_s, now_s, len(self.factor_ids)
+            )
+        group.decay_to(now_s)
+        group.total[columns] += magnitude * 2 ** (-(now_s - release_s) / halflife_s)
+        group.live += 1
+        heapq.heappush(
+            self._expiry,
+            (expiry_s, next(self._seq), halflife_s, magnitude, release_s, columns),
+        )
+
+    def add_news_ad_hoc(self, news_object, now_s=None):
         if news_object is None:
             return
         required_fields = ["ts_release_ms", "decay_halflife_s", "magnitude"]
         if not all(field in news_object for field in required_fields):
             raise ValueError("News object is missing required fields")
-        self.news_objects.append(news_object)
+
+        now_s = time.time() if now_s is None else now_s
+        release_s = news_object["ts_release_ms"] / 1000
+        if release_s > now_s:  # counted from its release on
+            heapq.heappush(self._pending, (release_s, next(self._seq), news_object))
+            if self._wakeup is not None and self._pending[0][2] is news_object:
+                self._wakeup.set()
+        else:
+            self._activate(news_object, now_s)
+
+    def _load_from_db(self):
+        with Session(self.db_engine) as db:
+            return load_news(db, self._watermark_ms, self._seen_ms)
+
+    async def reload(self):
+        """
+        Queue the news_events rows added since the last reload
+        The query runs in a thread, the heaps are only touched on the event loop
+
+        Scheduled news is entered out of order, so the watermark never moves past the
+        time of the query: a row added later for an earlier release than one already
+        loaded is still picked up, rows loaded before are skipped by their ID
+        """
+        now_ms = int(time.time() * 1000)
+        if self._watermark_ms is None:
+            # news released before the lookback has decayed away long ago
+            self._watermark_ms = now_ms - int(settings.NEWS_LOOKBACK_S * 1000)
+        rows = await asyncio.to_thread(self._load_from_db)
+        for news in rows:
+            self._seen_ms[news["id"]] = news["ts_release_ms"]
+            self.add_news_ad_hoc(news)
+
+        if rows:
+            latest_ms = max(news["ts_release_ms"] for news in rows)
+            self._watermark_ms = max(self._watermark_ms, min(latest_ms, now_ms))
+            self._seen_ms = {
+                news_id: release_ms
+                for news_id, release_ms in self._seen_ms.items()
+                if release_ms >= self._watermark_ms
+            }
+        return len(rows)
 
     async def add_news_on_tick(self):
+        """
+        Release news exactly at its release time
+        Sleeps until the earliest pending release or the next reload, whichever comes
+        first, news added in between wakes it up early if it is due sooner
+        """
         self.is_running = True
+        self._wakeup = asyncio.Event()
+        next_reload_s = 0
         while self.is_running:
             try:
-                # Replace with actual DB query when ready
-                # For now, we're not adding any news automatically
-                # news = await self.db.get_latest_news()  # Example
-                # if news:
-                #     self.add_news_ad_hoc(news)
-                await asyncio.sleep(self.NEWS_TICK_DELAY)
+                # 1. pick up new rows
+                if time.time() >= next_reload_s:
+                    loaded = await self.reload()
+                    if loaded:
+                        logger.info(f"Loaded {loaded} news events")
+                    next_reload_s = time.time() + settings.NEWS_RELOAD_S
+
+                # 2. activate whatever is due
+                self.release_due(time.time())
+
+                # 3. sleep until the next release or reload
+                wake_s = next_reload_s
+                if self._pending:
+                    wake_s = min(wake_s, self._pending[0][0])
+                self._wakeup.clear()
+                # asyncio.timeout rather than wait_for, which on 3.11 can swallow a
+                # cancel that lands together with the wake up
+                try:
+                    async with asyncio.timeout(max(wake_s - time.time(), 0)):
+                        await self._wakeup.wait()
+                except TimeoutError:
+                    pass
             except asyncio.CancelledError:
                 self.is_running = False
                 break
             except Exception as e:
                 logger.error(f"Error in add_news_on_tick: {e}", exc_info=True)
+                next_reload_s = time.time() + settings.NEWS_RELOAD_S
                 await asyncio.sleep(1)
+
+
+def load_news(db: Session, since_ms, seen_ids=()):
+    """
+    NewsEvent rows released at or after since_ms with their factor IDs, oldest first
+    Uses the ts_release_ms index, seen_ids are rows already loaded at or after since_ms
+    """
+    events = [
+        event
+        for event in db.exec(
+            select(NewsEvent)
+            .where(NewsEvent.ts_release_ms >= since_ms)
+            .order_by(NewsEvent.ts_release_ms)
+        ).all()
+        if str(event.id) not in seen_ids
+    ]
+    if not events:
+        return []
+
+    factor_ids = {}
+    for row in db.exec(
+        select(NewsEventFactor).where(
+            NewsEventFactor.news_event_id.in_([event.id for event in events])
+        )
+    ).all():
+        factor_ids.setdefault(row.news_event_id, []).append(str(row.factor_id))
+
+    return [
+        {
+            "id": str(event.id),
+            "ts_release_ms": event.ts_release_ms,
+            "decay_halflife_s": event.decay_halflife_s,
+            "magnitude": event.magnitude,
+            "headline": event.headline,
+            "factor_ids": sorted(factor_ids.get(event.id, [])),
+        }
+        for event in events
+    ]
@@ -1,7 +1,18 @@
 import bisect
-import uuid
+import itertools
+import operator
+from decimal import Decimal
 from enum import Enum
 
+DEFAULT_TICK_SIZE = 0.01
+
+# process-wide so order IDs stay unique across every instrument's book
+_order_ids = itertools.count(1)
+
+
+def next_order_id():
+    return next(_order_ids)
+
 
 class OrderSide(Enum):
     BUY = "buy"
@@ -12,6 +23,132 @@ class OrderStatus(Enum):
     OPEN = "open"
     PARTIALLY_FILLED = "partially_filled"
     FILLED = "filled"
+    # nothing filled and nothing left resting (IOC / FOK / market)
+    CANCELLED = "cancelled"
+    PENDING = "pending"  # stop order waiting for its trigger price
+    REJECTED = "rejected"  # failed validation, never reached the book
+
+
+class OrderType(Enum):
+    LIMIT = "limit"
+    MARKET = "market"
+    STOP = "stop"  # becomes a market order once triggered
+    STOP_LIMIT = "stop_limit"  # becomes a limit order once triggered
+
+
+class TimeInForce(Enum):
+    GTC = "gtc"  # good till cancelled, remainder rests in the book
+    IOC = "ioc"  # immediate or cancel, remainder is cancelled
+    FOK = "fok"  # fill or kill, either fills completely right away or not at all
+
+
+class Order:
+    """
+    Resting limit order as stored in the book
+    id is an integer sequence number, price is fixed-point in integer ticks
+    price is None for market orders, those never rest
+
+    Orders are also the nodes of their price level's queue (level / prev / next),
+    so holding an order is enough to unlink it, no separate node object is needed
+    """
+
+    __slots__ = ("id", "side", "price", "quantity", "user_id", "level", "prev", "next")
+
+    def __init__(self, id, side, price, quantity, user_id):
+        self.id = id
+        self.side = side
+        self.price = price
+        self.quantity = quantity
+        self.user_id = user_id
+        self.level = None
+        self.prev = None
+        self.next = None
+
+    def __repr__(self):
+        return (
+            f"Order(id={self.id}, side={self.side.value}, price={self.price}, "
+            f"quantity={self.quantity}, user_id={self.user_id!r})"
+        )
+
+
+class Fill:
+    """
+    One execution between an incoming order and a resting order
+    price is in ticks, at the resting order's price
+    """
+
+    __slots__ = (
+        "price",
+        "quantity",
+        "aggressor_side",
+        "buy_order_id",
+        "sell_order_id",
+        "buy_user_id",
+        "sell_user_id",
+    )
+
+    def __init__(self, incoming, resting, quantity):
+        buy, sell = (
+            (incoming, resting)
+            if incoming.side == OrderSide.BUY
+            else (resting, incoming)
+        )
+        self.price = resting.price
+        self.quantity = quantity
+        self.aggressor_side = incoming.side
+        self.buy_order_id = buy.id
+        self.sell_order_id = sell.id
+        self.buy_user_id = buy.user_id
+        self.sell_user_id = sell.user_id
+
+
+class PriceLevel:
+    """
+    All resting orders at a single price as a doubly linked FIFO queue, oldest at head
+    quantity is the total resting quantity at this level, kept up to date on every change
+    """
+
+    __slots__ = ("price", "head", "tail", "count", "quantity")
+
+    def __init__(self, price):
+        self.price = price
+        self.head = None
+        self.tail = None
+        self.count = 0
+        self.quantity = 0
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        order = self.head
+        while order is not None:
+            yield order
+            order = order.next
+
+    def append(self, order):
+        order.level = self
+        if self.tail is None:
+            self.head = self.tail = order
+        else:
+            order.prev = self.tail
+            self.tail.next = order
+            self.tail = order
+        self.count += 1
+        self.quantity += order.quantity
+
+    def unlink(self, order):
+        if order.prev is None:
+            self.head = order.next
+        else:
+            order.prev.next = order.next
+        if order.next is None:
+            self.tail = order.prev
+        else:
+            order.next.prev = order.prev
+        order.level = order.prev = order.next = None
+        self.count -= 1
+        self.quantity -= order.quantity
 
 
 class OrderBook:
@@ -24,166 +161,466 @@ class OrderBook:
         "user_id": "u1",
         "side": "buy"
     }
+
+    Dicts like the one above are only used at the boundary (add_order, match_order,
+    best_bid, ...), internally the book works on Order objects with prices in ticks
+    Use add / match / cancel / amend directly to skip the dict conversion
     """
 
-    def __init__(self):
+    def __init__(self, instrument_id=None, tick_size=DEFAULT_TICK_SIZE):
         """
-        Uses binary search, bisect to maintain sorted order
+        instrument_id pins the book to one ticker, orders for any other ticker are rejected
+        tick_size is the price increment, prices must sit on the tick grid
 
-        The worst order always goes first, so
-        buys[0] is the lowest bid order, buys sorted ascending
-        sells[0] is the highest ask order, sells sorted descending
+        Each side is a map of price -> PriceLevel plus a sorted list of the prices,
+        so an insert at an existing price is a dict lookup + queue append, and only a
+        brand new price pays for the bisect into the price list (O(log L) search)
+
+        The worst price always goes first, so
+        _bid_prices is sorted ascending, best bid at _bid_prices[-1]
+        _ask_prices is sorted descending, best ask at _ask_prices[-1]
+        which means the best level on either side can be dropped with an O(1) pop()
         """
-        self.buys = []
-        self.sells = []
+        self.instrument_id = instrument_id
+        self.tick_size = tick_size
+        self._price_decimals = max(-Decimal(str(tick_size)).as_tuple().exponent, 0)
 
-    def add_order(self, order):
-        price = order["price"]
-        side = order["side"]
+        self._bid_levels = {}
+        self._ask_levels = {}
+        self._bid_prices = []
+        self._ask_prices = []
+
+        # order ID -> Order, the order knows its PriceLevel and its side
+        # so cancels and amends never have to search the book
+        self._orders = {}
+        # user ID -> {order ID: None}, a dict rather than a set to keep submission order
+        self._user_orders = {}
+
+        # None until a depth feed attaches, then {(side, price): None} for every level
+        # whose size changed since the last take_level_changes()
+        self.changed_levels = None
 
-        # add ID for easier matching
-        order["id"] = uuid.uuid4()
+    def __len__(self):
+        return len(self._orders)
 
+    def __contains__(self, order_id):
+        return order_id in self._orders
+
+    """
+    Dict adapter, converts between API orders (float prices) and book orders (ticks)
+    """
+
+    def to_ticks(self, price):
+        ticks = round(price / self.tick_size)
+        if abs(ticks * self.tick_size - price) > self.tick_size * 1e-6:
+            raise ValueError(f"Price {price} is not a multiple of {self.tick_size}")
+        return ticks
+
+    def from_ticks(self, ticks):
+        return round(ticks * self.tick_size, self._price_decimals)
+
+    def _check_ticker(self, order):
+        if self.instrument_id is not None and order["ticker"] != self.instrument_id:
+            raise ValueError(
+                f"Order for {order['ticker']} sent to the {self.instrument_id} book"
+            )
+
+    def order_from_dict(self, order, order_id=None):
+        """
+        A missing / None price makes a market order
+        order_id keeps an ID assigned earlier (e.g. a triggered stop), else a new one is drawn
+        """
+        self._check_ticker(order)
+        if order["side"] not in (OrderSide.BUY, OrderSide.SELL):
+            raise ValueError("Invalid side")
+        price = order.get("price")
+        return Order(
+            next_order_id() if order_id is None else order_id,
+            order["side"],
+            None if price is None else self.to_ticks(price),
+            order["quantity"],
+            order["user_id"],
+        )
+
+    def order_to_dict(self, order):
+        return {
+            "id": order.id,
+            "price": None if order.price is None else self.from_ticks(order.price),
+            "quantity": order.quantity,
+            "ticker": self.instrument_id,
+            "user_id": order.user_id,
+            "side": order.side,
+        }
+
+    def fill_to_dict(self, fill):
+        return {
+            "ticker": self.instrument_id,
+            "price": self.from_ticks(fill.price),
+            "quantity": fill.quantity,
+            "aggressor_side": fill.aggressor_side,
+            "buy_order_id": fill.buy_order_id,
+            "sell_order_id": fill.sell_order_id,
+            "buy_user_id": fill.buy_user_id,
+            "sell_user_id": fill.sell_user_id,
+        }
+
+    """
+    Book internals, all on Order objects and tick prices
+    """
+
+    def _side(self, side):
         if side == OrderSide.BUY:
-            prices = [o["price"] for o in self.buys]
-            idx = bisect.bisect_left(prices, price)
-            self.buys.insert(idx, order)
+            return self._bid_levels, self._bid_prices
         elif side == OrderSide.SELL:
-            # Invert sign to maintain descending order
-            prices = [-o["price"] for o in self.sells]
-            idx = bisect.bisect_left(prices, -price)
-            self.sells.insert(idx, order)
-        else:
-            raise ValueError("Invalid side")
+            return self._ask_levels, self._ask_prices
+        raise ValueError("Invalid side")
 
-    def remove_order(self, order):
+    def add(self, order):
         """
-        Remove order from order book
-        Has to be linear scan since multiple orders can have same price
+        Queue an order at the back of its price level and index it
+        """
+        levels, prices = self._side(order.side)
+
+        level = levels.get(order.price)
+        if level is None:
+            level = levels[order.price] = PriceLevel(order.price)
+            if order.side == OrderSide.BUY:
+                bisect.insort(prices, order.price)
+            else:
+                # prices are kept descending, so compare on the negated price
+                bisect.insort(prices, order.price, key=operator.neg)
+
+        level.append(order)
+        if self.changed_levels is not None:
+            self.changed_levels[order.side, order.price] = None
+        self._orders[order.id] = order
+        self._user_orders.setdefault(order.user_id, {})[order.id] = None
+        return order
+
+    def _drop_level(self, levels, prices, price):
+        del levels[price]
+        if prices[-1] == price:  # best level, the common case when matching
+            prices.pop()
+        else:
+            prices.remove(price)
 
-        TODO: Probably can (partially) optimize by using bin search to get range first
+    def _unlink(self, order):
+        """
+        Take an order out of its level and out of both indexes
+        Only an emptied level costs more than O(1), see _drop_level
         """
-        side = order["side"]
-        orders = self.buys if side == OrderSide.BUY else self.sells
+        level = order.level
+        level.unlink(order)
+        if self.changed_levels is not None:
+            self.changed_levels[order.side, level.price] = None
+        if not level:
+            levels, prices = self._side(order.side)
+            self._drop_level(levels, prices, level.price)
+
+        del self._orders[order.id]
+        user_orders = self._user_orders[order.user_id]
+        del user_orders[order.id]
+        if not user_orders:
+            del self._user_orders[order.user_id]
+
+    def _fill(self, order, quantity):
+        """
+        Take quantity off a resting order, removing it once it is fully filled
+        """
+        if quantity >= order.quantity:
+            self._unlink(order)
+            return
 
-        for i, o in enumerate(orders):
-            if o == order:
-                orders.pop(i)
-                return True
-        return False
+        order.quantity -= quantity
+        order.level.quantity -= quantity
+        if self.changed_levels is not None:
+            self.changed_levels[order.side, order.price] = None
 
-    def best_bid(self):
-        if not self.buys:
+    def cancel(self, order_id):
+        """
+        Cancel a resting order by ID in O(1)
+        Returns the cancelled Order, or None if it is not resting (already filled / cancelled)
+        """
+        order = self._orders.get(order_id)
+        if order is None:
             return None
-        return self.buys[-1]
+        self._unlink(order)
+        return order
 
-    def best_ask(self):
-        if not self.sells:
+    def amend(self, order_id, quantity=None, price=None):
+        """
+        Amend a resting order by ID, price in ticks
+        - Reducing quantity at the same price keeps time priority and is O(1)
+        - Increasing quantity or moving the price sends the order to the back of the queue
+        - A price that crosses the other side is rejected, the order would have to match,
+          see OrderProcessor.amend_order
+        Returns the amended Order, or None if it is not resting
+        """
+        order = self._orders.get(order_id)
+        if order is None:
             return None
-        return self.sells[-1]
 
-    def mid_price(self):
-        highest_bid = self.best_bid()
-        lowest_ask = self.best_ask()
-        if highest_bid and lowest_ask:
-            return (highest_bid["price"] + lowest_ask["price"]) / 2
-        return None
+        if quantity is not None and quantity <= 0:
+            raise ValueError("Amended quantity must be positive")
 
-    def match_order(self, order):
+        new_price = order.price if price is None else price
+        new_quantity = order.quantity if quantity is None else quantity
+        if new_price != order.price and self.crosses_spread(order.side, new_price):
+            raise ValueError("Amended price crosses the spread")
+
+        if new_price == order.price and new_quantity <= order.quantity:
+            order.level.quantity -= order.quantity - new_quantity
+            order.quantity = new_quantity
+            if self.changed_levels is not None:
+                self.changed_levels[order.side, order.price] = None
+            return order
+
+        self._unlink(order)
+        order.price = new_price
+        order.quantity = new_quantity
+        return self.add(order)
+
+    def crosses_spread(self, side, price):
         """
-        Matches buy with corresponding sell order, or sell with corresponding buy order
-        Matching should happen based on proximity to mid price, closest to mid price goes first
-        Return status whether matching was successful
-        Partial matching is possible
+        Whether a limit price in ticks would trade against the other side right away
+        """
+        prices = self._ask_prices if side == OrderSide.BUY else self._bid_prices
+        return bool(prices) and self._crosses(side, price, prices[-1])
 
-        TODO Brian -> revisit algo
-        TODO Brian -> write unit tests (test_order_book.py)
-        This function will be called many times so best to optimize
+    def _crosses(self, side, limit_price, price):
+        if limit_price is None:  # market order, everything crosses
+            return True
+        if side == OrderSide.BUY:
+            return price <= limit_price
+        return price >= limit_price
+
+    def fillable_quantity(self, order):
         """
-        # 1. required variables
-        side = order["side"]
-        quantity = order["quantity"]
-        initial_quantity = order["quantity"]
-        opposite_side_orders = self.sells if side == OrderSide.BUY else self.buys
-
-        # 2. nothing to scan through anyways
-        if not opposite_side_orders:
-            self.add_order(order)
-            return OrderStatus.OPEN, initial_quantity
-
-        # 3. no mid price -> order book is only filled on one side
-        mid = self.mid_price()
-        if mid is None:  # we know it's the same side because we did check in 2)
-            mid = opposite_side_orders[0]["price"]  # use the worst
-
-        # 4. look through opposite side orders
-        """
-        TODO Brian -> revisit algo
-        a. Sort once based on proximity to avoid repeated scans when multiple orders are meant to be matched
-        b. Create a mapping of order ID -> delta (so we can update order book in one linear scan)
-        c. After iteration, status can be "FILLED", "PARTIALLY_FILLED", "OPEN"
-        """
-        sorted_opposites = sorted(
-            opposite_side_orders, key=lambda o: abs(o["price"] - mid)
-        )
-        order_deltas = {}  # maps order ID -> delta
-        matched_trades = (
-            []
-        )  # keep track of trades that are matched (do we need this for logs?)
-
-        i = 0
-        while i < len(sorted_opposites) and quantity > 0:
-            opposite = sorted_opposites[i]
-
-            # skip if price not compatible
-            if (side == OrderSide.BUY and opposite["price"] > order["price"]) or (
-                side == OrderSide.SELL and opposite["price"] < order["price"]
-            ):
-                i += 1
-                continue
-
-            # determine fill amount
-            traded_qty = min(quantity, opposite["quantity"])
-            trade_price = opposite[
-                "price"
-            ]  # or mid, or last price depending on your model
-
-            # keep track of deltas for opposite orders
-            order_deltas[opposite["id"]] = traded_qty
-
-            matched_trades.append(
-                {
-                    "buy": order if side == OrderSide.BUY else opposite,
-                    "sell": opposite if side == OrderSide.BUY else order,
-                    "price": trade_price,
-                    "quantity": traded_qty,
-                }
-            )
+        How much of an order could fill right now, capped at its quantity
+        Sums whole levels from the top of the book, O(crossing levels touched)
+        Used to check fill or kill orders before touching the book
+        """
+        if order.side == OrderSide.BUY:
+            levels, prices = self._ask_levels, self._ask_prices
+        else:
+            levels, prices = self._bid_levels, self._bid_prices
 
-            # update quantity remaining
-            quantity -= traded_qty
+        available = 0
+        for price in reversed(prices):
+            if available >= order.quantity or not self._crosses(
+                order.side, order.price, price
+            ):
+                break
+            available += levels[price].quantity
+        return min(available, order.quantity)
 
-            # move to next order
-            i += 1
+    def match(self, order, rest=True):
+        """
+        Matches buy with corresponding sell order, or sell with corresponding buy order
+        Price-time priority: best opposite price first, oldest order first within a price
+        Trades happen at the resting order's price
+        Partial matching is possible, any remainder rests in the book unless rest is False
+        (IOC / market orders), market orders (price None) never rest
 
-        # 5. update actual order book using stored deltas in one linear scan (as mentioned in 4b)
-        # !!! MAKE A COPY since we are modifying the list in place
-        for original_opposite in list(opposite_side_orders):
-            if original_opposite["id"] in order_deltas:
-                original_opposite["quantity"] -= order_deltas[original_opposite["id"]]
-                if original_opposite["quantity"] == 0:
-                    opposite_side_orders.remove(original_opposite)
+        Only the crossing levels at the top of the book are touched, and we stop at the
+        first price that no longer crosses, so the cost is O(number of fills) and does
+        not depend on how deep the book is
 
-        # 6. determine matching status
-        matching_status = None
-        if quantity == initial_quantity:  # NOTHING was processed
+        Returns (status, fills), order.quantity is left at the unfilled quantity
+        """
+        # 1. required variables
+        side = order.side
+        limit_price = order.price
+        initial_quantity = order.quantity
+        if side == OrderSide.BUY:
+            levels, prices = self._ask_levels, self._ask_prices
+        else:
+            levels, prices = self._bid_levels, self._bid_prices
+
+        fills = []
+
+        # 2. walk the opposite side from the best price while it still crosses
+        while order.quantity > 0 and prices:
+            best_price = prices[-1]
+            if not self._crosses(side, limit_price, best_price):
+                break
+
+            level = levels[best_price]
+            while order.quantity > 0 and level.head is not None:
+                resting = level.head
+                traded_qty = min(order.quantity, resting.quantity)
+                fills.append(Fill(order, resting, traded_qty))
+                order.quantity -= traded_qty
+                # when the last order of the level goes, so does best_price from prices
+                self._fill(resting, traded_qty)
+
+        # 3. determine matching status, rest whatever is left
+        if order.quantity == initial_quantity:  # NOTHING was processed
             matching_status = OrderStatus.OPEN
-            self.add_order(order)
-        elif quantity > 0:  # SOME were processed
-            order["quantity"] = quantity
+        elif order.quantity > 0:  # SOME were processed
             matching_status = OrderStatus.PARTIALLY_FILLED
-            self.add_order(order)
         else:  # EVERYTHING was processed
             matching_status = OrderStatus.FILLED
 
-        return matching_status, quantity
+        if order.quantity > 0:
+            if rest and limit_price is not None:
+                self.add(order)
+            elif not fills:
+                matching_status = OrderStatus.CANCELLED
+
+        return matching_status, fills
+
+    """
+    Dict based API
+    """
+
+    @staticmethod
+    def _flatten(levels, prices):
+        # within a level the oldest order is matched first, so it goes last like the best price
+        return [o for p in prices for o in reversed(list(levels[p]))]
+
+    @property
+    def buys(self):
+        """
+        Flattened view of the bids, worst first, so buys[-1] is the next order to be hit
+        Built on demand, use best_bid / depth on hot paths
+        """
+        return [
+            self.order_to_dict(o)
+            for o in self._flatten(self._bid_levels, self._bid_prices)
+        ]
+
+    @property
+    def sells(self):
+        """
+        Flattened view of the asks, worst first, so sells[-1] is the next order to be lifted
+        """
+        return [
+            self.order_to_dict(o)
+            for o in self._flatten(self._ask_levels, self._ask_prices)
+        ]
+
+    def depth(self, side, levels=None):
+        """
+        Aggregated [price, quantity] per level, best price first
+        """
+        side_levels, prices = self._side(side)
+        top = prices[::-1] if levels is None else prices[: -levels - 1 : -1]
+        return [[self.from_ticks(p), side_levels[p].quantity] for p in top]
+
+    def take_level_changes(self):
+        """
+        [price, new quantity] of every level changed since the last call, as
+        (bids, asks), quantity 0 means the level is gone. Needs changed_levels set
+        """
+        bids, asks = [], []
+        for side, price in self.changed_levels:
+            levels, out = (
+                (self._bid_levels, bids)
+                if side == OrderSide.BUY
+                else (self._ask_levels, asks)
+            )
+            level = levels.get(price)
+            out.append([self.from_ticks(price), level.quantity if level else 0])
+        self.changed_levels.clear()
+        return bids, asks
+
+    def add_order(self, order):
+        """
+        Rest an order dict without matching it, the assigned ID is written back to it
+        """
+        order["id"] = self.add(self.order_from_dict(order)).id
+        return order
+
+    def get_order(self, order_id):
+        order = self._orders.get(order_id)
+        return self.order_to_dict(order) if order is not None else None
+
+    def user_order_count(self, user_id):
+        return len(self._user_orders.get(user_id, ()))
+
+    def user_notional(self, user_id):
+        """
+        price * quantity of a user's resting orders, O(orders the user has resting)
+        """
+        orders = self._orders
+        return self.from_ticks(
+            sum(
+                orders[order_id].price * orders[order_id].quantity
+                for order_id in self._user_orders.get(user_id, ())
+            )
+        )
+
+    def get_user_orders(self, user_id):
+        return [
+            self.order_to_dict(self._orders[order_id])
+            for order_id in self._user_orders.get(user_id, ())
+        ]
+
+    def cancel_order(self, order_id):
+        """
+        Cancel a resting order by ID in O(1)
+        Returns the cancelled order, or None if it is not resting (already filled / cancelled)
+        """
+        order = self.cancel(order_id)
+        return self.order_to_dict(order) if order is not None else None
+
+    def cancel_all(self, user_id):
+        """
+        Cancel every resting order of a user, O(number of orders the user has resting)
+        Returns the cancelled orders
+        """
+        order_ids = self._user_orders.get(user_id)
+        if not order_ids:
+            return []
+        # _unlink mutates the per-user index, so walk a copy
+        return [self.cancel_order(order_id) for order_id in list(order_ids)]
+
+    def amend_order(self, order_id, quantity=None, price=None):
+        """
+        Amend a resting order by ID, see amend
+        Returns the amended order, or None if it is not resting
+        """
+        order = self.amend(
+            order_id, quantity, None if price is None else self.to_ticks(price)
+        )
+        return self.order_to_dict(order) if order is not None else None
+
+    def remove_order(self, order):
+        """
+        Remove order from order book
+        Kept for callers holding the order itself, goes through the ID index
+        """
+        return self.cancel(order.get("id")) is not None
+
+    def best_bid(self):
+        if not self._bid_prices:
+            return None
+        return self.order_to_dict(self._bid_levels[self._bid_prices[-1]].head)
+
+    def best_ask(self):
+        if not self._ask_prices:
+            return None
+        return self.order_to_dict(self._ask_levels[self._ask_prices[-1]].head)
+
+    def mid_price(self):
+        if self._bid_prices and self._ask_prices:
+            return (
+                self.from_ticks(self._bid_prices[-1])
+                + self.from_ticks(self._ask_prices[-1])
+            ) / 2
+        return None
+
+    def match_order(self, order):
+        """
+        Match an order dict, see match
+        The assigned ID is written back to the dict, as is the quantity left resting
+
+        Returns (status, remaining quantity, fills)
+        """
+        book_order = self.order_from_dict(order)
+        order["id"] = book_order.id
+        status, fills = self.match(book_order)
+        if book_order.quantity > 0:
+            order["quantity"] = book_order.quantity
+        return status, book_order.quantity, [self.fill_to_dict(f) for f in fills]
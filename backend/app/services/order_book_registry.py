@@ -0,0 +1,133 @@
+from contextlib import contextmanager
+
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.deps import get_logger
+from app.models.instrument import Instrument
+from app.services.depth_feed import DepthFeed
+from app.services.matching_engine import MatchingEngine
+from app.services.order_book import OrderBook
+from app.services.order_processor import OrderProcessor
+
+logger = get_logger(__name__)
+
+
+class UnknownInstrumentError(KeyError):
+    pass
+
+
+class OrderBookRegistry:
+    """
+    Instrument ID -> OrderBook, so every ticker is matched in its own book
+
+    Books are created lazily on first use, only for registered instruments
+    Each instrument also gets its own MatchingEngine, the single writer of its book,
+    so a burst of orders on one hot ticker only queues behind that ticker and never
+    blocks matching on the others, and a DepthFeed publishing the book's level changes
+    """
+
+    def __init__(self, instrument_ids=(), tick_size=None, trade_bus=None):
+        self._instrument_ids = set(instrument_ids)
+        self.tick_size = tick_size or settings.PRICE_TICK_SIZE
+        # fills of every book are published on this bus
+        self.trade_bus = trade_bus
+        self._engines = {}
+        # orders and notional of batches validated but not processed yet, per user,
+        # so a concurrent batch of the same user can't pass the limits on stale counts
+        self._reserved_orders = {}
+        self._reserved_notional = {}  # (user ID, instrument ID) -> notional
+
+    def __contains__(self, instrument_id):
+        return instrument_id in self._instrument_ids
+
+    @property
+    def instrument_ids(self):
+        return sorted(self._instrument_ids)
+
+    def register(self, instrument_id):
+        self._instrument_ids.add(instrument_id)
+
+    def load_instruments(self, db: Session):
+        """
+        Register every row of the instruments table, books are still created lazily
+        """
+        instrument_ids = db.exec(select(Instrument.id)).all()
+        self._instrument_ids.update(instrument_ids)
+        logger.info(
+            f"Loaded {len(instrument_ids)} instruments into order book registry"
+        )
+        return instrument_ids
+
+    def get(self, instrument_id) -> OrderBook:
+        """
+        Read access to an instrument's book
+        Mutate it only through engine(), the engine's task is its single writer
+        """
+        return self.engine(instrument_id).order_book
+
+    def engine(self, instrument_id) -> MatchingEngine:
+        engine = self._engines.get(instrument_id)
+        if engine is None:
+            if instrument_id not in self._instrument_ids:
+                raise UnknownInstrumentError(instrument_id)
+            book = OrderBook(instrument_id=instrument_id, tick_size=self.tick_size)
+            engine = self._engines[instrument_id] = MatchingEngine(
+                instrument_id,
+                OrderProcessor(book, trade_bus=self.trade_bus),
+                depth_feed=DepthFeed(book),
+            )
+        return engine
+
+    def depth_feed(self, instrument_id) -> DepthFeed:
+        return self.engine(instrument_id).depth_feed
+
+    def user_order_count(self, user_id):
+        """
+        Resting orders and pending stops of a user across every instrument,
+        plus the orders reserved by batches still on their way to the engines
+        """
+        return self._reserved_orders.get(user_id, 0) + sum(
+            engine.order_processor.user_order_count(user_id)
+            for engine in self._engines.values()
+        )
+
+    def user_notional(self, user_id, instrument_id):
+        """
+        Notional of a user's resting orders and pending stops in one instrument,
+        plus what is reserved there
+        """
+        notional = self._reserved_notional.get((user_id, instrument_id), 0.0)
+        engine = self._engines.get(instrument_id)
+        if engine is not None:
+            notional += engine.order_processor.user_notional(user_id)
+        return notional
+
+    @contextmanager
+    def reserve(self, user_id, orders, notional):
+        """
+        Hold orders (a count) and notional ({instrument ID: amount}) against the user's
+        limits until the batch has been processed. Taken right after validation with no
+        await in between, so it is atomic on the event loop
+        """
+        self._reserved_orders[user_id] = self._reserved_orders.get(user_id, 0) + orders
+        for instrument_id, amount in notional.items():
+            key = user_id, instrument_id
+            self._reserved_notional[key] = (
+                self._reserved_notional.get(key, 0.0) + amount
+            )
+        try:
+            yield
+        finally:
+            self._reserved_orders[user_id] -= orders
+            if not self._reserved_orders[user_id]:
+                del self._reserved_orders[user_id]
+            for instrument_id, amount in notional.items():
+                key = user_id, instrument_id
+                self._reserved_notional[key] -= amount
+                if abs(self._reserved_notional[key]) < 1e-9:
+                    del self._reserved_notional[key]
+
+    async def stop(self):
+        for engine in self._engines.values():
+            await engine.stop()
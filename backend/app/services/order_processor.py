@@ -1,40 +1,235 @@
+import time
+
+from app.services.order_book import (
+    OrderStatus,
+    OrderType,
+    TimeInForce,
+    next_order_id,
+)
+from app.services.stop_orders import StopOrderIndex
+from app.services.trade_bus import TradeEvent
+
+
 class OrderProcessor:
-    def __init__(self, order_book, price_engine):
+    def __init__(self, order_book, price_engine=None, trade_bus=None):
         self.order_book = order_book
         self.price_engine = price_engine
+        # every fill is published here as a TradeEvent
+        self.trade_bus = trade_bus
+
+        self.stop_orders = StopOrderIndex()
+        self.last_price = None  # last trade price in ticks, drives the stop triggers
 
     def process_order(self, order):
         """
-        See expected order format in order_book.py
+        See expected order format in order_book.py, plus the optional fields
+        "type": OrderType, defaults to LIMIT
+        "time_in_force": TimeInForce, defaults to GTC
+        "stop_price": trigger price for STOP / STOP_LIMIT orders
+
+        - LIMIT: match, then the remainder rests (GTC) or is cancelled (IOC),
+          FOK orders only execute if they can fill completely right away
+        - MARKET: match at any price, the remainder is cancelled, "price" is ignored
+        - STOP / STOP_LIMIT: parked in the stop index until the last trade price reaches
+          stop_price, then sent on as a MARKET / LIMIT order
 
-        Match order with order book, use match_order in order book
-        - If successful, modify / remove corresponding order, then modify price in price engine (DO THIS ONE LATER)
-        - If unsuccessful, add order to order book
+        Fills move the last trade price, which can trigger stops, those are processed
+        right after and returned under "triggered_orders"
         Return status of order
 
-        TODO: handle market, limit, stop order
+        Price engine update will be implemented later
         """
-        processing_status, unprocessed_quantity = self.order_book.match_order(order)
+        order_type = order.get("type", OrderType.LIMIT)
+        if order_type in (OrderType.STOP, OrderType.STOP_LIMIT):
+            result = self._place_stop(order)
+        else:
+            result = self._execute(order)
+
+        result["triggered_orders"] = self._run_stops()
+        return result
+
+    def process_orders(self, orders):
+        """
+        Process a batch of orders back to back, one result per order in the same order
+        An invalid order is rejected on its own without failing the rest of the batch
+        """
+        results = []
+        for order in orders:
+            try:
+                results.append(self.process_order(order))
+            except ValueError as e:
+                results.append({"status": OrderStatus.REJECTED, "message": str(e)})
+        return results
+
+    def _execute(self, order, order_id=None):
+        """
+        Match a market / limit order against the book
+        """
+        order_type = order.get("type", OrderType.LIMIT)
+        time_in_force = order.get("time_in_force", TimeInForce.GTC)
+
+        if order_type == OrderType.MARKET:
+            book_order = self.order_book.order_from_dict(
+                {**order, "price": None}, order_id
+            )
+        elif order.get("price") is None:
+            raise ValueError("Limit orders need a price")
+        else:
+            book_order = self.order_book.order_from_dict(order, order_id)
+        order["id"] = book_order.id
+
+        rest = order_type == OrderType.LIMIT and time_in_force == TimeInForce.GTC
+        if (
+            time_in_force == TimeInForce.FOK
+            and self.order_book.fillable_quantity(book_order) < book_order.quantity
+        ):
+            processing_status, fills = OrderStatus.CANCELLED, []
+            message = "Order could not be filled in full, killed"
+        else:
+            processing_status, fills = self.order_book.match(book_order, rest=rest)
+            message = "Order processed successfully"
+            if not rest and book_order.quantity > 0:
+                message = "Order processed, unfilled quantity cancelled"
+
+        if fills:
+            self.last_price = fills[-1].price
+            if self.trade_bus is not None:
+                self._publish(fills)
 
-        # Price engine update will be implemented later
         return {
             "status": processing_status,
-            "message": "Order processed successfully",
-            "unprocessed_quantity": unprocessed_quantity,
+            "message": message,
+            "order_id": book_order.id,
+            "unprocessed_quantity": book_order.quantity,
+            "fills": [self.order_book.fill_to_dict(f) for f in fills],
         }
 
+    def _publish(self, fills):
+        book = self.order_book
+        now = time.time()
+        for fill in fills:
+            self.trade_bus.publish(
+                TradeEvent(book.instrument_id, book.from_ticks(fill.price), fill, now)
+            )
+
+    def _place_stop(self, order):
+        if order.get("stop_price") is None:
+            raise ValueError("Stop orders need a stop_price")
+        if order["type"] == OrderType.STOP_LIMIT and order.get("price") is None:
+            raise ValueError("Stop-limit orders need a limit price")
+
+        # validates side / ticker / prices now rather than when the stop fires
+        self.order_book.order_from_dict(order)
+        stop_price = self.order_book.to_ticks(order["stop_price"])
+
+        order["id"] = next_order_id()
+        self.stop_orders.add(order["id"], order["side"], stop_price, order)
+        return {
+            "status": OrderStatus.PENDING,
+            "message": "Stop order accepted",
+            "order_id": order["id"],
+            "unprocessed_quantity": order["quantity"],
+            "fills": [],
+        }
+
+    def _run_stops(self):
+        """
+        Fire every stop the last trade price has reached
+        Their fills can move the price further and fire more stops, so repeat until quiet
+        """
+        results = []
+        while self.last_price is not None:
+            triggered = self.stop_orders.trigger(self.last_price)
+            if not triggered:
+                break
+            for order_id, stop in triggered:
+                order_type = (
+                    OrderType.MARKET
+                    if stop["type"] == OrderType.STOP
+                    else OrderType.LIMIT
+                )
+                results.append(self._execute({**stop, "type": order_type}, order_id))
+        return results
+
     def cancel_order(self, order):
         """
         See expected order format in order_book.py
 
-        Remove order from order book
+        Remove order from order book (or from the pending stops) by its ID
         Return status of cancellation
         """
-        success = self.order_book.remove_order(order)
-        if success:
+        cancelled = self.order_book.cancel_order(order["id"])
+        if cancelled is None:
+            cancelled = self.stop_orders.cancel(order["id"])
+
+        if cancelled is not None:
             return {"status": "CANCELLED", "message": "Order successfully cancelled"}
-        else:  # most likely will be impossible to reach this point
+        else:  # already filled or cancelled
             return {
                 "status": "NOT_FOUND",
                 "message": "Order not found in the order book",
             }
+
+    def amend_order(self, order_id, quantity=None, price=None):
+        """
+        Amend a resting order, price as in order dicts (not ticks)
+        A new price that crosses the other side can't just rest there, the order is taken
+        out and matched again as a limit order keeping its ID, so the book never crosses
+
+        Returns a result like process_order, or None if the order is not resting
+        """
+        book = self.order_book
+        order = book.get_order(order_id)
+        if order is None:
+            return None
+
+        if quantity is not None and quantity <= 0:
+            raise ValueError("Amended quantity must be positive")
+
+        price = order["price"] if price is None else price
+        quantity = order["quantity"] if quantity is None else quantity
+        ticks = book.to_ticks(price)
+        if book.crosses_spread(order["side"], ticks):
+            book.cancel(order_id)
+            result = self._execute(
+                {**order, "price": price, "quantity": quantity}, order_id
+            )
+            result["triggered_orders"] = self._run_stops()
+            return result
+
+        amended = book.amend(order_id, quantity, ticks)
+        return {
+            "status": OrderStatus.OPEN,
+            "message": "Order amended",
+            "order_id": order_id,
+            "unprocessed_quantity": amended.quantity,
+            "fills": [],
+            "triggered_orders": [],
+        }
+
+    def user_order_count(self, user_id):
+        """
+        Resting orders plus pending stops of a user
+        """
+        book = self.order_book.user_order_count(user_id)
+        return book + self.stop_orders.user_order_count(user_id)
+
+    def user_notional(self, user_id):
+        """
+        Notional of a user's resting orders and pending stops
+        """
+        book = self.order_book.user_notional(user_id)
+        return book + self.stop_orders.user_notional(user_id)
+
+    def cancel_all_orders(self, user_id):
+        """
+        Remove every resting order and pending stop of a user,
+        e.g. at the end of a competition
+        """
+        cancelled = self.order_book.cancel_all(user_id)
+        cancelled += self.stop_orders.cancel_all(user_id)
+        return {
+            "status": "CANCELLED",
+            "message": f"{len(cancelled)} orders cancelled",
+            "cancelled_order_ids": [order["id"] for order in cancelled],
+        }
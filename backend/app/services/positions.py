@@ -0,0 +1,83 @@
+class Position:
+    """
+    Net quantity in one instrument at its average cost, short positions are negative
+    Trades that reduce the position realize PnL against the average cost
+    """
+
+    __slots__ = ("quantity", "avg_price", "realized_pnl")
+
+    def __init__(self):
+        self.quantity = 0
+        self.avg_price = 0.0
+        self.realized_pnl = 0.0
+
+    def apply(self, quantity, price):
+        """
+        quantity is signed, positive for a buy
+        """
+        # 1. opening or adding to the position moves the average cost
+        if self.quantity == 0 or (self.quantity > 0) == (quantity > 0):
+            total = self.quantity + quantity
+            self.avg_price = (self.avg_price * self.quantity + price * quantity) / total
+            self.quantity = total
+            return
+
+        # 2. reducing realizes PnL on the closed part
+        closed = min(abs(quantity), abs(self.quantity))
+        direction = 1 if self.quantity > 0 else -1
+        self.realized_pnl += closed * direction * (price - self.avg_price)
+        self.quantity += quantity
+
+        # 3. flat, or flipped to the other side at the trade price
+        if self.quantity == 0:
+            self.avg_price = 0.0
+        elif (self.quantity > 0) != (direction > 0):
+            self.avg_price = price
+
+    def unrealized_pnl(self, mark_price):
+        return self.quantity * (mark_price - self.avg_price)
+
+
+class PositionBook:
+    """
+    Positions and PnL of every user, kept up to date from the trade bus
+    Positions are marked to the last trade price of each instrument
+    """
+
+    def __init__(self):
+        # user ID -> {instrument ID: Position}
+        self.positions = {}
+        self.last_prices = {}
+
+    def on_trade(self, event):
+        self.last_prices[event.instrument_id] = event.price
+        self._apply(event.buy_user_id, event.instrument_id, event.quantity, event.price)
+        self._apply(
+            event.sell_user_id, event.instrument_id, -event.quantity, event.price
+        )
+
+    def _apply(self, user_id, instrument_id, quantity, price):
+        positions = self.positions.setdefault(user_id, {})
+        position = positions.get(instrument_id)
+        if position is None:
+            position = positions[instrument_id] = Position()
+        position.apply(quantity, price)
+
+    def get(self, user_id, instrument_id):
+        return self.positions.get(user_id, {}).get(instrument_id)
+
+    def summary(self, user_id):
+        rows = []
+        for instrument_id, position in self.positions.get(user_id, {}).items():
+            mark = self.last_prices.get(instrument_id, position.avg_price)
+            rows.append(
+                {
+                    "ticker": instrument_id,
+                    "quantity": position.quantity,
+                    "avg_price": position.avg_price,
+                    "last_price": mark,
+                    "realized_pnl": position.realized_pnl,
+                    "unrealized_pnl": position.unrealized_pnl(mark),
+                }
+            )
+        return rows
@@ -0,0 +1,140 @@
+import numpy as np
+
+from app.core.config import settings
+
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(5)
+
+
+class RingBuffer:
+    """
+    Fixed-size ring of rows in a NumPy array
+
+    Every row is written twice, at i and at i + capacity, so the most recent n rows are
+    always one contiguous slice and reading them is a view, never a copy
+    """
+
+    def __init__(self, capacity, shape=(), dtype=np.float64):
+        self.capacity = capacity
+        self._data = np.zeros((2 * capacity, *shape), dtype=dtype)
+        self._next = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, row):
+        self._data[self._next] = row
+        self._data[self._next + self.capacity] = row
+        self._next = (self._next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def last_row(self):
+        """
+        View of the newest row, call sync_last() after writing to it
+        """
+        i = (self._next - 1) % self.capacity
+        return self._data[i]
+
+    def sync_last(self):
+        i = (self._next - 1) % self.capacity
+        self._data[i + self.capacity] = self._data[i]
+
+    def last(self, n=None):
+        """
+        The newest n rows (all of them by default), oldest first, as a view
+        """
+        n = self.count if n is None else min(n, self.count)
+        end = self._next + self.capacity
+        return self._data[end - n : end]
+
+
+class BarSeries:
+    """
+    OHLCV bars of one interval for every instrument, updated in O(1) per tick
+    Each bar row is (n_instruments, 5) with OPEN / HIGH / LOW / CLOSE / VOLUME
+    """
+
+    def __init__(self, interval_s, n_instruments, capacity):
+        self.interval_s = interval_s
+        self.bars = RingBuffer(capacity, (n_instruments, 5))
+        self.starts = RingBuffer(capacity)
+        self._bucket = None
+        self._new_bar = np.zeros((n_instruments, 5))
+
+    def update(self, prices, ts):
+        bucket = int(ts // self.interval_s)
+        if bucket != self._bucket:
+            self._bucket = bucket
+            self._new_bar[:, :VOLUME] = prices[:, None]
+            self.bars.append(self._new_bar)
+            self.starts.append(bucket * self.interval_s)
+            return
+
+        bar = self.bars.last_row()
+        np.maximum(bar[:, HIGH], prices, out=bar[:, HIGH])
+        np.minimum(bar[:, LOW], prices, out=bar[:, LOW])
+        bar[:, CLOSE] = prices
+        self.bars.sync_last()
+
+    def add_volume(self, index, quantity):
+        if self._bucket is None:
+            return
+        self.bars.last_row()[index, VOLUME] += quantity
+        self.bars.sync_last()
+
+
+class PriceHistory:
+    """
+    In-memory tick history and OHLCV bars for every instrument of the price engine
+
+    Ticks are kept in a fixed-size ring (PRICE_HISTORY_TICKS), bars per interval in
+    BAR_INTERVALS_S (BAR_HISTORY bars each). Recording a tick is a handful of array
+    writes for all instruments together, reads are views into the rings
+    """
+
+    def __init__(
+        self, tickers, tick_capacity=None, intervals_s=None, bar_capacity=None
+    ):
+        self.tickers = list(tickers)
+        self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        n = len(self.tickers)
+
+        self.times = RingBuffer(tick_capacity or settings.PRICE_HISTORY_TICKS)
+        self.prices = RingBuffer(self.times.capacity, (n,))
+        self.bar_series = {
+            interval_s: BarSeries(interval_s, n, bar_capacity or settings.BAR_HISTORY)
+            for interval_s in (intervals_s or settings.BAR_INTERVALS_S)
+        }
+
+    def record(self, prices, ts):
+        """
+        prices: array of the latest price per instrument, ordered like tickers
+        """
+        self.times.append(ts)
+        self.prices.append(prices)
+        for series in self.bar_series.values():
+            series.update(prices, ts)
+
+    def record_volume(self, ticker, quantity):
+        index = self.index.get(ticker)
+        if index is None:
+            return
+        for series in self.bar_series.values():
+            series.add_volume(index, quantity)
+
+    def ticks(self, ticker, limit=None):
+        """
+        (times, prices) views of the newest ticks of one instrument, oldest first
+        """
+        return self.times.last(limit), self.prices.last(limit)[:, self.index[ticker]]
+
+    def bars(self, ticker, interval_s, limit=None):
+        """
+        (bar start times, bars) views, bars is (n, 5) OPEN / HIGH / LOW / CLOSE / VOLUME
+        The last bar is the one still being built
+        """
+        series = self.bar_series[interval_s]
+        return (
+            series.starts.last(limit),
+            series.bars.last(limit)[:, self.index[ticker]],
+        )
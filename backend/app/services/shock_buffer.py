@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.core.config import settings
+
+# one worker is plenty, a block takes milliseconds and only one is ever in flight per buffer
+_refill_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shock-refill")
+
+
+class ShockBuffer:
+    """
+    Pre-generated standard normal draws, one row of width draws per tick
+
+    Draws are generated a block of ticks at a time, so the price loop pays NumPy's call
+    overhead once per block and just hands out the next row on every tick. While a block
+    is being read the next one is generated on a background thread
+
+    Block i only depends on (seed, stream, i): it is drawn from its own child of the seed
+    sequence, so refill timing cannot change the numbers and any tick can be replayed by
+    seeking straight to it. Buffers sharing a seed use different streams
+    (e.g. instruments and factors) so their draws are independent
+
+    seed can be None, the chosen entropy is then in seed_entropy so the session can be
+    replayed later. Replays need the same width and SHOCK_BLOCK_SIZE, those set the layout
+    """
+
+    def __init__(self, width, seed=None, stream=0, block_ticks=None):
+        self.width = width
+        self.stream = stream
+        self.block_ticks = block_ticks or max(
+            settings.SHOCK_BLOCK_SIZE // max(width, 1), 1
+        )
+        self.seed_entropy = np.random.SeedSequence(seed).entropy
+
+        self._block = None
+        self._block_index = None
+        self._pos = 0
+        self._next = None  # (block index, future) being generated in the background
+        self.seek(0)
+
+    def _generate(self, block_index):
+        seed_sequence = np.random.SeedSequence(
+            self.seed_entropy, spawn_key=(self.stream, block_index)
+        )
+        return np.random.default_rng(seed_sequence).standard_normal(
+            (self.block_ticks, self.width)
+        )
+
+    def _load(self, block_index):
+        if self._next is not None and self._next[0] == block_index:
+            block = self._next[1].result()  # normally already done
+        else:
+            block = self._generate(block_index)
+
+        self._block = block
+        self._block_index = block_index
+        self._next = (
+            block_index + 1,
+            _refill_pool.submit(self._generate, block_index + 1),
+        )
+
+    @property
+    def tick(self):
+        return self._block_index * self.block_ticks + self._pos
+
+    def seek(self, tick):
+        """
+        Make next() return the draws of the given tick
+        """
+        block_index, pos = divmod(tick, self.block_ticks)
+        if block_index != self._block_index:
+            self._load(block_index)
+        self._pos = pos
+
+    def next(self):
+        """
+        Draws for the next tick, a read-only view into the current block
+        """
+        if self._pos == self.block_ticks:
+            self._load(self._block_index + 1)
+            self._pos = 0
+        row = self._block[self._pos]
+        self._pos += 1
+        return row
@@ -0,0 +1,128 @@
+import bisect
+import operator
+
+from app.services.order_book import OrderSide, OrderType
+
+
+class StopOrderIndex:
+    """
+    Pending stop / stop-limit orders keyed by trigger price (in ticks)
+
+    A buy stop fires once the last trade price rises to its stop price,
+    a sell stop once it falls to it
+
+    Each side is laid out like a book side, stop price -> orders plus a sorted list of the
+    stop prices, with the next price to fire at the end:
+    _buy_prices is sorted descending, lowest buy stop at _buy_prices[-1]
+    _sell_prices is sorted ascending, highest sell stop at _sell_prices[-1]
+    so a price update only pops the levels it actually crossed and never scans the rest
+    """
+
+    def __init__(self):
+        self._buy_levels = {}
+        self._sell_levels = {}
+        self._buy_prices = []
+        self._sell_prices = []
+
+        # order ID -> (side, stop price), for O(1) cancel
+        self._orders = {}
+        # user ID -> {order ID: None}, like the book's per-user index
+        self._user_orders = {}
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __contains__(self, order_id):
+        return order_id in self._orders
+
+    def _side(self, side):
+        if side == OrderSide.BUY:
+            return self._buy_levels, self._buy_prices
+        elif side == OrderSide.SELL:
+            return self._sell_levels, self._sell_prices
+        raise ValueError("Invalid side")
+
+    def add(self, order_id, side, stop_price, order):
+        levels, prices = self._side(side)
+
+        level = levels.get(stop_price)
+        if level is None:
+            # a dict keeps arrival order within the level and still allows O(1) cancel
+            level = levels[stop_price] = {}
+            if side == OrderSide.BUY:
+                bisect.insort(prices, stop_price, key=operator.neg)
+            else:
+                bisect.insort(prices, stop_price)
+
+        level[order_id] = order
+        self._orders[order_id] = (side, stop_price)
+        self._user_orders.setdefault(order["user_id"], {})[order_id] = None
+
+    def _unindex(self, order_id, order):
+        user_orders = self._user_orders[order["user_id"]]
+        del user_orders[order_id]
+        if not user_orders:
+            del self._user_orders[order["user_id"]]
+
+    def cancel(self, order_id):
+        """
+        Returns the cancelled order, or None if it is not pending
+        """
+        entry = self._orders.pop(order_id, None)
+        if entry is None:
+            return None
+
+        side, stop_price = entry
+        levels, prices = self._side(side)
+        level = levels[stop_price]
+        order = level.pop(order_id)
+        if not level:
+            del levels[stop_price]
+            prices.remove(stop_price)
+        self._unindex(order_id, order)
+        return order
+
+    def user_order_count(self, user_id):
+        return len(self._user_orders.get(user_id, ()))
+
+    def user_notional(self, user_id):
+        """
+        Notional of a user's stops once they fire, at the limit price or the stop price
+        """
+        total = 0.0
+        for order_id in self._user_orders.get(user_id, ()):
+            side, stop_price = self._orders[order_id]
+            order = self._side(side)[0][stop_price][order_id]
+            if order["type"] == OrderType.STOP_LIMIT:
+                total += order["price"] * order["quantity"]
+            else:
+                total += order["stop_price"] * order["quantity"]
+        return total
+
+    def cancel_all(self, user_id):
+        """
+        Cancel every pending stop of a user, returns the cancelled orders
+        """
+        return [
+            self.cancel(order_id)
+            for order_id in list(self._user_orders.get(user_id, ()))
+        ]
+
+    def _pop_level(self, levels, prices):
+        level = levels.pop(prices.pop())
+        for order_id, order in level.items():
+            del self._orders[order_id]
+            self._unindex(order_id, order)
+        return level.items()
+
+    def trigger(self, last_price):
+        """
+        Remove and return every (order ID, order) whose stop price last_price has reached
+        Levels fire in price order, orders within a level in arrival order
+        """
+        triggered = []
+        while self._buy_prices and self._buy_prices[-1] <= last_price:
+            triggered.extend(self._pop_level(self._buy_levels, self._buy_prices))
+        while self._sell_prices and self._sell_prices[-1] >= last_price:
+            triggered.extend(self._pop_level(self._sell_levels, self._sell_prices))
+        return triggered
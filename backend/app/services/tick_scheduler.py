@@ -0,0 +1,86 @@
+import asyncio
+import math
+import time
+
+from app.core.config import settings
+
+
+class TickScheduler:
+    """
+    Fixed-rate ticks against absolute deadlines on the monotonic clock, so compute and
+    send time don't push the period out and the error doesn't accumulate.
+
+    Call wait() at the end of every tick. A late tick runs immediately, deadlines that
+    passed entirely during an overrun are either skipped (default) or run back to back
+    without sleeping, up to max_catch_up of them. Either way wait() always yields to the
+    event loop once, so a loop that keeps overrunning doesn't starve the other tasks.
+    """
+
+    def __init__(
+        self,
+        rate_hz=None,
+        catch_up=None,
+        max_catch_up=None,
+        clock=time.monotonic,
+        sleep=asyncio.sleep,
+    ):
+        self.rate_hz = rate_hz or settings.PRICE_TICK_RATE_HZ
+        self.period = 1 / self.rate_hz
+        self.catch_up = settings.PRICE_TICK_CATCH_UP if catch_up is None else catch_up
+        self.max_catch_up = (
+            settings.PRICE_TICK_MAX_CATCH_UP if max_catch_up is None else max_catch_up
+        )
+        self._clock = clock
+        self._sleep = sleep
+        self.deadline = None
+
+        self.ticks = 0
+        self.overruns = 0  # ticks that finished after the next deadline
+        self.skipped = 0  # deadlines dropped instead of run
+        self.jitter_s = 0.0  # wake-up time minus deadline, last tick
+        self.max_jitter_s = 0.0
+        self._jitter_total = 0.0
+
+    def start(self):
+        self.deadline = self._clock()
+
+    async def wait(self):
+        """
+        Sleep until the next tick is due
+        """
+        if self.deadline is None:
+            self.start()
+        self.ticks += 1
+        self.deadline += self.period
+        now = self._clock()
+
+        if now > self.deadline:
+            self.overruns += 1
+            # deadlines that have fully passed, not counting the one being run now
+            behind = math.floor((now - self.deadline) / self.period)
+            replay = min(behind, self.max_catch_up) if self.catch_up else 0
+            self.skipped += behind - replay
+            self.deadline += (behind - replay) * self.period
+            # the late tick runs right away, replayed ones follow without sleeping
+            self._record_jitter(now - self.deadline)
+            await self._sleep(0)  # but let the matching engines and sockets run
+            return
+
+        await self._sleep(self.deadline - now)
+        self._record_jitter(self._clock() - self.deadline)
+
+    def _record_jitter(self, jitter_s):
+        self.jitter_s = jitter_s
+        self.max_jitter_s = max(self.max_jitter_s, jitter_s)
+        self._jitter_total += jitter_s
+
+    def stats(self):
+        return {
+            "rate_hz": self.rate_hz,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "jitter_ms": round(self.jitter_s * 1e3, 3),
+            "max_jitter_ms": round(self.max_jitter_s * 1e3, 3),
+            "mean_jitter_ms": round(self._jitter_total / max(self.ticks, 1) * 1e3, 3),
+        }
@@ -0,0 +1,73 @@
+import itertools
+
+from app.core.deps import get_logger
+
+logger = get_logger(__name__)
+
+
+class TradeEvent:
+    """
+    One fill as published on the trade bus, price in currency rather than ticks
+    Every consumer gets the same object, treat it as read-only
+    """
+
+    __slots__ = (
+        "trade_id",
+        "instrument_id",
+        "price",
+        "quantity",
+        "aggressor_side",
+        "buy_order_id",
+        "sell_order_id",
+        "buy_user_id",
+        "sell_user_id",
+        "timestamp",
+    )
+
+    def __init__(self, instrument_id, price, fill, timestamp):
+        self.trade_id = None  # assigned by the bus
+        self.instrument_id = instrument_id
+        self.price = price
+        self.quantity = fill.quantity
+        self.aggressor_side = fill.aggressor_side
+        self.buy_order_id = fill.buy_order_id
+        self.sell_order_id = fill.sell_order_id
+        self.buy_user_id = fill.buy_user_id
+        self.sell_user_id = fill.sell_user_id
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return (
+            f"TradeEvent(trade_id={self.trade_id}, instrument_id={self.instrument_id!r}, "
+            f"price={self.price}, quantity={self.quantity})"
+        )
+
+
+class TradeBus:
+    """
+    In-process pub/sub for trades
+
+    The order processor publishes every fill as it happens, on the matching engine's
+    task, and each handler is called synchronously with the same TradeEvent
+    Handlers must be quick (update a dict, queue a frame), anything slow belongs in
+    its own task. A failing handler is logged and does not affect the others
+    """
+
+    def __init__(self):
+        self._handlers = []
+        self._trade_ids = itertools.count(1)
+
+    def subscribe(self, handler):
+        self._handlers.append(handler)
+        return handler
+
+    def unsubscribe(self, handler):
+        self._handlers.remove(handler)
+
+    def publish(self, event: TradeEvent):
+        event.trade_id = next(self._trade_ids)
+        for handler in self._handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                logger.error(f"Error in trade handler {handler}: {e}", exc_info=True)
@@ -0,0 +1,40 @@
+"""
+Compact binary price frames, negotiated with /ws/market?format=binary
+
+Frame layout, little-endian:
+    uint8   frame type (1 = prices)
+    uint32  sequence, the price engine tick the frame was built on
+    uint16  count
+    count x (uint16 instrument index, int32 price in ticks)
+
+Indices point into the ticker list of the JSON "instruments" message sent on connect,
+price = ticks / price_scale. A frame only carries the instruments whose price changed
+since the previous tick, except after subscribing or falling behind where the client
+gets every instrument it is subscribed to.
+"""
+
+import struct
+
+import numpy as np
+
+FRAME_PRICES = 1
+HEADER = struct.Struct("<BIH")
+ENTRY = np.dtype([("index", "<u2"), ("price", "<i4")])
+
+
+def encode_prices(sequence, indices, ticks) -> bytes:
+    body = np.empty(len(indices), dtype=ENTRY)
+    body["index"] = indices
+    body["price"] = ticks
+    return HEADER.pack(FRAME_PRICES, sequence & 0xFFFFFFFF, len(body)) + body.tobytes()
+
+
+def decode_prices(frame: bytes):
+    """
+    Returns (sequence, indices, ticks), the inverse of encode_prices
+    """
+    frame_type, sequence, count = HEADER.unpack_from(frame)
+    if frame_type != FRAME_PRICES:
+        raise ValueError(f"Unknown frame type: {frame_type}")
+    body = np.frombuffer(frame, dtype=ENTRY, count=count, offset=HEADER.size)
+    return sequence, body["index"].astype(np.intp), body["price"].astype(np.int64)
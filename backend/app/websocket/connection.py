@@ -0,0 +1,163 @@
+import asyncio
+import json
+import time
+from collections import deque
+
+from fastapi import WebSocket
+
+from app.core.config import settings
+from app.core.deps import get_logger
+
+logger = get_logger(__name__)
+
+# close code for clients dropped for falling behind (RFC 6455 "try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class ConnectionWriter:
+    """
+    Bounded outbound queue for one websocket, drained by its own task so a slow
+    client only delays itself.
+
+    Frames carry a key (the ticker). When the queue fills up it is conflated down to
+    the latest frame per key, if that still doesn't fit the client is dropped.
+    Frames with key None (control replies) are never conflated.
+    """
+
+    def __init__(self, websocket: WebSocket, max_queue=None, on_close=None):
+        self.websocket = websocket
+        self.max_queue = max_queue or settings.WS_SEND_QUEUE_SIZE
+        self.on_close = on_close
+        self.frames = deque()  # (key, frame, enqueued_at)
+        self.closed = False
+        self.dropped = False
+        # set when frames were conflated away, delta feeds resend a full snapshot
+        self.resync = False
+        self._ready = asyncio.Event()
+        self._task = None
+
+        # lag metrics
+        self.sent = 0
+        self.conflated = 0
+        self.max_queued = 0
+        self.lag_s = 0.0
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        self.closed = True
+        self.frames.clear()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+
+    def send(self, key, frame) -> bool:
+        """
+        Queue a frame without waiting, returns False if the client is gone
+        """
+        if self.closed:
+            return False
+
+        self.frames.append((key, frame, time.monotonic()))
+        if len(self.frames) > self.max_queue:
+            self._conflate()
+            if len(self.frames) > self.max_queue:
+                self._drop()
+                return False
+
+        self.max_queued = max(self.max_queued, len(self.frames))
+        self._ready.set()
+        return True
+
+    def _conflate(self):
+        # dict keeps each key's first position and its latest frame
+        latest = {}
+        for item in self.frames:
+            latest[item[0] if item[0] is not None else id(item)] = item
+        if len(latest) < len(self.frames):
+            self.conflated += len(self.frames) - len(latest)
+            self.resync = True
+        self.frames = deque(latest.values())
+
+    def _drop(self):
+        logger.warning(
+            f"Dropping slow websocket client {self.client}, "
+            f"{len(self.frames)} frames behind after conflation"
+        )
+        self.closed = True
+        self.dropped = True
+        self.frames.clear()
+        self._ready.set()  # wake the writer to close the socket
+
+    @property
+    def client(self):
+        client = getattr(self.websocket, "client", None)
+        return f"{client.host}:{client.port}" if client else None
+
+    def stats(self):
+        lag_s = self.lag_s
+        if self.frames:
+            # the oldest queued frame is the lag the client sees right now
+            lag_s = max(lag_s, time.monotonic() - self.frames[0][2])
+        return {
+            "client": self.client,
+            "queued": len(self.frames),
+            "max_queued": self.max_queued,
+            "sent": self.sent,
+            "conflated": self.conflated,
+            "lag_ms": round(lag_s * 1e3, 3),
+            "dropped": self.dropped,
+        }
+
+    async def _run(self):
+        try:
+            while not self.closed:
+                if not self.frames:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                key, frame, enqueued_at = self.frames.popleft()
+                if isinstance(frame, bytes):
+                    await self.websocket.send_bytes(frame)
+                else:
+                    await self.websocket.send_text(frame)
+                self.sent += 1
+                self.lag_s = time.monotonic() - enqueued_at
+
+            if self.dropped:
+                await self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            logger.error(
+                f"Error sending to websocket {self.client}: {e}", exc_info=True
+            )
+
+        self.closed = True
+        if self.on_close is not None:
+            self.on_close(self.websocket)
+
+
+def handle_subscription(feed, websocket: WebSocket, data):
+    """
+    Client control messages shared by the market data websockets:
+    {"type": "subscribe" | "unsubscribe", "tickers": [...]}
+    feed is anything with subscribe / unsubscribe(websocket, tickers)
+    Returns the reply to send back
+    """
+    try:
+        message = json.loads(data)
+    except ValueError:
+        return {"type": "error", "message": "Invalid JSON"}
+    if not isinstance(message, dict):
+        return {"type": "error", "message": "Expected an object"}
+
+    action = message.get("type")
+    tickers = message.get("tickers", [])
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    if action == "subscribe":
+        return {"type": "subscribed", "tickers": feed.subscribe(websocket, tickers)}
+    if action == "unsubscribe":
+        return {"type": "subscribed", "tickers": feed.unsubscribe(websocket, tickers)}
+    return {"type": "error", "message": f"Unknown message type: {action}"}
@@ -0,0 +1,52 @@
+from functools import partial
+
+from fastapi import WebSocket
+
+from app.websocket.encoding import encode
+from app.websocket.feed import TickerFeed
+
+
+class DepthPublisher(TickerFeed):
+    """
+    L2 depth over /ws/depth, per instrument
+
+    Subscribing to a ticker queues a book_snapshot of its book right away, after that the
+    connection gets the sequenced book_update messages of the instrument's DepthFeed
+    Frames are encoded once per update and share the bounded per-connection queues of
+    the price feed. If a queue had to be conflated, the connection is missing updates
+    and gets fresh snapshots of everything it subscribed to instead of the next update
+    """
+
+    def __init__(self, registry):
+        super().__init__()
+        self.registry = registry
+        # instruments whose feed already has our listener
+        self._listening = set()
+
+    def has_ticker(self, ticker):
+        return ticker in self.registry
+
+    def on_subscribe(self, websocket: WebSocket, ticker):
+        feed = self.registry.depth_feed(ticker)
+        if ticker not in self._listening:
+            feed.listeners.append(partial(self._on_update, ticker))
+            self._listening.add(ticker)
+        self.active_connections[websocket].send(ticker, encode(feed.snapshot()))
+
+    def _on_update(self, ticker, update):
+        connections = self.subscriptions.get(ticker)
+        if not connections:
+            return
+
+        frame = encode(update)
+        for connection in connections:
+            writer = self.active_connections[connection]
+            if writer.resync:
+                self._resync(connection, writer)
+            else:
+                writer.send(ticker, frame)
+
+    def _resync(self, websocket, writer):
+        writer.resync = False
+        for ticker in self.connection_tickers[websocket]:
+            writer.send(ticker, encode(self.registry.depth_feed(ticker).snapshot()))
@@ -0,0 +1,24 @@
+"""
+JSON encoding for websocket frames, orjson when installed and stdlib json otherwise.
+Messages are encoded once and the text frame is sent as-is to every subscriber
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+if orjson is not None:
+
+    def encode(message) -> str:
+        # orjson only emits utf-8 bytes, text frames keep the browser side JSON.parse-able
+        return orjson.dumps(message).decode()
+
+else:
+
+    def encode(message) -> str:
+        # same output shape as Starlette's send_json
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
@@ -0,0 +1,86 @@
+from fastapi import WebSocket
+
+from app.websocket.connection import ConnectionWriter, handle_subscription
+from app.websocket.encoding import encode
+
+# subscribing to this receives every ticker
+ALL_TICKERS = "*"
+
+
+class TickerFeed:
+    """
+    Websocket connections subscribed per ticker, each one with its own ConnectionWriter
+
+    Subclasses say which tickers can be subscribed to (has_ticker) and what a new
+    subscriber gets first (on_subscribe), then push frames to self.subscriptions
+    """
+
+    def __init__(self):
+        self.active_connections: dict[WebSocket, ConnectionWriter] = {}
+        # ticker -> connections subscribed to it, and the reverse for cleanup
+        self.subscriptions: dict[str, set[WebSocket]] = {}
+        self.connection_tickers: dict[WebSocket, set[str]] = {}
+
+    def has_ticker(self, ticker):
+        return True
+
+    def on_subscribe(self, websocket: WebSocket, ticker):
+        pass
+
+    async def connect(self, websocket: WebSocket):
+        await websocket.accept()
+        writer = ConnectionWriter(websocket, on_close=self.disconnect)
+        writer.start()
+        self.active_connections[websocket] = writer
+        self.connection_tickers[websocket] = set()
+
+    def disconnect(self, websocket: WebSocket):
+        writer = self.active_connections.pop(websocket, None)
+        if writer is not None:
+            writer.stop()
+        for ticker in self.connection_tickers.pop(websocket, ()):
+            self._remove_subscriber(ticker, websocket)
+
+    def send(self, websocket: WebSocket, message):
+        """
+        Queue a control reply behind the connection's pending frames
+        """
+        writer = self.active_connections.get(websocket)
+        if writer is not None:
+            writer.send(None, encode(message))
+
+    def handle_message(self, websocket: WebSocket, data):
+        return handle_subscription(self, websocket, data)
+
+    def subscribe(self, websocket: WebSocket, tickers):
+        """
+        Add tickers to a connection, unknown ones are ignored.
+        Returns everything the connection is now subscribed to
+        """
+        subscribed = self.connection_tickers.setdefault(websocket, set())
+        for ticker in tickers:
+            if ticker in subscribed or not self.has_ticker(ticker):
+                continue
+            self.subscriptions.setdefault(ticker, set()).add(websocket)
+            subscribed.add(ticker)
+            self.on_subscribe(websocket, ticker)
+        return sorted(subscribed)
+
+    def unsubscribe(self, websocket: WebSocket, tickers):
+        subscribed = self.connection_tickers.get(websocket, set())
+        for ticker in tickers:
+            if ticker in subscribed:
+                subscribed.discard(ticker)
+                self._remove_subscriber(ticker, websocket)
+        return sorted(subscribed)
+
+    def _remove_subscriber(self, ticker, websocket):
+        connections = self.subscriptions.get(ticker)
+        if connections is None:
+            return
+        connections.discard(websocket)
+        if not connections:
+            del self.subscriptions[ticker]
+
+    def connection_stats(self):
+        return [writer.stats() for writer in self.active_connections.values()]
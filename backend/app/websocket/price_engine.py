@@ -1,18 +1,42 @@
 import asyncio
+import time
 
+import numpy as np
 from fastapi import WebSocket
+from sqlmodel import Session
 
+from app.core.config import settings
 from app.core.deps import get_logger
-from app.services.gbm import GeometricBrownianMotionAssetSimulator
+from app.db.database import engine
+from app.services.factor_model import (
+    FactorModelCache,
+    NewsDrift,
+    load_exposures,
+    load_factor_caps,
+)
+from app.services.gbm import VectorizedGBMEngine
+from app.services.price_history import PriceHistory
+from app.services.tick_scheduler import TickScheduler
+from app.websocket.binary import encode_prices
+from app.websocket.connection import ConnectionWriter, handle_subscription
+from app.websocket.encoding import encode
+from app.websocket.feed import ALL_TICKERS
 
 logger = get_logger(__name__)
 
+# queue key of binary delta frames, conflating them triggers a full resend
+BINARY_PRICES = "prices"
+
 
 class PriceEngine:
     def __init__(self, news_engine=None):
-        # TODO: convert to map, should be ticker -> connections
-        # also add another map ticker -> gbm simulator
-        self.active_connections = set()
+        # connection -> its writer task and bounded send queue
+        self.active_connections: dict[WebSocket, ConnectionWriter] = {}
+        # ticker -> connections subscribed to it, and the reverse for cleanup
+        self.subscriptions: dict[str, set[WebSocket]] = {}
+        self.connection_tickers: dict[WebSocket, set[str]] = {}
+        # binary clients -> (key, instrument indices) they are subscribed to
+        self.binary_connections: dict[WebSocket, tuple] = {}
         self.is_running = False
         self.tickers = [
             {"ticker": "AAPL", "s_0": 180.0, "mean": 0.07, "variance": 0.25},
@@ -21,57 +45,261 @@ class PriceEngine:
             {"ticker": "AMZN", "s_0": 100.0, "mean": 0.08, "variance": 0.30},
         ]
 
-        self.gbmas_instances = {
-            ticker["ticker"]: GeometricBrownianMotionAssetSimulator(
-                ticker["s_0"], ticker["mean"], ticker["variance"], 1 / 252
-            )
-            for ticker in self.tickers
-        }
+        # fixed-rate ticks, faster rates shrink the step so prices move at the same pace
+        self.scheduler = TickScheduler()
+        # one vectorized simulator steps every ticker at once
+        self.gbm = VectorizedGBMEngine.from_instruments(
+            self.tickers,
+            1 / 252 / self.scheduler.rate_hz,
+            seed=settings.PRICE_ENGINE_SEED,
+        )
+        self.history = PriceHistory(self.gbm.tickers)
+        logger.info(f"Price engine seed entropy: {self.gbm.seed_entropy}")
+        # factor loadings for correlated shocks, rebuilt only when exposures change
+        self.factor_models = FactorModelCache(self.gbm.tickers)
         self.news_engine = news_engine
+        # per-factor news effects mapped onto instruments through their betas
+        self.news_drift = NewsDrift(self.gbm.tickers)
+
+        # fixed-point prices for binary frames, last tick's values drive the deltas
+        self.price_scale = round(1 / settings.PRICE_TICK_SIZE)
+        self._last_ticks = np.zeros(len(self.gbm.tickers), dtype=np.int32)
+        self._sequence = 0
+
+        # called with (prices, drift) after every tick, e.g. to re-quote the bots
+        self._tick_listeners = []
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, binary=False):
+        """
+        binary=True switches the connection to delta frames from app.websocket.binary,
+        it is told the instrument index and price scale first
+        """
         await websocket.accept()
-        self.active_connections.add(websocket)
+        writer = ConnectionWriter(websocket, on_close=self.disconnect)
+        writer.start()
+        self.active_connections[websocket] = writer
+        self.connection_tickers[websocket] = set()
+        if binary:
+            self.binary_connections[websocket] = ((), np.empty(0, dtype=np.intp))
+            self.send(
+                websocket,
+                {
+                    "type": "instruments",
+                    "format": "binary",
+                    "tickers": self.gbm.tickers,
+                    "price_scale": self.price_scale,
+                },
+            )
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.discard(websocket)
+        writer = self.active_connections.pop(websocket, None)
+        if writer is not None:
+            writer.stop()
+        self.binary_connections.pop(websocket, None)
+        for ticker in self.connection_tickers.pop(websocket, ()):
+            self._remove_subscriber(ticker, websocket)
+
+    def subscribe(self, websocket: WebSocket, tickers):
+        """
+        Add tickers to a connection, unknown ones are ignored.
+        Returns everything the connection is now subscribed to
+        """
+        subscribed = self.connection_tickers.setdefault(websocket, set())
+        binary = websocket in self.binary_connections
+        known = self.gbm.index
+        for ticker in tickers:
+            if ticker != ALL_TICKERS and ticker not in known:
+                continue
+            if not binary:
+                self.subscriptions.setdefault(ticker, set()).add(websocket)
+            subscribed.add(ticker)
+        if binary:
+            self._index_binary(websocket)
+            # new instruments need their current price, not just the next change
+            self.active_connections[websocket].resync = True
+        return sorted(subscribed)
+
+    def unsubscribe(self, websocket: WebSocket, tickers):
+        subscribed = self.connection_tickers.get(websocket, set())
+        for ticker in tickers:
+            if ticker in subscribed:
+                subscribed.discard(ticker)
+                self._remove_subscriber(ticker, websocket)
+        if websocket in self.binary_connections:
+            self._index_binary(websocket)
+        return sorted(subscribed)
+
+    def _index_binary(self, websocket):
+        subscribed = self.connection_tickers[websocket]
+        if ALL_TICKERS in subscribed:
+            indices = np.arange(len(self.gbm.tickers))
+        else:
+            indices = np.array(
+                sorted(self.gbm.index[t] for t in subscribed), dtype=np.intp
+            )
+        self.binary_connections[websocket] = (tuple(indices), indices)
+
+    def _remove_subscriber(self, ticker, websocket):
+        connections = self.subscriptions.get(ticker)
+        if connections is None:
+            return
+        connections.discard(websocket)
+        if not connections:
+            del self.subscriptions[ticker]
+
+    def handle_message(self, websocket: WebSocket, data):
+        """
+        Client control messages on /ws/market, see handle_subscription
+        """
+        return handle_subscription(self, websocket, data)
+
+    def add_tick_listener(self, listener):
+        self._tick_listeners.append(listener)
+        return listener
+
+    def _notify_tick(self, drift):
+        for listener in self._tick_listeners:
+            try:
+                listener(self.gbm.prices, drift)
+            except Exception as e:
+                logger.error(f"Error in tick listener {listener}: {e}", exc_info=True)
+
+    def on_trade(self, event):
+        # traded quantity goes into the open bars
+        self.history.record_volume(event.instrument_id, event.quantity)
 
     def get_additional_drift(self):
-        # Inject into calculate
+        """
+        News drift of every instrument, None when there is no news in effect
+        """
         if not self.news_engine:
-            return 0
-        return self.news_engine.get_total_eff()
+            return None
+        effects = self.news_engine.get_factor_effects()
+        if not effects.any():
+            return None
+        return self.news_drift.compute(
+            effects, self.news_engine.factor_ids, self.factor_models.model
+        )
+
+    def refresh_factor_model(self, db: Session):
+        self.apply_factor_inputs(load_exposures(db), load_factor_caps(db))
+
+    def apply_factor_inputs(self, exposures, caps):
+        """
+        Swap in what the factor tables hold, must run on the event loop thread
+        since the price loop reads the shock model and the caps between awaits
+        """
+        self.news_drift.set_caps(caps)
+        if self.factor_models.update(exposures):
+            self.gbm.shock_model = self.factor_models.model
+            logger.info(
+                f"Rebuilt factor model with {len(self.gbm.shock_model.factor_ids)} factors"
+            )
 
-    async def broadcast(self, message):
-        # None connected
-        if not self.active_connections:
+    def _load_factor_inputs(self):
+        with Session(engine) as db:
+            return load_exposures(db), load_factor_caps(db)
+
+    async def refresh_factor_model_on_tick(self):
+        """
+        Pick up exposure changes, only the queries run in a thread to keep the loop
+        free, the results are applied back on the loop
+        """
+        while True:
+            try:
+                inputs = await asyncio.to_thread(self._load_factor_inputs)
+                self.apply_factor_inputs(*inputs)
+                await asyncio.sleep(settings.FACTOR_MODEL_REFRESH_S)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error refreshing factor model: {e}", exc_info=True)
+                await asyncio.sleep(settings.FACTOR_MODEL_REFRESH_S)
+
+    def send(self, websocket: WebSocket, message):
+        """
+        Queue a control reply behind the connection's pending price frames
+        """
+        writer = self.active_connections.get(websocket)
+        if writer is not None:
+            writer.send(None, encode(message))
+
+    def connection_stats(self):
+        return [writer.stats() for writer in self.active_connections.values()]
+
+    def broadcast(self, prices):
+        """
+        Send each ticker only to its subscribers,
+        wildcard subscribers get the whole tick in one message.
+        Frames are queued per connection, a slow client never holds up the tick
+        """
+        if self.binary_connections:
+            self._broadcast_binary(prices)
+
+        # None subscribed
+        if not self.subscriptions:
             return
 
-        coros = []
-        for connection in list(self.active_connections):
-            coros.append(self._safe_send(connection, message))
+        writers = self.active_connections
+        for ticker, price in prices.items():
+            connections = self.subscriptions.get(ticker)
+            if connections:
+                # encoded once, every subscriber gets the same frame
+                frame = encode({ticker: price})
+                for connection in connections:
+                    writers[connection].send(ticker, frame)
+
+        connections = self.subscriptions.get(ALL_TICKERS)
+        if connections:
+            frame = encode(prices)
+            for connection in connections:
+                writers[connection].send(ALL_TICKERS, frame)
+
+    def _broadcast_binary(self, prices):
+        """
+        Delta frames with only the instruments whose fixed-point price moved,
+        encoded once per distinct subscription
+        """
+        index = self.gbm.index
+        positions = np.fromiter((index[t] for t in prices), np.intp, len(prices))
+        values = np.fromiter(prices.values(), np.float64, len(prices))
 
-        # Run all concurrently instead of sequentially
-        await asyncio.gather(*coros, return_exceptions=True)
+        ticks = self._last_ticks.copy()
+        ticks[positions] = np.rint(values * self.price_scale)
+        changed = ticks != self._last_ticks
+        self._last_ticks = ticks
+        self._sequence += 1
 
-    async def _safe_send(self, connection: WebSocket, message):
-        try:
-            await connection.send_json(message)
-        except Exception as e:
-            logger.error(f"Error broadcasting to connection: {e}", exc_info=True)
-            self.disconnect(connection)
+        frames = {}
+        for connection, (key, indices) in self.binary_connections.items():
+            writer = self.active_connections[connection]
+            full = writer.resync
+            frame = frames.get((key, full))
+            if frame is None:
+                selected = indices if full else indices[changed[indices]]
+                frame = b""
+                if len(selected):
+                    frame = encode_prices(self._sequence, selected, ticks[selected])
+                frames[key, full] = frame
+            if frame:
+                writer.resync = False
+                writer.send(BINARY_PRICES, frame)
 
     async def run(self):
         self.is_running = True
+        self.scheduler.start()
         while self.is_running:
             try:
-                await self.broadcast(
-                    {ticker: gbmas() for ticker, gbmas in self.gbmas_instances.items()}
-                )
-                await asyncio.sleep(1)
+                drift = self.get_additional_drift()
+                self.gbm.step(drift)
+                self.history.record(self.gbm.prices, time.time())
+                self.broadcast(self.gbm.as_dict())
+                self._notify_tick(drift)
+                await self.scheduler.wait()
             except asyncio.CancelledError:
                 self.is_running = False
                 break
             except Exception as e:
                 # continue
-                await asyncio.sleep(1)
+                logger.error(f"Error in price tick: {e}", exc_info=True)
+                await self.scheduler.wait()
@@ -0,0 +1,109 @@
+from fastapi import WebSocket
+
+from app.services.order_book import OrderSide
+from app.websocket.connection import ConnectionWriter
+from app.websocket.encoding import encode
+from app.websocket.feed import ALL_TICKERS, TickerFeed
+
+
+def trade_message(event):
+    return {
+        "type": "trade",
+        "instrumentId": event.instrument_id,
+        "tradeId": event.trade_id,
+        "price": event.price,
+        "quantity": event.quantity,
+        "aggressorSide": event.aggressor_side.value,
+        "timestamp": event.timestamp,
+    }
+
+
+class TradeTape(TickerFeed):
+    """
+    Public trades over /ws/trades, per instrument or "*" for all of them
+    Each trade is encoded once for every subscriber. Trades are never conflated,
+    a client that can't keep up is dropped by its writer
+    """
+
+    def __init__(self, registry):
+        super().__init__()
+        self.registry = registry
+
+    def has_ticker(self, ticker):
+        return ticker == ALL_TICKERS or ticker in self.registry
+
+    def on_trade(self, event):
+        frame = None
+        for key in (event.instrument_id, ALL_TICKERS):
+            connections = self.subscriptions.get(key)
+            if not connections:
+                continue
+            if frame is None:
+                frame = encode(trade_message(event))
+            for connection in connections:
+                self.active_connections[connection].send(None, frame)
+
+
+class FillNotifier:
+    """
+    Private fills over /ws/fills, every connection of a user gets that user's fills
+    """
+
+    def __init__(self):
+        self.active_connections: dict[WebSocket, ConnectionWriter] = {}
+        # user ID -> connections, a user can be logged in from several tabs
+        self.users = {}
+        self.connection_users = {}
+
+    async def connect(self, websocket: WebSocket, user_id):
+        await websocket.accept()
+        writer = ConnectionWriter(websocket, on_close=self.disconnect)
+        writer.start()
+        self.active_connections[websocket] = writer
+        self.connection_users[websocket] = user_id
+        self.users.setdefault(user_id, set()).add(websocket)
+
+    def disconnect(self, websocket: WebSocket):
+        writer = self.active_connections.pop(websocket, None)
+        if writer is not None:
+            writer.stop()
+        user_id = self.connection_users.pop(websocket, None)
+        connections = self.users.get(user_id)
+        if connections is not None:
+            connections.discard(websocket)
+            if not connections:
+                del self.users[user_id]
+
+    def send(self, websocket: WebSocket, message):
+        writer = self.active_connections.get(websocket)
+        if writer is not None:
+            writer.send(None, encode(message))
+
+    def handle_message(self, websocket: WebSocket, data):
+        return {"type": "error", "message": "Fills need no subscription"}
+
+    def on_trade(self, event):
+        for user_id, side, order_id in (
+            (event.buy_user_id, OrderSide.BUY, event.buy_order_id),
+            (event.sell_user_id, OrderSide.SELL, event.sell_order_id),
+        ):
+            connections = self.users.get(user_id)
+            if not connections:
+                continue
+            frame = encode(
+                {
+                    "type": "fill",
+                    "instrumentId": event.instrument_id,
+                    "tradeId": event.trade_id,
+                    "orderId": order_id,
+                    "side": side.value,
+                    "price": event.price,
+                    "quantity": event.quantity,
+                    "timestamp": event.timestamp,
+                }
+            )
+            for connection in connections:
+                self.active_connections[connection].send(None, frame)
+
+    def connection_stats(self):
+        return [writer.stats() for writer in self.active_connections.values()]
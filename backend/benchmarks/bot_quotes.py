@@ -0,0 +1,66 @@
+"""
+Time to quote every liquidity bot once, per-object LiquidityBot vs LiquidityBotFleet
+
+before: one LiquidityBot per bot and instrument, generate_order_book called in a loop
+after: LiquidityBotFleet computing every spread and ladder with one set of array operations
+
+Run from backend/:
+    python -m benchmarks.bot_quotes
+    python -m benchmarks.bot_quotes --bots 10 50 --instruments 100 --ticks 50
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.liquidity_bot import LiquidityBot, LiquidityBotFleet
+
+DEFAULT_BOTS = [1, 10, 50]
+
+
+def per_tick_us(step, n_ticks):
+    step()  # warm up
+    start = time.perf_counter()
+    for _ in range(n_ticks):
+        step()
+    return (time.perf_counter() - start) / n_ticks * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--bots", type=int, nargs="+", default=DEFAULT_BOTS)
+    parser.add_argument("--instruments", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    tickers = [f"T{i}" for i in range(args.instruments)]
+    mids = rng.uniform(50, 500, args.instruments)
+    drift = rng.uniform(-0.01, 0.01, args.instruments)
+
+    print(
+        f"{'bots/instr':>10} {'slots':>7} {'loop us':>10} {'fleet us':>10} {'speedup':>8}"
+    )
+    for n in args.bots:
+        bots = [
+            LiquidityBot(ticker, mid, 0)
+            for ticker, mid in zip(tickers, mids)
+            for _ in range(n)
+        ]
+        drifts = np.repeat(drift, n)
+        fleet = LiquidityBotFleet(tickers, [(i, {}) for i in range(n)], seed=0)
+
+        loop_us = per_tick_us(
+            lambda: [bot.generate_order_book(d) for bot, d in zip(bots, drifts)],
+            args.ticks,
+        )
+        fleet_us = per_tick_us(lambda: fleet.quote(mids, drift), args.ticks)
+        print(
+            f"{n:>10} {len(fleet):>7} {loop_us:>10.1f} {fleet_us:>10.1f} "
+            f"{loop_us / fleet_us:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Time per price tick, per-object GBM simulators vs VectorizedGBMEngine
+
+before: one GeometricBrownianMotionAssetSimulator per instrument, called in a loop
+after: VectorizedGBMEngine stepping every instrument with one set of array operations
+
+Run from backend/:
+    python -m benchmarks.gbm_step
+    python -m benchmarks.gbm_step --instruments 10 5000 --ticks 500
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.gbm import GeometricBrownianMotionAssetSimulator, VectorizedGBMEngine
+
+DEFAULT_INSTRUMENTS = [4, 50, 500, 5_000]
+DELTA = 1 / 252
+
+
+def per_tick_us(step, n_ticks):
+    step()  # warm up
+    start = time.perf_counter()
+    for _ in range(n_ticks):
+        step()
+    return (time.perf_counter() - start) / n_ticks * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--instruments", type=int, nargs="+", default=DEFAULT_INSTRUMENTS
+    )
+    parser.add_argument("--ticks", type=int, default=1_000)
+    args = parser.parse_args()
+
+    print(f"{'instruments':>11} {'loop us':>10} {'vector us':>10} {'speedup':>8}")
+    for n in args.instruments:
+        rng = np.random.default_rng(0)
+        prices = rng.uniform(50, 500, n)
+        means = rng.uniform(0.0, 0.1, n)
+        variances = rng.uniform(0.1, 0.4, n)
+
+        simulators = [
+            GeometricBrownianMotionAssetSimulator(p, m, v, DELTA)
+            for p, m, v in zip(prices, means, variances)
+        ]
+        engine = VectorizedGBMEngine(range(n), prices, means, variances, DELTA, seed=0)
+
+        loop_us = per_tick_us(
+            lambda: {i: sim() for i, sim in enumerate(simulators)}, args.ticks
+        )
+        vector_us = per_tick_us(engine.step, args.ticks)
+        print(
+            f"{n:>11} {loop_us:>10.1f} {vector_us:>10.1f} {loop_us / vector_us:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Matching latency vs resting book depth
+
+Builds books of increasing depth and times match_order for small crossing orders
+Each match takes out the best resting order, which is put back right after so the
+depth stays constant. Latency should stay flat as the book grows.
+
+Run from backend/:
+    python -m benchmarks.order_matching
+    python -m benchmarks.order_matching --depths 100 10000 --matches 5000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from app.services.order_book import OrderBook, OrderSide
+
+DEFAULT_DEPTHS = [100, 1_000, 10_000, 100_000, 1_000_000]
+LEVELS_PER_SIDE = 1_000
+TICK = 0.01
+
+
+def build_book(depth, mid=100.0):
+    """
+    depth resting orders split across both sides over LEVELS_PER_SIDE prices each
+    """
+    rng = random.Random(42)
+    book = OrderBook()
+    levels = min(LEVELS_PER_SIDE, max(depth // 2, 1))
+    for i in range(depth):
+        level = rng.randrange(levels) + 1
+        side = OrderSide.BUY if i % 2 == 0 else OrderSide.SELL
+        offset = -level if side == OrderSide.BUY else level
+        book.add_order(
+            {
+                "price": round(mid + offset * TICK, 2),
+                "quantity": rng.randint(1, 10),
+                "ticker": "BENCH",
+                "user_id": f"u{i % 500}",
+                "side": side,
+            }
+        )
+    return book
+
+
+def time_matches(book, n_matches):
+    samples = []
+    for i in range(n_matches):
+        side = OrderSide.BUY if i % 2 == 0 else OrderSide.SELL
+        resting = book.best_ask() if side == OrderSide.BUY else book.best_bid()
+        incoming = {
+            "price": resting["price"],
+            "quantity": resting["quantity"],
+            "ticker": "BENCH",
+            "user_id": "taker",
+            "side": side,
+        }
+        replenish = {**resting}
+
+        start = time.perf_counter_ns()
+        book.match_order(incoming)
+        samples.append(time.perf_counter_ns() - start)
+
+        # put the liquidity back so the depth does not change between samples
+        book.add_order(replenish)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--depths", type=int, nargs="+", default=DEFAULT_DEPTHS)
+    parser.add_argument("--matches", type=int, default=20_000)
+    args = parser.parse_args()
+
+    print(f"{'depth':>10} {'median us':>10} {'p99 us':>10} {'build s':>8}")
+    for depth in args.depths:
+        start = time.perf_counter()
+        book = build_book(depth)
+        build_s = time.perf_counter() - start
+
+        samples = sorted(time_matches(book, args.matches))
+        median_us = statistics.median(samples) / 1000
+        p99_us = samples[int(len(samples) * 0.99) - 1] / 1000
+        print(f"{depth:>10} {median_us:>10.2f} {p99_us:>10.2f} {build_s:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
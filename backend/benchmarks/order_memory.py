@@ -0,0 +1,87 @@
+"""
+Bytes per resting order, dict + uuid orders vs the slotted book
+
+before: what the list based book held, one dict per order with a uuid4 attached
+after: OrderBook with slotted Order objects, integer IDs and prices in ticks,
+including the price levels and the ID / user indexes
+
+Run from backend/:
+    python -m benchmarks.order_memory
+    python -m benchmarks.order_memory --orders 1000000
+"""
+
+import argparse
+import random
+import tracemalloc
+import uuid
+
+from app.services.order_book import Order, OrderBook, OrderSide, next_order_id
+
+N_USERS = 500
+N_LEVELS = 1_000
+
+
+def random_orders(n_orders):
+    rng = random.Random(42)
+    users = [f"u{i}" for i in range(N_USERS)]
+    for i in range(n_orders):
+        side = OrderSide.BUY if i % 2 == 0 else OrderSide.SELL
+        level = rng.randrange(N_LEVELS) + 1
+        yield (
+            side,
+            10_000 - level if side == OrderSide.BUY else 10_000 + level,
+            rng.randint(1, 10),
+            users[i % N_USERS],
+        )
+
+
+def measure(build, n_orders):
+    orders = list(random_orders(n_orders))
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    store = build(orders)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del store
+    return size / n_orders
+
+
+def build_dicts(orders):
+    store = []
+    for side, ticks, quantity, user_id in orders:
+        store.append(
+            {
+                "price": ticks / 100,
+                "quantity": quantity,
+                "ticker": "BENCH",
+                "user_id": user_id,
+                "side": side,
+                "id": uuid.uuid4(),
+            }
+        )
+    return store
+
+
+def build_book(orders):
+    book = OrderBook(instrument_id="BENCH")
+    for side, ticks, quantity, user_id in orders:
+        book.add(Order(next_order_id(), side, ticks, quantity, user_id))
+    return book
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--orders", type=int, default=200_000)
+    args = parser.parse_args()
+
+    dict_bytes = measure(build_dicts, args.orders)
+    book_bytes = measure(build_book, args.orders)
+    print(f"{args.orders} resting orders")
+    print(f"dict + uuid list   {dict_bytes:8.1f} bytes/order")
+    print(f"slotted OrderBook  {book_bytes:8.1f} bytes/order (with indexes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Broadcast CPU time per tick against connection count, encode-per-send vs encode-once
+
+before: send_json on every connection, so the tick is JSON-encoded once per subscriber
+after: PriceEngine.broadcast encoding each message once and queueing the same text frame
+       to every connection's writer task, timed until all queues are drained
+
+Every connection subscribes to all tickers, sends go to an in-memory socket.
+
+Run from backend/:
+    python -m benchmarks.ws_broadcast
+    python -m benchmarks.ws_broadcast --connections 100 1000 --instruments 200
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.websocket.encoding import orjson
+from app.websocket.price_engine import ALL_TICKERS, PriceEngine
+
+DEFAULT_CONNECTIONS = [10, 100, 500, 2_000]
+
+
+class NullWebSocket:
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame):
+        pass
+
+    async def send_json(self, data):
+        # what Starlette's WebSocket.send_json does before sending
+        await self.send_text(
+            json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        )
+
+
+async def broadcast_per_send(connections, prices):
+    await asyncio.gather(
+        *(c.send_json(prices) for c in connections), return_exceptions=True
+    )
+
+
+async def broadcast_queued(engine, prices):
+    # queue the tick, then let every writer task send it
+    engine.broadcast(prices)
+    while any(w.frames for w in engine.active_connections.values()):
+        await asyncio.sleep(0)
+
+
+async def cpu_ms_per_tick(broadcast, n_ticks):
+    await broadcast()  # warm up
+    start = time.process_time()
+    for _ in range(n_ticks):
+        await broadcast()
+    return (time.process_time() - start) / n_ticks * 1e3
+
+
+async def run(args):
+    prices = {f"T{i:04d}": 100.0 + i / 7 for i in range(args.instruments)}
+
+    print(f"encoder: {'orjson' if orjson else 'json'}, {args.instruments} instruments")
+    print(f"{'connections':>11} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for n in args.connections:
+        engine = PriceEngine()
+        connections = [NullWebSocket() for _ in range(n)]
+        for connection in connections:
+            await engine.connect(connection)
+            engine.subscribe(connection, [ALL_TICKERS])
+
+        before = await cpu_ms_per_tick(
+            lambda: broadcast_per_send(connections, prices), args.ticks
+        )
+        after = await cpu_ms_per_tick(
+            lambda: broadcast_queued(engine, prices), args.ticks
+        )
+        print(f"{n:>11} {before:>10.2f} {after:>10.2f} {before / after:>7.1f}x")
+        for connection in connections:
+            engine.disconnect(connection)
+        await asyncio.sleep(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--connections", type=int, nargs="+", default=DEFAULT_CONNECTIONS
+    )
+    parser.add_argument("--instruments", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
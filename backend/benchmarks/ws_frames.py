@@ -0,0 +1,84 @@
+"""
+Bytes and encode time per market data frame, JSON price map vs binary delta frames
+
+json: the default text frame, {ticker: price} for every instrument each tick
+binary: app.websocket.binary frames, fixed-point int32 prices for the instruments
+        whose price changed since the previous tick
+
+Run from backend/:
+    python -m benchmarks.ws_frames
+    python -m benchmarks.ws_frames --instruments 500 --changed 1.0 0.2
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.websocket.binary import encode_prices
+from app.websocket.encoding import encode, orjson
+
+DEFAULT_INSTRUMENTS = [4, 50, 500]
+DEFAULT_CHANGED = [1.0, 0.5, 0.1]
+PRICE_SCALE = 100
+
+
+def make_ticks(n, changed, n_ticks, rng):
+    # random walks where only a fraction of instruments move each tick
+    prices = np.empty((n_ticks, n))
+    prices[0] = rng.uniform(50, 500, n)
+    for t in range(1, n_ticks):
+        moves = rng.normal(0, 0.5, n) * (rng.random(n) < changed)
+        prices[t] = np.maximum(prices[t - 1] + moves, 0.01)
+    return np.round(prices, 2)
+
+
+def run_json(tickers, prices):
+    sizes = []
+    start = time.perf_counter()
+    for row in prices:
+        sizes.append(len(encode(dict(zip(tickers, row.tolist()))).encode()))
+    return (time.perf_counter() - start) / len(prices) * 1e6, np.mean(sizes)
+
+
+def run_binary(prices):
+    sizes = []
+    last = np.zeros(prices.shape[1], dtype=np.int32)
+    start = time.perf_counter()
+    for sequence, row in enumerate(prices):
+        ticks = np.rint(row * PRICE_SCALE).astype(np.int32)
+        indices = np.flatnonzero(ticks != last)
+        last = ticks
+        sizes.append(len(encode_prices(sequence, indices, ticks[indices])))
+    return (time.perf_counter() - start) / len(prices) * 1e6, np.mean(sizes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--instruments", type=int, nargs="+", default=DEFAULT_INSTRUMENTS
+    )
+    parser.add_argument("--changed", type=float, nargs="+", default=DEFAULT_CHANGED)
+    parser.add_argument("--ticks", type=int, default=1_000)
+    args = parser.parse_args()
+
+    print(f"json encoder: {'orjson' if orjson else 'json'}")
+    print(
+        f"{'instruments':>11} {'changed':>8} {'json B':>8} {'binary B':>9} "
+        f"{'json us':>8} {'binary us':>10}"
+    )
+    rng = np.random.default_rng(0)
+    for n in args.instruments:
+        tickers = [f"T{i:04d}" for i in range(n)]
+        for changed in args.changed:
+            prices = make_ticks(n, changed, args.ticks, rng)
+            json_us, json_bytes = run_json(tickers, prices)
+            binary_us, binary_bytes = run_binary(prices)
+            print(
+                f"{n:>11} {changed:>8.0%} {json_bytes:>8.0f} {binary_bytes:>9.0f} "
+                f"{json_us:>8.1f} {binary_us:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
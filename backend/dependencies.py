@@ -1,9 +1,21 @@
 # import redis.asyncio as redis
 
+from fastapi import HTTPException, status
+
+from app.services.bot_positions import BotPositionStore
+from app.services.bot_quoter import BotQuoter
 from app.services.leaderboard import Leaderboard
+from app.services.liquidity_bot import LiquidityBotFleet
+from app.services.matching_engine import MatchingEngine
 from app.services.news import NewsShockSimulator
 from app.services.order_book import OrderBook
+from app.services.order_book_registry import OrderBookRegistry, UnknownInstrumentError
+from app.services.positions import PositionBook
+from app.services.price_history import PriceHistory
+from app.services.trade_bus import TradeBus
+from app.websocket.depth import DepthPublisher
 from app.websocket.price_engine import PriceEngine
+from app.websocket.trades import FillNotifier, TradeTape
 
 """
 For dependency injections, these are all singletons
@@ -13,13 +25,36 @@ news_engine = NewsShockSimulator()
 price_engine = PriceEngine(news_engine=news_engine)
 # redis_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=False)
 # leaderboard = Leaderboard(redis_client)
-order_book = OrderBook()
+trade_bus = TradeBus()
+order_book_registry = OrderBookRegistry(trade_bus=trade_bus)
+depth_publisher = DepthPublisher(order_book_registry)
+positions = PositionBook()
+trade_tape = TradeTape(order_book_registry)
+fill_notifier = FillNotifier()
+# liquidity bots quote the simulated instruments, loaded from the bots table on startup
+bot_fleet = LiquidityBotFleet(price_engine.gbm.tickers)
+# re-quoted into the real books after every price tick
+bot_quoter = BotQuoter(bot_fleet, order_book_registry)
+price_engine.add_tick_listener(bot_quoter.requote)
+# bot inventory and cash, written to bot_positions in batches
+bot_positions = BotPositionStore(bot_fleet)
+
+# every consumer gets the same TradeEvent
+trade_bus.subscribe(positions.on_trade)
+trade_bus.subscribe(trade_tape.on_trade)
+trade_bus.subscribe(fill_notifier.on_trade)
+trade_bus.subscribe(price_engine.on_trade)
+trade_bus.subscribe(bot_quoter.on_trade)
 
 
 def get_price_engine() -> PriceEngine:
     return price_engine
 
 
+def get_price_history() -> PriceHistory:
+    return price_engine.history
+
+
 def get_news_engine() -> NewsShockSimulator:
     return news_engine
 
@@ -28,5 +63,29 @@ def get_news_engine() -> NewsShockSimulator:
 #    return leaderboard
 
 
-def get_order_book() -> OrderBook:
-    return order_book
+def get_positions() -> PositionBook:
+    return positions
+
+
+def get_order_book_registry() -> OrderBookRegistry:
+    return order_book_registry
+
+
+def get_order_book(ticker: str) -> OrderBook:
+    try:
+        return order_book_registry.get(ticker)
+    except UnknownInstrumentError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown instrument '{ticker}'",
+        )
+
+
+def get_matching_engine(ticker: str) -> MatchingEngine:
+    try:
+        return order_book_registry.engine(ticker)
+    except UnknownInstrumentError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown instrument '{ticker}'",
+        )
@@ -4,16 +4,20 @@ Main entry point for the trading simulator backend
 """
 
 import asyncio
+import time
 
-from fastapi import FastAPI, WebSocket
+from fastapi import FastAPI, WebSocket, status
 from fastapi.middleware.cors import CORSMiddleware
 
 # Create database tables
-from sqlmodel import SQLModel
+from sqlmodel import Session, SQLModel
 
 from app.api.api_v1.api import api_router
 from app.core.config import settings
+from app.core.deps import get_logger
 from app.core.logging import setup_logging
+from app.core.security import verify_token
+from app.db.crud.user import user as user_crud
 from app.db.database import engine
 from app.models import (
     Bot,
@@ -27,10 +31,22 @@ from app.models import (
     Sector,
     User,
 )
-from dependencies import news_engine, price_engine
+from app.services.liquidity_bot import load_bots
+from dependencies import (
+    bot_fleet,
+    bot_positions,
+    bot_quoter,
+    depth_publisher,
+    fill_notifier,
+    news_engine,
+    order_book_registry,
+    price_engine,
+    trade_tape,
+)
 
 # Setup logging
 setup_logging()
+logger = get_logger(__name__)
 
 app = FastAPI(
     title="Trading Simulator API",
@@ -70,33 +86,135 @@ async def version_check():
 
 @app.on_event("startup")
 async def startup_event():
+    """
+    Register listed instruments so each one gets its own order book
+    """
+    try:
+        with Session(engine) as db:
+            order_book_registry.load_instruments(db)
+    except Exception as e:
+        logger.error(f"Error loading instruments: {e}", exc_info=True)
+
+    """
+    Load the liquidity bots
+    """
+    try:
+        with Session(engine) as db:
+            bot_fleet.load(load_bots(db))
+            restored = bot_positions.load(db)
+        logger.info(
+            f"Loaded {len(bot_fleet)} liquidity bot quotes, {restored} positions"
+        )
+    except Exception as e:
+        logger.error(f"Error loading bots: {e}", exc_info=True)
+
     """
     Start price engine for GBM
     """
     asyncio.create_task(price_engine.run())
+    asyncio.create_task(price_engine.refresh_factor_model_on_tick())
 
     """
     Start news engine to adjust add. drift
     """
     asyncio.create_task(news_engine.add_news_on_tick())
 
+    """
+    Persist bot inventory and cash
+    """
+    asyncio.create_task(bot_positions.flush_on_tick())
 
-@app.websocket("/ws/market")
-async def websocket_market(websocket: WebSocket):
-    import time
 
-    await price_engine.connect(websocket)
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Stop the per-instrument matching tasks, write the last bot positions
+    """
+    await order_book_registry.stop()
+    try:
+        await bot_positions.flush()
+    except Exception as e:
+        logger.error(f"Error flushing bot positions: {e}", exc_info=True)
+
+
+@app.get("/ws/market/stats")
+async def websocket_market_stats():
+    """
+    Per-connection send queue depth, conflation and lag, plus tick timing
+    and how many bot quotes were sent to the books
+    """
+    return {
+        "ticks": price_engine.scheduler.stats(),
+        "connections": price_engine.connection_stats(),
+        "depth_connections": depth_publisher.connection_stats(),
+        "trade_connections": trade_tape.connection_stats(),
+        "fill_connections": fill_notifier.connection_stats(),
+        "bots": bot_quoter.stats(),
+    }
+
+
+async def serve_websocket(feed, websocket: WebSocket):
+    """
+    Receive loop shared by the market data websockets, feed is already connected
+    """
     try:
         while True:
             data = await websocket.receive_text()  # ping
             if data == "ping":
-                await websocket.send_json(
-                    {"type": "pong", "timestamp": time.time()}
-                )  # pong
+                feed.send(websocket, {"type": "pong", "timestamp": time.time()})  # pong
+            else:
+                # subscribe / unsubscribe
+                feed.send(websocket, feed.handle_message(websocket, data))
     except Exception as e:
         pass
     finally:
-        price_engine.disconnect(websocket)
+        feed.disconnect(websocket)
+
+
+@app.websocket("/ws/market")
+async def websocket_market(websocket: WebSocket):
+    # ?format=binary opts into delta frames, JSON text stays the default
+    binary = websocket.query_params.get("format") == "binary"
+    await price_engine.connect(websocket, binary=binary)
+    await serve_websocket(price_engine, websocket)
+
+
+@app.websocket("/ws/depth")
+async def websocket_depth(websocket: WebSocket):
+    """
+    L2 book per instrument, {"type": "subscribe", "tickers": [...]} for a snapshot
+    followed by sequenced level updates
+    """
+    await depth_publisher.connect(websocket)
+    await serve_websocket(depth_publisher, websocket)
+
+
+@app.websocket("/ws/trades")
+async def websocket_trades(websocket: WebSocket):
+    """
+    Public trade tape, subscribe to tickers or "*"
+    """
+    await trade_tape.connect(websocket)
+    await serve_websocket(trade_tape, websocket)
+
+
+@app.websocket("/ws/fills")
+async def websocket_fills(websocket: WebSocket):
+    """
+    The user's own fills, authenticated with ?token=<access token>
+    """
+    user_id = None
+    username = verify_token(websocket.query_params.get("token", ""))
+    if username is not None:
+        with Session(engine) as db:
+            user = user_crud.get_by_username(db, username=username)
+            user_id = user.id if user is not None and user.is_active else None
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await fill_notifier.connect(websocket, user_id)
+    await serve_websocket(fill_notifier, websocket)
 
 
 if __name__ == "__main__":
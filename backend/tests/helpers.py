@@ -0,0 +1,46 @@
+"""
+Shared test helpers
+"""
+
+import json
+
+
+def order(side, price, quantity=1, ticker="AAPL", user_id="u1"):
+    """
+    Limit order dict as the order book and processor take it
+    """
+    return {
+        "price": price,
+        "quantity": quantity,
+        "ticker": ticker,
+        "user_id": user_id,
+        "side": side,
+    }
+
+
+class FakeWebSocket:
+    """
+    Records what is sent, text frames decoded from JSON, binary frames as they are
+    fail=True makes every send raise like a closed connection
+    """
+
+    def __init__(self, fail=False):
+        self.sent = []
+        self.fail = fail
+        self.close_code = None
+
+    async def close(self, code=1000):
+        self.close_code = code
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame):
+        if self.fail:
+            raise RuntimeError("closed")
+        self.sent.append(json.loads(frame))
+
+    async def send_bytes(self, frame):
+        if self.fail:
+            raise RuntimeError("closed")
+        self.sent.append(frame)
@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+from unittest import IsolatedAsyncioTestCase
+
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.models import Bot, BotPosition, Instrument
+from app.services.bot_positions import BotPositionStore, upsert_bot_positions
+from app.services.liquidity_bot import LiquidityBotFleet
+
+
+def positions_db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(
+        engine,
+        tables=[Bot.__table__, Instrument.__table__, BotPosition.__table__],
+    )
+    return engine
+
+
+def rows(db):
+    return sorted(
+        (row.bot_id, row.instrument_id, row.qty, row.cash)
+        for row in db.exec(select(BotPosition)).all()
+    )
+
+
+class TestBotPositionStore(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.engine = positions_db()
+        self.fleet = LiquidityBotFleet(["AAPL", "TSLA"], [(1, {}), (2, {})], seed=0)
+        self.store = BotPositionStore(self.fleet, db_engine=self.engine)
+
+    async def test_only_changed_slots_written_in_one_flush(self):
+        self.fleet.apply_fill(1, "AAPL", 5, 100.0)
+        self.fleet.apply_fill(1, "AAPL", -2, 101.0)
+        self.fleet.apply_fill(2, "TSLA", -3, 200.0)
+        self.fleet.apply_fill(9, "AAPL", 1, 100.0)  # not a fleet bot
+
+        self.assertEqual(await self.store.flush(), 2)
+        self.assertEqual(await self.store.flush(), 0)
+        with Session(self.engine) as db:
+            self.assertEqual(rows(db), [(1, "AAPL", 3, -298.0), (2, "TSLA", -3, 600.0)])
+
+        # the next flush updates the existing row
+        self.fleet.apply_fill(1, "AAPL", 1, 99.0)
+        self.assertEqual(await self.store.flush(), 1)
+        with Session(self.engine) as db:
+            self.assertEqual(rows(db)[0], (1, "AAPL", 4, -397.0))
+
+    async def test_restored_on_load(self):
+        with Session(self.engine) as db:
+            upsert_bot_positions(
+                db,
+                [
+                    {
+                        "bot_id": 2,
+                        "instrument_id": "TSLA",
+                        "qty": 7,
+                        "cash": -1400.0,
+                        "last_updated": datetime.now(timezone.utc),
+                    }
+                ],
+            )
+            self.assertEqual(self.store.load(db), 1)
+
+        slot = self.fleet.slots[2, "TSLA"]
+        self.assertEqual(
+            (self.fleet.inventory[slot], self.fleet.cash[slot]), (7, -1400.0)
+        )
@@ -0,0 +1,93 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+import numpy as np
+
+from app.services.bot_quoter import BotQuoter, bot_user_id
+from app.services.liquidity_bot import LiquidityBotFleet
+from app.services.order_book import OrderSide
+from app.services.order_book_registry import OrderBookRegistry
+from app.services.trade_bus import TradeBus
+from tests.helpers import order
+
+PARAMS = {
+    "base_spread": 0.02,
+    "stress_coefficient": 0.0,
+    "inventory_coefficient": 0.0,
+    "quote_noise_sigma": 0.0,
+}
+
+
+class TestBotQuoter(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.bus = TradeBus()
+        self.registry = OrderBookRegistry(["AAPL", "TSLA"], trade_bus=self.bus)
+        self.fleet = LiquidityBotFleet(
+            ["AAPL", "TSLA"], [(1, PARAMS), (2, PARAMS)], levels=2, seed=0
+        )
+        self.quoter = BotQuoter(self.fleet, self.registry)
+        self.bus.subscribe(self.quoter.on_trade)
+
+    async def asyncTearDown(self):
+        await self.registry.stop()
+
+    async def requote(self, mids):
+        self.quoter.requote(np.array(mids))
+        await asyncio.gather(*self.quoter._pending.values())
+
+    async def test_quotes_rest_in_the_books(self):
+        await self.requote([100.0, 200.0])
+
+        book = self.registry.get("AAPL")
+        # two bots, 50 + 40 per level
+        self.assertEqual(book.depth(OrderSide.BUY), [[99.0, 100], [98.98, 80]])
+        self.assertEqual(book.depth(OrderSide.SELL), [[101.0, 100], [101.02, 80]])
+        self.assertEqual(book.user_order_count(bot_user_id(1)), 4)
+        self.assertEqual(self.quoter.stats()["resting"], 16)
+
+    async def test_only_moved_quotes_are_sent(self):
+        await self.requote([100.0, 200.0])
+        ids = self.quoter.order_ids.copy()
+
+        await self.requote([100.0, 200.0])
+        self.assertEqual((self.quoter.placed, self.quoter.amended), (16, 0))
+
+        # only TSLA moved, its 8 quotes are amended in place
+        await self.requote([100.0, 210.0])
+        self.assertEqual((self.quoter.placed, self.quoter.amended), (16, 8))
+        np.testing.assert_array_equal(self.quoter.order_ids, ids)
+        self.assertEqual(
+            self.registry.get("TSLA").depth(OrderSide.BUY, 1), [[207.9, 100]]
+        )
+
+    async def test_fills_are_replenished(self):
+        await self.requote([100.0, 200.0])
+        engine = self.registry.engine("AAPL")
+        await engine.process_order(order(OrderSide.BUY, 101.0, 60))
+        # bot 1's best ask is gone, bot 2's has 40 left
+        self.assertEqual(self.quoter.stats()["resting"], 15)
+
+        await self.requote([100.0, 200.0])
+        self.assertEqual((self.quoter.placed, self.quoter.amended), (17, 1))
+        book = self.registry.get("AAPL")
+        self.assertEqual(book.depth(OrderSide.SELL, 1), [[101.0, 100]])
+
+    async def test_unknown_mid_cancels(self):
+        await self.requote([100.0, 200.0])
+        await self.requote([100.0, np.nan])
+
+        self.assertEqual(self.quoter.cancelled, 8)
+        self.assertEqual(len(self.registry.get("TSLA")), 0)
+        self.assertEqual(len(self.registry.get("AAPL")), 8)
+
+    async def test_fills_move_bot_inventory(self):
+        await self.requote([100.0, 200.0])
+        await self.registry.engine("AAPL").process_order(
+            order(OrderSide.SELL, 99.0, 60)
+        )
+
+        slots = self.fleet.slots
+        self.assertEqual(self.fleet.inventory[slots[1, "AAPL"]], 50)
+        self.assertEqual(self.fleet.inventory[slots[2, "AAPL"]], 10)
+        self.assertEqual(self.fleet.cash[slots[1, "AAPL"]], -4950.0)
+        np.testing.assert_array_equal(self.fleet.dirty, [True, False, True, False])
@@ -0,0 +1,140 @@
+import asyncio
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from app.services.depth_feed import DepthFeed
+from app.services.order_book import OrderBook, OrderSide
+from app.services.order_book_registry import OrderBookRegistry
+from app.websocket.depth import DepthPublisher
+from tests.helpers import FakeWebSocket, order
+
+
+class TestDepthFeed(unittest.TestCase):
+    def setUp(self):
+        self.book = OrderBook(instrument_id="AAPL")
+        self.feed = DepthFeed(self.book)
+        self.updates = []
+        self.feed.listeners.append(self.updates.append)
+
+    def test_no_changes_no_update(self):
+        self.assertIsNone(self.feed.publish())
+        self.assertEqual(self.updates, [])
+
+    def test_changes_collapse_per_level(self):
+        self.book.add_order(order(OrderSide.BUY, 100.0, 2))
+        self.book.add_order(order(OrderSide.BUY, 100.0, 3))
+        self.book.add_order(order(OrderSide.SELL, 101.0, 1))
+
+        update = self.feed.publish()
+
+        self.assertEqual(update["type"], "book_update")
+        self.assertEqual(update["sequence"], 1)
+        self.assertEqual(update["bids"], [[100.0, 5]])
+        self.assertEqual(update["asks"], [[101.0, 1]])
+        self.assertEqual(self.updates, [update])
+
+    def test_removed_level_has_zero_size(self):
+        resting = self.book.add_order(order(OrderSide.SELL, 101.0, 1))
+        self.feed.publish()
+
+        self.book.cancel_order(resting["id"])
+        update = self.feed.publish()
+
+        self.assertEqual(update["sequence"], 2)
+        self.assertEqual(update["asks"], [[101.0, 0]])
+
+    def test_fills_and_amends(self):
+        self.book.add_order(order(OrderSide.SELL, 101.0, 5))
+        self.book.add_order(order(OrderSide.SELL, 102.0, 5))
+        resting = self.book.add_order(order(OrderSide.BUY, 99.0, 5))
+        self.feed.publish()
+
+        self.book.match_order(order(OrderSide.BUY, 102.0, 7, user_id="u2"))
+        self.book.amend_order(resting["id"], quantity=2)
+        update = self.feed.publish()
+
+        self.assertCountEqual(update["asks"], [[101.0, 0], [102.0, 3]])
+        self.assertEqual(update["bids"], [[99.0, 2]])
+
+    def test_snapshot_then_updates_rebuild_the_book(self):
+        self.book.add_order(order(OrderSide.BUY, 100.0, 2))
+        self.book.add_order(order(OrderSide.SELL, 101.0, 1))
+        snapshot = self.feed.snapshot()
+        # changes already in the snapshot come again in the next update
+        self.feed.publish()
+        self.book.match_order(order(OrderSide.BUY, 101.0, 1, user_id="u2"))
+        self.book.add_order(order(OrderSide.BUY, 99.5, 4))
+        self.feed.publish()
+
+        bids = dict(map(tuple, snapshot["bids"]))
+        asks = dict(map(tuple, snapshot["asks"]))
+        for update in self.updates:
+            if update["sequence"] <= snapshot["sequence"]:
+                continue
+            for levels, changes in ((bids, update["bids"]), (asks, update["asks"])):
+                for price, quantity in changes:
+                    if quantity:
+                        levels[price] = quantity
+                    else:
+                        levels.pop(price, None)
+
+        self.assertEqual(sorted(bids.items(), reverse=True), [(100.0, 2), (99.5, 4)])
+        self.assertEqual(asks, {})
+
+
+class TestDepthPublisher(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.registry = OrderBookRegistry(["AAPL", "TSLA"])
+        self.publisher = DepthPublisher(self.registry)
+        self.websocket = FakeWebSocket()
+        await self.publisher.connect(self.websocket)
+
+    async def asyncTearDown(self):
+        self.publisher.disconnect(self.websocket)
+        await self.registry.stop()
+
+    async def drain(self):
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+    async def test_snapshot_on_subscribe(self):
+        await self.registry.engine("AAPL").process_order(order(OrderSide.BUY, 100.0, 2))
+
+        tickers = self.publisher.subscribe(self.websocket, ["AAPL", "NOPE"])
+        await self.drain()
+
+        self.assertEqual(tickers, ["AAPL"])
+        snapshot = self.websocket.sent[0]
+        self.assertEqual(snapshot["type"], "book_snapshot")
+        self.assertEqual(snapshot["bids"], [[100.0, 2]])
+
+    async def test_updates_from_matching_engine(self):
+        self.publisher.subscribe(self.websocket, ["AAPL"])
+        engine = self.registry.engine("AAPL")
+
+        await engine.process_order(order(OrderSide.SELL, 101.0, 3))
+        await engine.process_order(order(OrderSide.BUY, 101.0, 1, user_id="u2"))
+        # other instruments don't reach AAPL subscribers
+        await self.registry.engine("TSLA").process_order(
+            order(OrderSide.SELL, 50.0, 1, ticker="TSLA")
+        )
+        await self.drain()
+
+        updates = self.websocket.sent[1:]
+        self.assertEqual([u["asks"] for u in updates], [[[101.0, 3]], [[101.0, 2]]])
+        self.assertEqual([u["sequence"] for u in updates], [1, 2])
+
+    async def test_resync_after_conflation(self):
+        self.publisher.subscribe(self.websocket, ["AAPL"])
+        writer = self.publisher.active_connections[self.websocket]
+        writer.resync = True
+
+        await self.registry.engine("AAPL").process_order(
+            order(OrderSide.SELL, 101.0, 3)
+        )
+        await self.drain()
+
+        self.assertEqual(
+            [m["type"] for m in self.websocket.sent], ["book_snapshot", "book_snapshot"]
+        )
+        self.assertFalse(writer.resync)
@@ -0,0 +1,133 @@
+import uuid
+from unittest import TestCase
+
+import numpy as np
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models import InstrumentFactorExposure, InstrumentSectorExposure
+from app.services.factor_model import FactorModel, FactorModelCache, NewsDrift
+from app.services.gbm import VectorizedGBMEngine
+from app.websocket.price_engine import PriceEngine
+
+
+class TestFactorModel(TestCase):
+    def setUp(self):
+        self.tickers = ["AAPL", "MSFT", "XOM"]
+        self.model = FactorModel.from_exposures(
+            self.tickers,
+            [("AAPL", "rates", 1.0), ("MSFT", "rates", 1.0), ("XOM", "oil", 2.0)],
+            [("AAPL", "tech", 0.5), ("MSFT", "tech", 0.5), ("OTHER", "tech", 1.0)],
+        )
+
+    def test_loadings_from_exposures(self):
+        self.assertEqual(
+            self.model.factor_ids, ["factor:rates", "factor:oil", "sector:tech"]
+        )
+        np.testing.assert_array_equal(
+            self.model.loadings, [[1, 0, 0.5], [1, 0, 0.5], [0, 2, 0]]
+        )
+
+    def test_shocks_keep_unit_variance_and_correlate(self):
+        rng = np.random.default_rng(0)
+        draws = np.array([self.model.draw(rng) for _ in range(50000)])
+
+        np.testing.assert_allclose(draws.var(axis=0), 1, rtol=0.05)
+        np.testing.assert_allclose(
+            np.corrcoef(draws.T), self.model.correlation(), atol=0.02
+        )
+        # AAPL / MSFT share both factors, XOM shares none with them
+        self.assertGreater(self.model.correlation()[0, 1], 0.5)
+        self.assertEqual(self.model.correlation()[0, 2], 0)
+
+    def test_gbm_uses_shock_model(self):
+        gbm = VectorizedGBMEngine(self.tickers, [100] * 3, [0] * 3, [0.04] * 3, 1, 0)
+        gbm.shock_model = self.model
+
+        log_returns = []
+        for _ in range(20000):
+            previous = gbm.prices.copy()
+            log_returns.append(np.log(gbm.step() / previous))
+
+        correlation = np.corrcoef(np.array(log_returns).T)
+        np.testing.assert_allclose(correlation, self.model.correlation(), atol=0.03)
+
+
+class TestFactorModelCache(TestCase):
+    def test_rebuilds_only_on_change(self):
+        engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(
+            engine,
+            tables=[
+                InstrumentFactorExposure.__table__,
+                InstrumentSectorExposure.__table__,
+            ],
+        )
+        cache = FactorModelCache(["AAPL"])
+        with Session(engine) as db:
+            db.add(
+                InstrumentFactorExposure(
+                    instrument_id="AAPL", factor_id=uuid.uuid4(), beta=0.3
+                )
+            )
+            db.commit()
+
+            self.assertTrue(cache.refresh(db))
+            model = cache.model
+            self.assertFalse(cache.refresh(db))
+            self.assertIs(cache.model, model)
+
+            db.add(
+                InstrumentSectorExposure(
+                    instrument_id="AAPL", sector_id="tech", weight=0.2
+                )
+            )
+            db.commit()
+            self.assertTrue(cache.refresh(db))
+            self.assertEqual(cache.model.loadings.shape, (1, 2))
+
+
+class TestNewsDrift(TestCase):
+    def setUp(self):
+        self.tickers = ["AAPL", "MSFT", "XOM"]
+        self.model = FactorModel.from_exposures(
+            self.tickers,
+            [("AAPL", "rates", 1.0), ("MSFT", "rates", 0.5), ("XOM", "oil", 2.0)],
+            [("AAPL", "tech", 0.5)],
+        )
+        self.drift = NewsDrift(self.tickers)
+
+    def test_market_news_hits_everything(self):
+        drift = self.drift.compute(np.array([0.01]), [None], self.model)
+        np.testing.assert_allclose(drift, [0.01, 0.01, 0.01])
+
+    def test_factor_news_through_betas(self):
+        drift = self.drift.compute(
+            np.array([0.0, 0.02, -0.01]), [None, "rates", "oil"], self.model
+        )
+        np.testing.assert_allclose(drift, [0.02, 0.01, -0.02])
+
+    def test_effects_capped_per_factor(self):
+        self.drift.set_caps({"rates": (0.01, 0.005), "oil": (0.01, -0.005)})
+        drift = self.drift.compute(
+            np.array([0.0, 0.03, -0.03]), [None, "rates", "oil"], self.model
+        )
+        np.testing.assert_allclose(drift, [0.01, 0.005, -0.01])
+
+    def test_rebuilt_when_factors_appear(self):
+        self.drift.compute(np.array([0.01]), [None], self.model)
+        drift = self.drift.compute(np.array([0.0, 0.01]), [None, "oil"], self.model)
+        np.testing.assert_allclose(drift, [0.0, 0.0, 0.02])
+
+
+class TestPriceEngineFactorInputs(TestCase):
+    def test_applied_on_the_caller(self):
+        engine = PriceEngine()
+        inputs = ([("AAPL", "rates", 1.0)], []), {"rates": (0.01, 0.02)}
+
+        engine.apply_factor_inputs(*inputs)
+        model = engine.gbm.shock_model
+        self.assertEqual(model.factor_ids, ["factor:rates"])
+        self.assertEqual(engine.news_drift.caps, {"rates": (0.01, 0.02)})
+
+        engine.apply_factor_inputs(*inputs)
+        self.assertIs(engine.gbm.shock_model, model)
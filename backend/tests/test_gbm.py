@@ -2,7 +2,8 @@ from unittest import TestCase
 
 import numpy as np
 
-from app.services.gbm import GeometricBrownianMotionAssetSimulator
+from app.services.gbm import GeometricBrownianMotionAssetSimulator, VectorizedGBMEngine
+from app.services.shock_buffer import ShockBuffer
 
 
 class TestGeometricBrownianMotionAssetSimulator(TestCase):
@@ -37,3 +38,67 @@ class TestGeometricBrownianMotionAssetSimulator(TestCase):
         # allow 10% tolerance
         # self.assertTrue(np.isclose(sample_mean, expected_mean, rtol=0.1))
         # self.assertTrue(np.isclose(sample_var, expected_var, rtol=0.1))
+
+
+class TestVectorizedGBMEngine(TestCase):
+    def setUp(self):
+        self.tickers = ["AAPL", "TSLA", "GOOG"]
+        self.prices = [180.0, 250.0, 340.0]
+        self.means = [0.07, 0.10, 0.06]
+        self.variances = [0.25, 0.40, 0.22]
+        self.dt = 1 / 252
+
+    def make_engine(self, seed=42):
+        return VectorizedGBMEngine(
+            self.tickers, self.prices, self.means, self.variances, self.dt, seed
+        )
+
+    def test_same_seed_same_path(self):
+        a, b = self.make_engine(), self.make_engine()
+        for _ in range(100):
+            np.testing.assert_array_equal(a.step(), b.step())
+
+    def test_reset_replays_the_session(self):
+        engine = self.make_engine(seed=None)
+        path = [engine.step().copy() for _ in range(50)]
+
+        engine.reset()
+        np.testing.assert_array_equal([engine.step().copy() for _ in range(50)], path)
+
+        replay = self.make_engine(seed=engine.seed_entropy)
+        np.testing.assert_array_equal(replay.step(), path[0])
+
+    def test_matches_scalar_formula(self):
+        engine = self.make_engine()
+        shocks = ShockBuffer(len(self.tickers), seed=42).next()
+
+        prices = engine.step(drift=0.5)
+
+        expected = np.array(self.prices) * np.exp(
+            (np.array(self.means) + 0.5 - np.array(self.variances) / 2) * self.dt
+            + np.sqrt(self.variances) * shocks * np.sqrt(self.dt)
+        )
+        np.testing.assert_allclose(prices, expected)
+        self.assertEqual(engine.as_dict()["TSLA"], prices[1])
+
+    def test_log_return_mean_var(self):
+        engine = self.make_engine()
+        n_samples = 20000
+
+        log_returns = np.empty((n_samples, len(self.tickers)))
+        previous = engine.prices.copy()
+        for i in range(n_samples):
+            current = engine.step()
+            log_returns[i] = np.log(current / previous)
+            previous = current.copy()
+
+        expected_mean = (np.array(self.means) - np.array(self.variances) / 2) * self.dt
+        expected_var = np.array(self.variances) * self.dt
+
+        # sample variance within 5%, mean within a few standard errors
+        np.testing.assert_allclose(log_returns.var(axis=0), expected_var, rtol=0.05)
+        np.testing.assert_allclose(
+            log_returns.mean(axis=0),
+            expected_mean,
+            atol=4 * np.sqrt(expected_var / n_samples).max(),
+        )
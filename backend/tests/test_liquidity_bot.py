@@ -0,0 +1,73 @@
+import unittest
+
+import numpy as np
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models import Bot
+from app.services.liquidity_bot import LiquidityBotFleet, load_bots
+
+NO_NOISE = {"quote_noise_sigma": 0.0}
+
+
+class TestLiquidityBotFleet(unittest.TestCase):
+    def test_slots_per_bot_and_instrument(self):
+        fleet = LiquidityBotFleet(
+            ["AAPL", "TSLA"],
+            [(1, {}), (2, {"instruments": ["TSLA", "NOPE"], "base_spread": 0.02})],
+            seed=0,
+        )
+        self.assertEqual(len(fleet), 3)
+        self.assertEqual(fleet.slots, {(1, "AAPL"): 0, (1, "TSLA"): 1, (2, "TSLA"): 2})
+        np.testing.assert_array_equal(fleet.base_spread, [0.1, 0.1, 0.02])
+        # missing coefficients fall back to LiquidityBot's ranges
+        self.assertTrue(
+            np.all(
+                (fleet.stress_coefficient >= 0.05) & (fleet.stress_coefficient <= 0.15)
+            )
+        )
+
+    def test_ladders_match_liquidity_bot(self):
+        fleet = LiquidityBotFleet(
+            ["AAPL"],
+            [
+                (
+                    1,
+                    {
+                        **NO_NOISE,
+                        "stress_coefficient": 0.1,
+                        "inventory_coefficient": 0.01,
+                    },
+                )
+            ],
+            seed=0,
+        )
+        fleet.inventory[:] = -5
+        bids, asks = fleet.quote([100.0], drift=np.array([0.5]))
+
+        # spread = 0.1 + 0.1 * 0.5 + 0.01 * 5 = 0.2
+        np.testing.assert_array_equal(bids, [[9000, 8980, 8960]])
+        np.testing.assert_array_equal(asks, [[11000, 11020, 11040]])
+        np.testing.assert_array_equal(fleet.depth, [50, 40, 30])
+
+    def test_quotes_never_cross(self):
+        fleet = LiquidityBotFleet(
+            ["AAPL"], [(i, {"base_spread": 0.0}) for i in range(50)], seed=1
+        )
+        bids, asks = fleet.quote([0.05])
+        self.assertTrue(np.all(bids >= 1))
+        self.assertTrue(np.all(asks[:, 0] > bids[:, 0]))
+
+
+class TestLoadBots(unittest.TestCase):
+    def test_params_from_bots_table(self):
+        engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(engine, tables=[Bot.__table__])
+        with Session(engine) as db:
+            db.add(Bot(id=2, name="wide", params={"base_spread": 0.3}))
+            db.add(Bot(id=1, name="default"))
+            db.commit()
+            bots = load_bots(db)
+
+        self.assertEqual(bots, [(1, {}), (2, {"base_spread": 0.3})])
+        fleet = LiquidityBotFleet(["AAPL"], bots, seed=0)
+        np.testing.assert_array_equal(fleet.base_spread, [0.1, 0.3])
@@ -0,0 +1,76 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from app.services.matching_engine import MatchingEngine
+from app.services.order_book import OrderBook, OrderSide, OrderStatus
+from app.services.order_processor import OrderProcessor
+from tests.helpers import order
+
+
+def make_engine(instrument_id="AAPL", max_pending=None):
+    book = OrderBook(instrument_id=instrument_id)
+    return MatchingEngine(instrument_id, OrderProcessor(book), max_pending)
+
+
+class TestMatchingEngine(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = make_engine()
+
+    async def asyncTearDown(self):
+        await self.engine.stop()
+
+    async def test_concurrent_submitters_are_serialized(self):
+        sells = [order(OrderSide.SELL, 100, user_id=f"s{i}") for i in range(50)]
+        buys = [order(OrderSide.BUY, 100, user_id=f"b{i}") for i in range(50)]
+
+        results = await asyncio.gather(
+            *(self.engine.process_order(o) for pair in zip(sells, buys) for o in pair)
+        )
+
+        # arrival order is kept: every sell rests, the buy right after it takes it out
+        self.assertEqual(
+            [r["status"] for r in results],
+            [OrderStatus.OPEN, OrderStatus.FILLED] * 50,
+        )
+        self.assertEqual(len(self.engine.order_book), 0)
+
+    async def test_crossing_amend_matches(self):
+        bid = await self.engine.process_order(order(OrderSide.BUY, 101, 2))
+        await self.engine.process_order(order(OrderSide.SELL, 102, 1, user_id="s1"))
+
+        result = await self.engine.amend_order(bid["order_id"], price=103)
+        self.assertEqual(result["status"], OrderStatus.PARTIALLY_FILLED)
+        self.assertEqual(self.engine.order_book.depth(OrderSide.BUY), [[103, 1]])
+        self.assertIsNone(self.engine.order_book.best_ask())
+
+    async def test_errors_go_back_to_the_submitter(self):
+        with self.assertRaises(ValueError):
+            await self.engine.process_order(order(OrderSide.BUY, 100, ticker="TSLA"))
+
+        # the engine keeps running afterwards
+        result = await self.engine.process_order(order(OrderSide.BUY, 100))
+        self.assertEqual(result["status"], OrderStatus.OPEN)
+
+    async def test_bounded_queue_pushes_back(self):
+        engine = make_engine(max_pending=1)
+        first = engine.submit_nowait(
+            engine.order_processor.process_order, order(OrderSide.BUY, 100)
+        )
+        with self.assertRaises(asyncio.QueueFull):
+            engine.submit_nowait(
+                engine.order_processor.process_order, order(OrderSide.BUY, 101)
+            )
+
+        self.assertEqual((await first)["status"], OrderStatus.OPEN)
+        await engine.stop()
+
+    async def test_stop_fails_queued_commands(self):
+        engine = make_engine()
+        engine.start()
+        await engine.stop()
+
+        future = asyncio.get_running_loop().create_future()
+        engine._queue.put_nowait((None, (), future))
+        await engine.stop()
+        with self.assertRaises(RuntimeError):
+            await future
@@ -0,0 +1,215 @@
+import asyncio
+import time
+import unittest
+import uuid
+from unittest import IsolatedAsyncioTestCase
+
+import numpy as np
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app.models import MacroFactor, NewsEvent, NewsEventFactor
+from app.services.news import NewsShockSimulator, load_news
+
+T0 = 1_700_000_000.0
+
+
+def news(release_s, magnitude, halflife_s, factor_ids=None):
+    item = {
+        "ts_release_ms": int(release_s * 1000),
+        "magnitude": magnitude,
+        "decay_halflife_s": halflife_s,
+    }
+    if factor_ids is not None:
+        item["factor_ids"] = factor_ids
+    return item
+
+
+def brute_force(items, now_s, epsilon):
+    total = 0.0
+    for item in items:
+        release_s = item["ts_release_ms"] / 1000
+        if release_s > now_s:
+            continue
+        eff = item["magnitude"] * 2 ** (-(now_s - release_s) / item["decay_halflife_s"])
+        if abs(eff) >= epsilon:
+            total += eff
+    return total
+
+
+class TestNewsShockSimulator(unittest.TestCase):
+    def setUp(self):
+        self.sim = NewsShockSimulator(epsilon=1e-6)
+
+    def test_single_news_decays_by_half_life(self):
+        self.sim.add_news_ad_hoc(news(T0, 0.02, 30), now_s=T0)
+        self.assertAlmostEqual(self.sim.get_total_eff(T0), 0.02)
+        self.assertAlmostEqual(self.sim.get_total_eff(T0 + 30), 0.01)
+        self.assertAlmostEqual(self.sim.get_total_eff(T0 + 60), 0.005)
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        items = [
+            news(
+                T0 + rng.uniform(0, 600),
+                rng.uniform(-0.05, 0.05),
+                float(rng.choice([10, 60, 300])),
+            )
+            for _ in range(200)
+        ]
+        for item in items:
+            self.sim.add_news_ad_hoc(item, now_s=T0)
+
+        for now_s in np.linspace(T0, T0 + 3600, 50):
+            self.assertAlmostEqual(
+                self.sim.get_total_eff(now_s),
+                brute_force(items, now_s, 1e-6),
+                delta=1e-5,
+            )
+        self.assertLessEqual(len(self.sim.groups), 3)
+
+    def test_expired_news_evicted(self):
+        self.sim.add_news_ad_hoc(news(T0, 0.02, 10), now_s=T0)
+        self.sim.add_news_ad_hoc(news(T0, -0.01, 60), now_s=T0)
+        self.assertEqual(len(self.sim.groups), 2)
+
+        # 0.02 * 2^-15 is below 1e-6 after 150s
+        self.sim.get_total_eff(T0 + 150)
+        self.assertEqual(list(self.sim.groups), [60])
+        self.sim.get_total_eff(T0 + 3600)
+        self.assertEqual(self.sim.groups, {})
+        self.assertEqual(self.sim._expiry, [])
+        self.assertEqual(self.sim.get_total_eff(T0 + 3600), 0)
+
+    def test_future_news_waits_for_release(self):
+        self.sim.add_news_ad_hoc(news(T0 + 100, 0.03, 50), now_s=T0)
+        self.assertEqual(self.sim.get_total_eff(T0 + 99), 0)
+        self.assertAlmostEqual(self.sim.get_total_eff(T0 + 150), 0.015)
+
+    def test_already_decayed_news_ignored(self):
+        self.sim.add_news_ad_hoc(news(T0 - 10_000, 0.02, 10), now_s=T0)
+        self.assertEqual(self.sim.groups, {})
+
+    def test_effects_per_factor(self):
+        self.sim.add_news_ad_hoc(news(T0, 0.01, 30), now_s=T0)
+        self.sim.add_news_ad_hoc(news(T0, 0.02, 30, ["rates"]), now_s=T0)
+        self.sim.add_news_ad_hoc(news(T0, -0.04, 60, ["rates", "oil"]), now_s=T0)
+        self.assertEqual(self.sim.factor_ids, [None, "rates", "oil"])
+
+        np.testing.assert_allclose(
+            self.sim.get_factor_effects(T0 + 60), [0.0025, -0.015, -0.02]
+        )
+        self.assertAlmostEqual(self.sim.get_total_eff(T0 + 60), -0.0325)
+
+    def test_expired_factor_news_leaves_other_columns(self):
+        self.sim.add_news_ad_hoc(news(T0, 0.02, 10, ["oil"]), now_s=T0)
+        self.sim.add_news_ad_hoc(news(T0 + 100, 0.01, 10), now_s=T0 + 100)
+        # the oil news expires first, only its column is cleared
+        effects = self.sim.get_factor_effects(T0 + 160)
+        self.assertAlmostEqual(effects[1], 0)
+        self.assertAlmostEqual(effects[0], 0.01 * 2**-6)
+
+    def test_missing_fields(self):
+        with self.assertRaises(ValueError):
+            self.sim.add_news_ad_hoc({"magnitude": 1.0})
+
+
+def news_db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(
+        engine,
+        tables=[
+            MacroFactor.__table__,
+            NewsEvent.__table__,
+            NewsEventFactor.__table__,
+        ],
+    )
+    return engine
+
+
+def add_event(db, release_s, magnitude=0.02, halflife_s=30, factor_ids=()):
+    event = NewsEvent(
+        ts_release_ms=int(release_s * 1000),
+        headline="headline",
+        magnitude=magnitude,
+        decay_halflife_s=halflife_s,
+    )
+    db.add(event)
+    for factor_id in factor_ids:
+        db.add(NewsEventFactor(news_event_id=event.id, factor_id=factor_id))
+    db.commit()
+    return event
+
+
+class TestLoadNews(unittest.TestCase):
+    def test_rows_after_watermark_with_factors(self):
+        engine = news_db()
+        rates = uuid.uuid4()
+        with Session(engine) as db:
+            old = add_event(db, T0 - 10)
+            first = add_event(db, T0, factor_ids=[rates])
+            second = add_event(db, T0 + 10)
+
+            rows = load_news(db, int(T0 * 1000))
+            self.assertEqual(
+                [row["id"] for row in rows], [str(first.id), str(second.id)]
+            )
+            self.assertEqual(rows[0]["factor_ids"], [str(rates)])
+            self.assertEqual(rows[1]["factor_ids"], [])
+
+            # rows at the watermark that were already loaded are skipped
+            rows = load_news(db, int((T0 + 10) * 1000), {str(second.id)})
+            self.assertEqual(rows, [])
+            self.assertNotIn(str(old.id), [row["id"] for row in rows])
+
+
+class TestNewsScheduler(IsolatedAsyncioTestCase):
+    async def test_released_exactly_on_time(self):
+        engine = news_db()
+        sim = NewsShockSimulator(epsilon=1e-6, db_engine=engine)
+        now_s = time.time()
+        with Session(engine) as db:
+            add_event(db, now_s - 1, magnitude=0.01, halflife_s=3600)
+            add_event(db, now_s + 0.1, magnitude=0.02, halflife_s=3600)
+
+        task = asyncio.create_task(sim.add_news_on_tick())
+        try:
+            await asyncio.sleep(0.05)
+            self.assertEqual(len(sim._pending), 1)
+            self.assertEqual(len(sim._expiry), 1)
+
+            # activated by the scheduler itself, not by a get_total_eff call
+            await asyncio.sleep(0.1)
+            self.assertEqual(sim._pending, [])
+            self.assertEqual(len(sim._expiry), 2)
+            self.assertAlmostEqual(sim.get_total_eff(), 0.03, places=4)
+
+            # the next reload only returns new rows
+            self.assertEqual(await sim.reload(), 0)
+            with Session(engine) as db:
+                add_event(db, time.time() + 60)
+            self.assertEqual(await sim.reload(), 1)
+            self.assertEqual(len(sim._pending), 1)
+        finally:
+            task.cancel()
+            await task
+
+    async def test_reload_picks_up_earlier_release_added_later(self):
+        engine = news_db()
+        sim = NewsShockSimulator(epsilon=1e-6, db_engine=engine)
+        now_s = time.time()
+        with Session(engine) as db:
+            later = str(add_event(db, now_s + 3600).id)
+        self.assertEqual(await sim.reload(), 1)
+
+        # entered after the one releasing in an hour, but releases first
+        with Session(engine) as db:
+            earlier = str(add_event(db, now_s + 60).id)
+        self.assertEqual(await sim.reload(), 1)
+        self.assertEqual(await sim.reload(), 0)
+        self.assertEqual(
+            [item[2]["id"] for item in sorted(sim._pending)],
+            [earlier, later],
+        )
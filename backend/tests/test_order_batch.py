@@ -0,0 +1,179 @@
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.core.deps import get_current_active_user
+from app.schemas.order import OrderCreate
+from app.schemas.user import UserInDB
+from app.services.order_book import OrderSide, OrderType
+from app.services.order_book_registry import OrderBookRegistry
+from app.services.order_validation import validate_order_batch
+from app.services.positions import PositionBook
+from dependencies import get_order_book_registry
+from main import app
+
+
+def order(**kwargs):
+    return OrderCreate(
+        **{"ticker": "AAPL", "side": "buy", "quantity": 10, "price": 100, **kwargs}
+    )
+
+
+class TestValidateOrderBatch(TestCase):
+    def setUp(self):
+        self.registry = OrderBookRegistry(["AAPL", "TSLA"])
+
+    def test_per_order_errors(self):
+        errors, _ = validate_order_batch(
+            [
+                order(),
+                order(ticker="NOPE"),
+                order(price=100.005),
+                order(type="stop", price=None),
+                order(type="market", price=None),
+            ],
+            self.registry,
+            "u1",
+        )
+        self.assertIsNone(errors[0])
+        self.assertEqual(errors[1], "Unknown instrument")
+        self.assertIn("tick size", errors[2])
+        self.assertEqual(errors[3], "Stop orders need a stop_price")
+        self.assertIsNone(errors[4])
+
+    @patch("app.services.order_validation.settings.MAX_ORDERS_PER_USER", 3)
+    def test_order_count_includes_resting_orders(self):
+        self.registry.get("AAPL").add_order({**order().model_dump(), "user_id": "u1"})
+        errors, _ = validate_order_batch(
+            [order(), order(), order()], self.registry, "u1"
+        )
+        self.assertEqual(errors[:2], [None, None])
+        self.assertIn("open orders", errors[2])
+
+    @patch("app.services.order_validation.settings.MAX_POSITION_SIZE", 2500.0)
+    def test_position_size_counts_position_and_resting_orders(self):
+        positions = PositionBook()
+        positions.on_trade(
+            SimpleNamespace(
+                instrument_id="AAPL",
+                price=100.0,
+                quantity=8,
+                buy_user_id="u1",
+                sell_user_id="u2",
+            )
+        )
+        self.registry.get("AAPL").add_order(
+            {**order(quantity=5, price=90).model_dump(), "user_id": "u1"}
+        )
+
+        # 800 position + 450 resting + 1000 fits, another 1000 does not
+        errors, notional = validate_order_batch(
+            [order(), order()], self.registry, "u1", positions
+        )
+        self.assertIsNone(errors[0])
+        self.assertIn("position size", errors[1])
+        self.assertEqual(notional, {"AAPL": 1000.0})
+
+        # the reserved notional holds back a concurrent batch
+        with self.registry.reserve("u1", 1, notional):
+            errors, _ = validate_order_batch([order()], self.registry, "u1", positions)
+            self.assertIn("position size", errors[0])
+        errors, _ = validate_order_batch([order()], self.registry, "u1", positions)
+        self.assertIsNone(errors[0])
+
+    @patch("app.services.order_validation.settings.MAX_ORDERS_PER_USER", 2)
+    def test_reserved_orders_count(self):
+        with self.registry.reserve("u1", 2, {}):
+            errors, _ = validate_order_batch([order()], self.registry, "u1")
+            self.assertIn("open orders", errors[0])
+        self.assertEqual(self.registry.user_order_count("u1"), 0)
+
+    @patch("app.services.order_validation.settings.MAX_POSITION_SIZE", 2500.0)
+    def test_position_size_per_instrument(self):
+        errors, _ = validate_order_batch(
+            [order(), order(ticker="TSLA"), order(), order(quantity=6)],
+            self.registry,
+            "u1",
+        )
+        # AAPL: 1000, 2000, then 2600 goes over, TSLA is counted on its own
+        self.assertEqual(errors[:3], [None, None, None])
+        self.assertIn("position size", errors[3])
+
+
+class TestOrderBatchEndpoint(TestCase):
+    def setUp(self):
+        self.registry = OrderBookRegistry(["AAPL", "TSLA"])
+        app.dependency_overrides[get_order_book_registry] = lambda: self.registry
+        app.dependency_overrides[get_current_active_user] = lambda: UserInDB(
+            id=1, username="u1", hashed_password="x", created_at=datetime.utcnow()
+        )
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+
+    def test_batch_results_per_order(self):
+        response = self.client.post(
+            "/api/v1/trading/orders/batch",
+            json={
+                "orders": [
+                    {"ticker": "AAPL", "side": "sell", "quantity": 5, "price": 100},
+                    {"ticker": "TSLA", "side": "buy", "quantity": 5, "price": 50.001},
+                    {"ticker": "AAPL", "side": "buy", "quantity": 5, "price": 100},
+                ]
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+
+        self.assertEqual([r["status"] for r in results], ["open", "rejected", "filled"])
+        self.assertEqual(results[2]["fills"][0]["price"], 100)
+
+    def test_results_hide_other_users(self):
+        processor = self.registry.engine("AAPL").order_processor
+        for user_id, price in (("u2", 100), ("u3", 101)):
+            processor.process_order(
+                {
+                    "price": price,
+                    "quantity": 5,
+                    "ticker": "AAPL",
+                    "user_id": user_id,
+                    "side": OrderSide.SELL,
+                }
+            )
+        # fires once the submitter's buy trades at 100
+        processor.process_order(
+            {
+                "quantity": 1,
+                "ticker": "AAPL",
+                "user_id": "u2",
+                "side": OrderSide.BUY,
+                "type": OrderType.STOP,
+                "stop_price": 100,
+            }
+        )
+
+        response = self.client.post(
+            "/api/v1/trading/orders/batch",
+            json={
+                "orders": [
+                    {"ticker": "AAPL", "side": "buy", "quantity": 2, "price": 100}
+                ]
+            },
+        )
+        [result] = response.json()["results"]
+
+        self.assertEqual(result["status"], "filled")
+        self.assertNotIn("triggered_orders", result)
+        self.assertEqual(
+            result["fills"],
+            [{"ticker": "AAPL", "price": 100, "quantity": 2, "aggressor_side": "buy"}],
+        )
+        self.assertEqual(len(processor.stop_orders), 0)  # the stop did fire
+
+    def test_batch_size_limit(self):
+        response = self.client.post("/api/v1/trading/orders/batch", json={"orders": []})
+        self.assertEqual(response.status_code, 422)
@@ -110,7 +110,7 @@ class TestOrderBook(TestCase):
         }
 
         # Match the order
-        status, remaining_qty = self.order_book.match_order(buy_order)
+        status, remaining_qty, fills = self.order_book.match_order(buy_order)
 
         # Verify the results
         self.assertEqual(status, OrderStatus.PARTIALLY_FILLED)
@@ -138,7 +138,7 @@ class TestOrderBook(TestCase):
         }
 
         # Match the order
-        status, remaining_qty = self.order_book.match_order(buy_order)
+        status, remaining_qty, fills = self.order_book.match_order(buy_order)
 
         # Verify the results
         self.assertEqual(status, OrderStatus.FILLED)
@@ -166,7 +166,7 @@ class TestOrderBook(TestCase):
         }
 
         # Try to match the order
-        status, remaining_qty = self.order_book.match_order(buy_order)
+        status, remaining_qty, fills = self.order_book.match_order(buy_order)
 
         # Verify the results
         self.assertEqual(status, OrderStatus.OPEN)
@@ -241,16 +241,153 @@ class TestOrderBook(TestCase):
         }
 
         # Match the order
-        status, remaining_qty = self.order_book.match_order(buy_order)
+        status, remaining_qty, fills = self.order_book.match_order(buy_order)
 
         # Verify the results
         self.assertEqual(status, OrderStatus.FILLED)
         self.assertEqual(remaining_qty, 0)  # all filled
 
-        # here, we take the worst ask first, so only 101 should be left
+        # price priority, the best ask (101) goes first, so only 102 should be left
         self.assertEqual(len(self.order_book.sells), 1)
         self.assertEqual(self.order_book.sells[0]["quantity"], 1)
-        self.assertEqual(self.order_book.sells[0]["price"], 101)
+        self.assertEqual(self.order_book.sells[0]["price"], 102)
 
         # nothing is added to the buys
         self.assertEqual(len(self.order_book.buys), 0)
+
+        # one fill per resting order touched, best price first
+        self.assertEqual(
+            [(f["price"], f["quantity"]) for f in fills], [(101, 3), (102, 4)]
+        )
+        self.assertEqual(fills[0]["buy_user_id"], "u3")
+        self.assertEqual(fills[0]["sell_user_id"], "u1")
+
+    def test_matching_time_priority_and_stop_at_limit(self):
+        """Test orders at one price fill oldest first and matching stops at the limit"""
+        first = self.order_book.add_order(self.sell_order_102.copy())
+        second = self.order_book.add_order({**self.sell_order_102, "user_id": "u9"})
+        self.order_book.add_order(self.sell_order_103.copy())
+
+        buy_order = {
+            "price": 102,
+            "quantity": 20,
+            "ticker": "AAPL",
+            "user_id": "u1",
+            "side": OrderSide.BUY,
+        }
+        status, remaining_qty, fills = self.order_book.match_order(buy_order)
+
+        self.assertEqual(status, OrderStatus.PARTIALLY_FILLED)
+        self.assertEqual(remaining_qty, 4)
+        self.assertEqual(
+            [f["sell_order_id"] for f in fills], [first["id"], second["id"]]
+        )
+
+        # 103 does not cross, so it is untouched and the remainder rests at 102
+        self.assertEqual(self.order_book.depth(OrderSide.SELL), [[103, 12]])
+        self.assertEqual(self.order_book.best_bid()["quantity"], 4)
+        self.assertEqual(self.order_book.best_bid()["id"], buy_order["id"])
+
+    def test_same_price_orders_share_level(self):
+        """Test orders at the same price queue in one level, oldest first"""
+        first = self.buy_order_100.copy()
+        second = {**self.buy_order_100, "user_id": "u9", "quantity": 4}
+        self.order_book.add_order(first)
+        self.order_book.add_order(second)
+
+        # one price level holding both orders
+        self.assertEqual(self.order_book.depth(OrderSide.BUY), [[100, 14]])
+
+        # oldest order at the best price is the one to be hit next
+        self.assertEqual(self.order_book.best_bid()["id"], first["id"])
+        self.assertEqual(self.order_book.buys[-1]["id"], first["id"])
+
+    def test_best_prices_across_levels(self):
+        """Test best bid / ask track the top level as levels come and go"""
+        self.order_book.add_order(self.buy_order_100.copy())
+        self.order_book.add_order(self.buy_order_101.copy())
+        self.order_book.add_order(self.sell_order_103.copy())
+        self.order_book.add_order(self.sell_order_102.copy())
+
+        self.assertEqual(self.order_book.best_bid()["price"], 101)
+        self.assertEqual(self.order_book.best_ask()["price"], 102)
+
+        # removing the last order at a price drops the whole level
+        self.order_book.remove_order(self.order_book.best_ask())
+        self.assertEqual(self.order_book.depth(OrderSide.SELL), [[103, 12]])
+        self.assertEqual(self.order_book.best_ask()["price"], 103)
+
+    def test_cancel_by_id(self):
+        """Test cancelling resting orders by ID"""
+        first = self.order_book.add_order(self.buy_order_100.copy())
+        second = self.order_book.add_order({**self.buy_order_100, "user_id": "u9"})
+
+        cancelled = self.order_book.cancel_order(first["id"])
+        self.assertEqual(cancelled["id"], first["id"])
+        self.assertNotIn(first["id"], self.order_book)
+        self.assertEqual(self.order_book.best_bid()["id"], second["id"])
+        self.assertEqual(self.order_book.depth(OrderSide.BUY), [[100, 10]])
+
+        # cancelling twice is a no-op
+        self.assertIsNone(self.order_book.cancel_order(first["id"]))
+
+    def test_amend_keeps_or_loses_priority(self):
+        """Test amending down keeps queue position, amending up goes to the back"""
+        first = self.order_book.add_order(self.sell_order_102.copy())
+        second = self.order_book.add_order({**self.sell_order_102, "user_id": "u9"})
+
+        self.order_book.amend_order(first["id"], quantity=3)
+        self.assertEqual(self.order_book.best_ask()["id"], first["id"])
+        self.assertEqual(self.order_book.depth(OrderSide.SELL), [[102, 11]])
+
+        self.order_book.amend_order(first["id"], quantity=20)
+        self.assertEqual(self.order_book.best_ask()["id"], second["id"])
+        self.assertEqual(self.order_book.depth(OrderSide.SELL), [[102, 28]])
+
+        self.order_book.amend_order(second["id"], price=101)
+        self.assertEqual(self.order_book.depth(OrderSide.SELL), [[101, 8], [102, 20]])
+        self.assertEqual(self.order_book.best_ask()["id"], second["id"])
+
+    def test_amend_never_crosses_the_book(self):
+        """Test amending into the other side is rejected and leaves the order alone"""
+        bid = self.order_book.add_order(self.buy_order_101.copy())
+        self.order_book.add_order(self.sell_order_102.copy())
+
+        with self.assertRaises(ValueError):
+            self.order_book.amend_order(bid["id"], price=103)
+        self.assertEqual(self.order_book.best_bid()["price"], 101)
+        self.assertEqual(self.order_book.best_ask()["price"], 102)
+
+    def test_cancel_all_for_user(self):
+        """Test bulk cancel only touches the given user's orders"""
+        self.order_book.add_order(self.buy_order_100.copy())
+        self.order_book.add_order({**self.sell_order_103, "user_id": "u1"})
+        self.order_book.add_order(self.buy_order_101.copy())
+
+        cancelled = self.order_book.cancel_all("u1")
+
+        self.assertEqual(len(cancelled), 2)
+        self.assertEqual(len(self.order_book), 1)
+        self.assertEqual(self.order_book.get_user_orders("u1"), [])
+        self.assertEqual(self.order_book.best_bid()["user_id"], "u2")
+        self.assertIsNone(self.order_book.best_ask())
+
+    def test_fixed_point_prices(self):
+        """Test prices are stored in ticks and converted back at the boundary"""
+        book = OrderBook(tick_size=0.05)
+        order = book.add_order({**self.buy_order_100, "price": 100.15})
+
+        self.assertEqual(book._orders[order["id"]].price, 2003)
+        self.assertEqual(book.best_bid()["price"], 100.15)
+
+        # off the tick grid
+        with self.assertRaises(ValueError):
+            book.add_order({**self.buy_order_100, "price": 100.01})
+
+    def test_sequential_order_ids(self):
+        """Test order IDs are increasing integers"""
+        first = self.order_book.add_order(self.buy_order_100.copy())
+        second = self.order_book.add_order(self.sell_order_102.copy())
+
+        self.assertIsInstance(first["id"], int)
+        self.assertGreater(second["id"], first["id"])
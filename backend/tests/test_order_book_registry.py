@@ -0,0 +1,74 @@
+from unittest import TestCase
+
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models.instrument import Instrument
+from app.services.order_book import OrderSide
+from app.services.order_book_registry import OrderBookRegistry, UnknownInstrumentError
+
+
+class TestOrderBookRegistry(TestCase):
+    def setUp(self):
+        self.registry = OrderBookRegistry(["AAPL", "TSLA"])
+
+    def test_books_are_created_lazily_per_instrument(self):
+        self.assertEqual(self.registry._engines, {})
+
+        aapl = self.registry.get("AAPL")
+        self.assertIs(self.registry.get("AAPL"), aapl)
+        self.assertIsNot(self.registry.get("TSLA"), aapl)
+        self.assertIsNot(self.registry.engine("AAPL"), self.registry.engine("TSLA"))
+        self.assertIs(self.registry.engine("AAPL").order_book, aapl)
+
+    def test_instruments_do_not_match_each_other(self):
+        self.registry.get("AAPL").add_order(
+            {
+                "price": 100,
+                "quantity": 5,
+                "ticker": "AAPL",
+                "user_id": "u1",
+                "side": OrderSide.SELL,
+            }
+        )
+        status, remaining_qty, fills = self.registry.get("TSLA").match_order(
+            {
+                "price": 100,
+                "quantity": 5,
+                "ticker": "TSLA",
+                "user_id": "u2",
+                "side": OrderSide.BUY,
+            }
+        )
+        self.assertEqual(fills, [])
+        self.assertEqual(remaining_qty, 5)
+
+        # a book refuses orders for another ticker
+        with self.assertRaises(ValueError):
+            self.registry.get("AAPL").add_order(
+                {
+                    "price": 100,
+                    "quantity": 5,
+                    "ticker": "TSLA",
+                    "user_id": "u2",
+                    "side": OrderSide.BUY,
+                }
+            )
+
+    def test_unknown_instrument(self):
+        with self.assertRaises(UnknownInstrumentError):
+            self.registry.get("NOPE")
+
+    def test_load_instruments(self):
+        engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(engine, tables=[Instrument.__table__])
+        with Session(engine) as db:
+            db.add(
+                Instrument(id="GOOG", full_name="Alphabet", s_0=1, mean=0, variance=1)
+            )
+            db.commit()
+
+            registry = OrderBookRegistry()
+            registry.load_instruments(db)
+
+        self.assertEqual(registry.instrument_ids, ["GOOG"])
+        self.assertEqual(registry.get("GOOG").instrument_id, "GOOG")
@@ -0,0 +1,159 @@
+from unittest import TestCase
+
+from app.services.order_book import (
+    OrderBook,
+    OrderSide,
+    OrderStatus,
+    OrderType,
+    TimeInForce,
+)
+from app.services.order_processor import OrderProcessor
+
+
+class TestOrderProcessor(TestCase):
+    def setUp(self):
+        self.order_book = OrderBook()
+        self.processor = OrderProcessor(self.order_book)
+
+        # resting asks at 101 (5) and 102 (5)
+        for price in (101, 102):
+            self.order_book.add_order(
+                {
+                    "price": price,
+                    "quantity": 5,
+                    "ticker": "AAPL",
+                    "user_id": "maker",
+                    "side": OrderSide.SELL,
+                }
+            )
+
+    def order(self, side, quantity, price=None, **kwargs):
+        return {
+            "price": price,
+            "quantity": quantity,
+            "ticker": "AAPL",
+            "user_id": "u1",
+            "side": side,
+            **kwargs,
+        }
+
+    def test_market_order_sweeps_and_never_rests(self):
+        result = self.processor.process_order(
+            self.order(OrderSide.BUY, 12, type=OrderType.MARKET)
+        )
+
+        self.assertEqual(result["status"], OrderStatus.PARTIALLY_FILLED)
+        self.assertEqual(result["unprocessed_quantity"], 2)
+        self.assertEqual([f["price"] for f in result["fills"]], [101, 102])
+        self.assertIsNone(self.order_book.best_ask())
+        self.assertIsNone(self.order_book.best_bid())
+
+    def test_ioc_cancels_remainder(self):
+        result = self.processor.process_order(
+            self.order(OrderSide.BUY, 8, 101, time_in_force=TimeInForce.IOC)
+        )
+
+        self.assertEqual(result["status"], OrderStatus.PARTIALLY_FILLED)
+        self.assertEqual(result["unprocessed_quantity"], 3)
+        self.assertIsNone(self.order_book.best_bid())
+
+        result = self.processor.process_order(
+            self.order(OrderSide.BUY, 8, 100, time_in_force=TimeInForce.IOC)
+        )
+        self.assertEqual(result["status"], OrderStatus.CANCELLED)
+
+    def test_fok_fills_completely_or_not_at_all(self):
+        result = self.processor.process_order(
+            self.order(OrderSide.BUY, 11, 102, time_in_force=TimeInForce.FOK)
+        )
+        self.assertEqual(result["status"], OrderStatus.CANCELLED)
+        self.assertEqual(result["fills"], [])
+        self.assertEqual(len(self.order_book), 2)  # book untouched
+
+        result = self.processor.process_order(
+            self.order(OrderSide.BUY, 10, 102, time_in_force=TimeInForce.FOK)
+        )
+        self.assertEqual(result["status"], OrderStatus.FILLED)
+        self.assertEqual(len(self.order_book), 0)
+
+    def test_stop_triggers_once_price_is_reached(self):
+        stop = self.processor.process_order(
+            self.order(OrderSide.BUY, 3, type=OrderType.STOP, stop_price=102)
+        )
+        self.assertEqual(stop["status"], OrderStatus.PENDING)
+        self.assertIn(stop["order_id"], self.processor.stop_orders)
+
+        # trade at 101 does not reach the stop
+        result = self.processor.process_order(self.order(OrderSide.BUY, 5, 101))
+        self.assertEqual(result["triggered_orders"], [])
+
+        # trade at 102 fires it as a market order, under the stop's own ID
+        result = self.processor.process_order(self.order(OrderSide.BUY, 1, 102))
+        [triggered] = result["triggered_orders"]
+        self.assertEqual(triggered["order_id"], stop["order_id"])
+        self.assertEqual(triggered["status"], OrderStatus.FILLED)
+        self.assertEqual(self.order_book.depth(OrderSide.SELL), [[102, 1]])
+        self.assertEqual(len(self.processor.stop_orders), 0)
+
+    def test_stop_limit_rests_at_limit(self):
+        self.processor.process_order(
+            self.order(
+                OrderSide.SELL, 4, 100, type=OrderType.STOP_LIMIT, stop_price=101
+            )
+        )
+        result = self.processor.process_order(self.order(OrderSide.BUY, 1, 101))
+
+        [triggered] = result["triggered_orders"]
+        self.assertEqual(triggered["status"], OrderStatus.OPEN)
+        self.assertEqual(self.order_book.depth(OrderSide.SELL)[0], [100, 4])
+
+    def test_cancel_pending_stop(self):
+        stop = self.processor.process_order(
+            self.order(OrderSide.SELL, 3, type=OrderType.STOP, stop_price=99)
+        )
+        result = self.processor.cancel_order({"id": stop["order_id"]})
+
+        self.assertEqual(result["status"], "CANCELLED")
+        self.assertEqual(len(self.processor.stop_orders), 0)
+
+    def test_amend_rests_when_not_crossing(self):
+        bid = self.processor.process_order(self.order(OrderSide.BUY, 2, 99))
+        result = self.processor.amend_order(bid["order_id"], 4, 100)
+
+        self.assertEqual(result["status"], OrderStatus.OPEN)
+        self.assertEqual(self.order_book.depth(OrderSide.BUY), [[100, 4]])
+        self.assertIsNone(self.processor.amend_order(12345, 1))
+
+    def test_amend_across_the_spread_matches(self):
+        bid = self.processor.process_order(self.order(OrderSide.BUY, 7, 99))
+        result = self.processor.amend_order(bid["order_id"], price=101)
+
+        self.assertEqual(result["status"], OrderStatus.PARTIALLY_FILLED)
+        self.assertEqual(result["order_id"], bid["order_id"])
+        self.assertEqual([f["quantity"] for f in result["fills"]], [5])
+        self.assertEqual(self.order_book.depth(OrderSide.BUY), [[101, 2]])
+        self.assertEqual(self.order_book.depth(OrderSide.SELL), [[102, 5]])
+
+    def test_amend_rejects_non_positive_quantity(self):
+        bid = self.processor.process_order(self.order(OrderSide.BUY, 2, 99))
+        for price in (99, 101):  # resting and crossing are rejected alike
+            for quantity in (0, -1):
+                with self.assertRaises(ValueError):
+                    self.processor.amend_order(bid["order_id"], quantity, price)
+
+        self.assertEqual(self.order_book.depth(OrderSide.BUY), [[99, 2]])
+
+    def test_cancel_all_includes_pending_stops(self):
+        resting = self.processor.process_order(self.order(OrderSide.BUY, 1, 99))
+        stop = self.processor.process_order(
+            self.order(OrderSide.SELL, 3, type=OrderType.STOP, stop_price=95)
+        )
+        self.assertEqual(self.processor.user_order_count("u1"), 2)
+
+        result = self.processor.cancel_all_orders("u1")
+        self.assertEqual(
+            sorted(result["cancelled_order_ids"]),
+            sorted([resting["order_id"], stop["order_id"]]),
+        )
+        self.assertEqual(len(self.processor.stop_orders), 0)
+        self.assertEqual(self.processor.user_order_count("u1"), 0)
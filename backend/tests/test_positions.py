@@ -0,0 +1,62 @@
+import unittest
+from types import SimpleNamespace
+
+from app.services.positions import Position, PositionBook
+
+
+def trade(price, quantity, buyer="b1", seller="s1", ticker="AAPL"):
+    return SimpleNamespace(
+        instrument_id=ticker,
+        price=price,
+        quantity=quantity,
+        buy_user_id=buyer,
+        sell_user_id=seller,
+    )
+
+
+class TestPosition(unittest.TestCase):
+    def test_average_cost(self):
+        position = Position()
+        position.apply(2, 100.0)
+        position.apply(2, 110.0)
+        self.assertEqual((position.quantity, position.avg_price), (4, 105.0))
+        self.assertEqual(position.realized_pnl, 0.0)
+
+    def test_reduce_realizes_pnl(self):
+        position = Position()
+        position.apply(4, 100.0)
+        position.apply(-3, 110.0)
+        self.assertEqual((position.quantity, position.avg_price), (1, 100.0))
+        self.assertEqual(position.realized_pnl, 30.0)
+        self.assertEqual(position.unrealized_pnl(90.0), -10.0)
+
+    def test_short_and_flip(self):
+        position = Position()
+        position.apply(-5, 100.0)
+        position.apply(8, 90.0)  # covers 5 for +50, then long 3 at 90
+        self.assertEqual(position.realized_pnl, 50.0)
+        self.assertEqual((position.quantity, position.avg_price), (3, 90.0))
+
+    def test_flat_resets_average(self):
+        position = Position()
+        position.apply(2, 100.0)
+        position.apply(-2, 99.0)
+        self.assertEqual((position.quantity, position.avg_price), (0, 0.0))
+        self.assertEqual(position.realized_pnl, -2.0)
+
+
+class TestPositionBook(unittest.TestCase):
+    def test_both_sides_updated(self):
+        book = PositionBook()
+        book.on_trade(trade(100.0, 3))
+        book.on_trade(trade(104.0, 1, buyer="s1", seller="b1"))
+
+        self.assertEqual(book.get("b1", "AAPL").quantity, 2)
+        self.assertEqual(book.get("s1", "AAPL").quantity, -2)
+        self.assertEqual(book.get("b1", "AAPL").realized_pnl, 4.0)
+        self.assertEqual(book.get("s1", "AAPL").realized_pnl, -4.0)
+
+        (row,) = book.summary("b1")
+        self.assertEqual(row["last_price"], 104.0)
+        self.assertEqual(row["unrealized_pnl"], 8.0)
+        self.assertEqual(book.summary("nobody"), [])
@@ -0,0 +1,278 @@
+import asyncio
+import json
+from unittest import IsolatedAsyncioTestCase
+
+from app.websocket.binary import decode_prices, encode_prices
+from app.websocket.connection import SLOW_CONSUMER_CLOSE_CODE, ConnectionWriter
+from app.websocket.price_engine import ALL_TICKERS, PriceEngine
+from tests.helpers import FakeWebSocket
+
+
+async def _record(frames, frame):
+    frames.append(frame)
+
+
+async def drain(engine):
+    # let every writer task empty its queue
+    for _ in range(100):
+        if not any(w.frames for w in engine.active_connections.values()):
+            break
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+
+class TestPriceEngineSubscriptions(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = PriceEngine()
+        self.a = FakeWebSocket()
+        self.b = FakeWebSocket()
+        await self.engine.connect(self.a)
+        await self.engine.connect(self.b)
+
+    async def asyncTearDown(self):
+        for websocket in list(self.engine.active_connections):
+            self.engine.disconnect(websocket)
+
+    async def broadcast(self, prices):
+        self.engine.broadcast(prices)
+        await drain(self.engine)
+
+    async def test_only_subscribed_tickers_are_sent(self):
+        self.engine.subscribe(self.a, ["AAPL", "TSLA"])
+        self.engine.subscribe(self.b, ["TSLA"])
+
+        await self.broadcast({"AAPL": 1.0, "TSLA": 2.0, "GOOG": 3.0})
+
+        self.assertCountEqual(self.a.sent, [{"AAPL": 1.0}, {"TSLA": 2.0}])
+        self.assertEqual(self.b.sent, [{"TSLA": 2.0}])
+
+    async def test_unsubscribed_tickers_send_nothing(self):
+        await self.broadcast({"AAPL": 1.0})
+        self.assertEqual(self.a.sent, [])
+
+    async def test_wildcard_gets_whole_tick(self):
+        self.engine.subscribe(self.a, [ALL_TICKERS])
+        prices = {"AAPL": 1.0, "TSLA": 2.0}
+
+        await self.broadcast(prices)
+
+        self.assertEqual(self.a.sent, [prices])
+        self.assertEqual(self.b.sent, [])
+
+    async def test_frame_encoded_once(self):
+        self.engine.subscribe(self.a, ["AAPL"])
+        self.engine.subscribe(self.b, ["AAPL"])
+        frames = []
+        for ws in (self.a, self.b):
+            ws.send_text = lambda frame: _record(frames, frame)
+
+        await self.broadcast({"AAPL": 1.5})
+
+        self.assertEqual(len(frames), 2)
+        self.assertIs(frames[0], frames[1])
+        self.assertEqual(json.loads(frames[0]), {"AAPL": 1.5})
+
+    async def test_unsubscribe(self):
+        self.engine.subscribe(self.a, ["AAPL", "TSLA"])
+        self.assertEqual(self.engine.unsubscribe(self.a, ["AAPL"]), ["TSLA"])
+        self.assertNotIn("AAPL", self.engine.subscriptions)
+
+        await self.broadcast({"AAPL": 1.0, "TSLA": 2.0})
+        self.assertEqual(self.a.sent, [{"TSLA": 2.0}])
+
+    async def test_unknown_tickers_ignored(self):
+        self.assertEqual(self.engine.subscribe(self.a, ["AAPL", "NOPE"]), ["AAPL"])
+        self.assertNotIn("NOPE", self.engine.subscriptions)
+
+    async def test_disconnect_clears_subscriptions(self):
+        self.engine.subscribe(self.a, ["AAPL"])
+        self.engine.subscribe(self.b, ["AAPL"])
+        self.engine.disconnect(self.a)
+
+        self.assertEqual(self.engine.subscriptions["AAPL"], {self.b})
+        self.assertNotIn(self.a, self.engine.connection_tickers)
+
+    async def test_failed_send_disconnects(self):
+        broken = FakeWebSocket(fail=True)
+        await self.engine.connect(broken)
+        self.engine.subscribe(broken, ["AAPL"])
+
+        await self.broadcast({"AAPL": 1.0})
+
+        self.assertNotIn(broken, self.engine.active_connections)
+        self.assertNotIn("AAPL", self.engine.subscriptions)
+
+    async def test_handle_message(self):
+        reply = self.engine.handle_message(
+            self.a, json.dumps({"type": "subscribe", "tickers": ["GOOG", "AAPL"]})
+        )
+        self.assertEqual(reply, {"type": "subscribed", "tickers": ["AAPL", "GOOG"]})
+
+        reply = self.engine.handle_message(
+            self.a, json.dumps({"type": "unsubscribe", "tickers": "GOOG"})
+        )
+        self.assertEqual(reply, {"type": "subscribed", "tickers": ["AAPL"]})
+
+        self.assertEqual(self.engine.handle_message(self.a, "{")["type"], "error")
+        reply = self.engine.handle_message(self.a, json.dumps({"type": "nope"}))
+        self.assertEqual(reply["type"], "error")
+
+    async def test_control_replies_queued(self):
+        self.engine.send(self.a, {"type": "pong"})
+        await drain(self.engine)
+        self.assertEqual(self.a.sent, [{"type": "pong"}])
+
+    async def test_slow_client_does_not_block_others(self):
+        stalled = asyncio.Event()
+
+        async def never(frame):
+            await stalled.wait()
+
+        self.a.send_text = never
+        self.engine.subscribe(self.a, ["AAPL"])
+        self.engine.subscribe(self.b, ["AAPL"])
+
+        await self.broadcast({"AAPL": 1.0})
+        await self.broadcast({"AAPL": 2.0})
+
+        self.assertEqual(self.b.sent, [{"AAPL": 1.0}, {"AAPL": 2.0}])
+        stats = {s["sent"] for s in self.engine.connection_stats()}
+        self.assertEqual(stats, {0, 2})
+        stalled.set()
+
+
+class TestConnectionWriter(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.websocket = FakeWebSocket()
+        self.closed = []
+        self.writer = ConnectionWriter(
+            self.websocket, max_queue=3, on_close=self.closed.append
+        )
+
+    async def asyncTearDown(self):
+        self.writer.stop()
+
+    async def test_sends_in_order(self):
+        self.writer.start()
+        for i in range(3):
+            self.writer.send("AAPL", json.dumps({"AAPL": i}))
+        await drain_writer(self.writer)
+        self.assertEqual(self.websocket.sent, [{"AAPL": 0}, {"AAPL": 1}, {"AAPL": 2}])
+        self.assertEqual(self.writer.stats()["sent"], 3)
+
+    async def test_conflates_to_latest_per_key(self):
+        # not started, so nothing drains
+        for i in range(3):
+            self.writer.send("AAPL", json.dumps({"AAPL": i}))
+        self.writer.send("TSLA", json.dumps({"TSLA": 0}))
+        self.writer.send(None, json.dumps({"type": "pong"}))
+
+        self.assertEqual(len(self.writer.frames), 3)
+        self.assertEqual(self.writer.conflated, 2)
+
+        self.writer.start()
+        await drain_writer(self.writer)
+        self.assertEqual(
+            self.websocket.sent, [{"AAPL": 2}, {"TSLA": 0}, {"type": "pong"}]
+        )
+
+    async def test_drops_client_when_conflation_not_enough(self):
+        for ticker in ["A", "B", "C"]:
+            self.assertTrue(self.writer.send(ticker, "{}"))
+        self.assertFalse(self.writer.send("D", "{}"))
+        self.assertTrue(self.writer.stats()["dropped"])
+
+        self.writer.start()
+        await drain_writer(self.writer)
+        self.assertEqual(self.websocket.close_code, SLOW_CONSUMER_CLOSE_CODE)
+        self.assertEqual(self.closed, [self.websocket])
+        self.assertFalse(self.writer.send("A", "{}"))
+
+    async def test_send_error_closes(self):
+        self.websocket.fail = True
+        self.writer.start()
+        self.writer.send("AAPL", "{}")
+        await drain_writer(self.writer)
+        self.assertEqual(self.closed, [self.websocket])
+
+
+class TestBinaryFrames(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.engine = PriceEngine()
+        self.websocket = FakeWebSocket()
+        await self.engine.connect(self.websocket, binary=True)
+        await drain(self.engine)
+        self.hello = self.websocket.sent.pop(0)
+
+    async def asyncTearDown(self):
+        self.engine.disconnect(self.websocket)
+
+    def decode(self, frame):
+        sequence, indices, ticks = decode_prices(frame)
+        tickers = self.hello["tickers"]
+        scale = self.hello["price_scale"]
+        return sequence, {tickers[i]: t / scale for i, t in zip(indices, ticks)}
+
+    async def broadcast(self, prices):
+        self.engine.broadcast(prices)
+        await drain(self.engine)
+
+    async def test_hello(self):
+        self.assertEqual(self.hello["type"], "instruments")
+        self.assertEqual(self.hello["tickers"], ["AAPL", "TSLA", "GOOG", "AMZN"])
+        self.assertEqual(self.hello["price_scale"], 100)
+
+    async def test_round_trip(self):
+        frame = encode_prices(7, [0, 3], [18000, -1])
+        self.assertEqual(len(frame), 7 + 2 * 6)
+        sequence, indices, ticks = decode_prices(frame)
+        self.assertEqual(sequence, 7)
+        self.assertEqual(list(indices), [0, 3])
+        self.assertEqual(list(ticks), [18000, -1])
+
+    async def test_only_changed_instruments_after_snapshot(self):
+        self.engine.subscribe(self.websocket, ["AAPL", "TSLA"])
+        await self.broadcast({"AAPL": 180.0, "TSLA": 250.0, "GOOG": 340.0})
+        await self.broadcast({"AAPL": 180.001, "TSLA": 251.0, "GOOG": 341.0})
+        await self.broadcast({"AAPL": 180.001, "TSLA": 251.0, "GOOG": 342.0})
+
+        frames = [self.decode(f) for f in self.websocket.sent]
+        self.assertEqual(
+            frames,
+            [(1, {"AAPL": 180.0, "TSLA": 250.0}), (2, {"TSLA": 251.0})],
+        )
+
+    async def test_subscribe_sends_current_prices(self):
+        self.engine.subscribe(self.websocket, ["AAPL"])
+        await self.broadcast({"AAPL": 180.0, "TSLA": 250.0})
+        self.engine.subscribe(self.websocket, ["TSLA"])
+        await self.broadcast({"AAPL": 180.0, "TSLA": 250.0})
+
+        _, prices = self.decode(self.websocket.sent[-1])
+        self.assertEqual(prices, {"AAPL": 180.0, "TSLA": 250.0})
+
+    async def test_not_in_json_index(self):
+        self.engine.subscribe(self.websocket, [ALL_TICKERS])
+        self.assertEqual(self.engine.subscriptions, {})
+        await self.broadcast({"AAPL": 180.0})
+        self.assertIsInstance(self.websocket.sent[0], bytes)
+
+    async def test_conflation_triggers_snapshot(self):
+        writer = self.engine.active_connections[self.websocket]
+        writer.max_queue = 2
+        self.engine.subscribe(self.websocket, [ALL_TICKERS])
+        self.engine.broadcast({"AAPL": 1.0, "TSLA": 2.0})
+        self.engine.broadcast({"AAPL": 1.5, "TSLA": 2.0})
+        writer.send(None, "{}")  # overflow, the first delta is conflated away
+        self.assertTrue(writer.resync)
+        await drain(self.engine)
+
+        self.websocket.sent.clear()
+        await self.broadcast({"AAPL": 1.5, "TSLA": 2.0})
+        _, prices = self.decode(self.websocket.sent[0])
+        self.assertEqual(prices, {"AAPL": 1.5, "TSLA": 2.0, "GOOG": 0.0, "AMZN": 0.0})
+
+
+async def drain_writer(writer):
+    for _ in range(10):
+        await asyncio.sleep(0)
@@ -0,0 +1,78 @@
+from unittest import TestCase
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app.services.price_history import PriceHistory, RingBuffer
+from dependencies import get_price_history
+from main import app
+
+
+class TestRingBuffer(TestCase):
+    def test_last_rows_are_contiguous_views(self):
+        ring = RingBuffer(4)
+        for value in range(6):
+            ring.append(value)
+
+        self.assertEqual(ring.last().tolist(), [2, 3, 4, 5])
+        self.assertEqual(ring.last(2).tolist(), [4, 5])
+        self.assertTrue(np.shares_memory(ring.last(), ring._data))
+
+
+class TestPriceHistory(TestCase):
+    def setUp(self):
+        self.history = PriceHistory(
+            ["AAPL", "TSLA"], tick_capacity=10, intervals_s=[60], bar_capacity=3
+        )
+
+    def test_bars_aggregate_ticks(self):
+        for ts, prices in [(0, [10, 20]), (30, [12, 19]), (59, [11, 25]), (60, [9, 1])]:
+            self.history.record(np.array(prices, dtype=float), ts)
+        self.history.record_volume("AAPL", 7)
+
+        starts, bars = self.history.bars("AAPL", 60)
+        self.assertEqual(starts.tolist(), [0, 60])
+        self.assertEqual(bars.tolist(), [[10, 12, 10, 11, 0], [9, 9, 9, 9, 7]])
+
+        _, tsla = self.history.bars("TSLA", 60, limit=1)
+        self.assertEqual(tsla.tolist(), [[1, 1, 1, 1, 0]])
+
+        times, prices = self.history.ticks("TSLA")
+        self.assertEqual(prices.tolist(), [20, 19, 25, 1])
+
+    def test_old_bars_roll_off(self):
+        for minute in range(5):
+            self.history.record(np.array([minute, minute], dtype=float), minute * 60)
+
+        starts, bars = self.history.bars("AAPL", 60)
+        self.assertEqual(starts.tolist(), [120, 180, 240])
+        self.assertEqual(bars[:, 0].tolist(), [2, 3, 4])
+
+
+class TestBarsEndpoint(TestCase):
+    def setUp(self):
+        self.history = PriceHistory(["AAPL"], intervals_s=[1, 60])
+        self.history.record(np.array([100.0]), 0)
+        self.history.record(np.array([101.0]), 0.5)
+        app.dependency_overrides[get_price_history] = lambda: self.history
+        self.client = TestClient(app)
+
+    def tearDown(self):
+        app.dependency_overrides.clear()
+
+    def test_get_bars(self):
+        response = self.client.get("/api/v1/instruments/AAPL/bars?interval=1")
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["open"], [100.0])
+        self.assertEqual(body["high"], [101.0])
+        self.assertEqual(body["close"], [101.0])
+
+    def test_unknown_instrument_or_interval(self):
+        self.assertEqual(
+            self.client.get("/api/v1/instruments/NOPE/bars").status_code, 404
+        )
+        self.assertEqual(
+            self.client.get("/api/v1/instruments/AAPL/bars?interval=7").status_code,
+            400,
+        )
@@ -0,0 +1,104 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from app.services.tick_scheduler import TickScheduler
+
+
+class FakeClock:
+    def __init__(self, oversleep=0.0):
+        self.now = 100.0
+        self.oversleep = oversleep
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds + self.oversleep
+        await asyncio.sleep(0)
+
+
+def make_scheduler(clock, **kwargs):
+    kwargs.setdefault("catch_up", False)
+    kwargs.setdefault("max_catch_up", 10)
+    return TickScheduler(rate_hz=20, clock=clock, sleep=clock.sleep, **kwargs)
+
+
+class TestTickScheduler(IsolatedAsyncioTestCase):
+    async def test_compute_time_does_not_drift(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock)
+        scheduler.start()
+
+        for _ in range(100):
+            clock.now += 0.02  # 20ms of work every 50ms tick
+            await scheduler.wait()
+
+        self.assertAlmostEqual(clock.now, 100.0 + 100 * 0.05)
+        self.assertAlmostEqual(clock.sleeps[0], 0.03)
+        self.assertEqual(scheduler.overruns, 0)
+
+    async def test_oversleep_is_absorbed(self):
+        clock = FakeClock(oversleep=0.004)
+        scheduler = make_scheduler(clock)
+        scheduler.start()
+
+        for _ in range(50):
+            await scheduler.wait()
+
+        # each wake is 4ms late but the next sleep is shortened to compensate
+        self.assertAlmostEqual(clock.now, 100.0 + 50 * 0.05 + 0.004)
+        self.assertAlmostEqual(scheduler.stats()["jitter_ms"], 4.0)
+        self.assertAlmostEqual(scheduler.stats()["max_jitter_ms"], 4.0)
+
+    async def test_overrun_skips_missed_deadlines(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock)
+        scheduler.start()
+
+        clock.now += 0.175  # missed deadlines at 50, 100 and 150ms
+        await scheduler.wait()
+        self.assertEqual(clock.sleeps, [0])  # late tick runs right away
+        self.assertEqual((scheduler.overruns, scheduler.skipped), (1, 2))
+
+        await scheduler.wait()
+        self.assertAlmostEqual(clock.now, 100.2)
+
+    async def test_overrun_catches_up(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, catch_up=True, max_catch_up=1)
+        scheduler.start()
+
+        clock.now += 0.175
+        await scheduler.wait()  # late tick, one missed deadline skipped
+        await scheduler.wait()  # the other one replayed without sleeping
+        self.assertEqual(clock.sleeps, [0, 0])
+        self.assertEqual(scheduler.skipped, 1)
+
+        await scheduler.wait()
+        self.assertAlmostEqual(clock.now, 100.2)
+        self.assertEqual(scheduler.ticks, 3)
+
+    async def test_overrun_yields_to_other_tasks(self):
+        clock = FakeClock()
+        scheduler = make_scheduler(clock, catch_up=True)
+        scheduler.start()
+        runs = 0
+
+        async def background():
+            nonlocal runs
+            while True:
+                runs += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(background())
+        try:
+            for _ in range(20):
+                clock.now += 0.08  # every tick takes longer than the period
+                await scheduler.wait()
+        finally:
+            task.cancel()
+
+        self.assertEqual(scheduler.overruns, 20)
+        self.assertGreaterEqual(runs, 19)
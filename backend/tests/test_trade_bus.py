@@ -0,0 +1,120 @@
+import asyncio
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from app.services.order_book import OrderBook, OrderSide
+from app.services.order_book_registry import OrderBookRegistry
+from app.services.order_processor import OrderProcessor
+from app.services.trade_bus import TradeBus
+from app.websocket.trades import FillNotifier, TradeTape
+from tests.helpers import FakeWebSocket, order
+
+
+class TestTradeBus(unittest.TestCase):
+    def setUp(self):
+        self.bus = TradeBus()
+        self.processor = OrderProcessor(
+            OrderBook(instrument_id="AAPL"), trade_bus=self.bus
+        )
+
+    def test_every_fill_published_by_reference(self):
+        first, second = [], []
+        self.bus.subscribe(first.append)
+        self.bus.subscribe(second.append)
+
+        self.processor.process_order(order(OrderSide.SELL, 101.0, 2, user_id="s1"))
+        self.processor.process_order(order(OrderSide.SELL, 101.5, 2, user_id="s2"))
+        self.processor.process_order(order(OrderSide.BUY, 102.0, 3, user_id="b1"))
+
+        self.assertEqual(len(first), 2)
+        for a, b in zip(first, second):
+            self.assertIs(a, b)
+        self.assertEqual([e.trade_id for e in first], [1, 2])
+        self.assertEqual(
+            [(e.price, e.quantity) for e in first], [(101.0, 2), (101.5, 1)]
+        )
+        self.assertEqual(first[0].instrument_id, "AAPL")
+        self.assertEqual((first[0].buy_user_id, first[0].sell_user_id), ("b1", "s1"))
+        self.assertEqual(first[0].aggressor_side, OrderSide.BUY)
+
+    def test_failing_handler_does_not_stop_others(self):
+        seen = []
+
+        def broken(event):
+            raise RuntimeError("boom")
+
+        self.bus.subscribe(broken)
+        self.bus.subscribe(seen.append)
+        self.processor.process_order(order(OrderSide.SELL, 101.0, user_id="s1"))
+        self.processor.process_order(order(OrderSide.BUY, 101.0, user_id="b1"))
+        self.assertEqual(len(seen), 1)
+
+    def test_unsubscribe(self):
+        seen = []
+        self.bus.subscribe(seen.append)
+        self.bus.unsubscribe(seen.append)
+        self.processor.process_order(order(OrderSide.SELL, 101.0, user_id="s1"))
+        self.processor.process_order(order(OrderSide.BUY, 101.0, user_id="b1"))
+        self.assertEqual(seen, [])
+
+
+class TestTradeStreams(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.bus = TradeBus()
+        self.registry = OrderBookRegistry(["AAPL", "TSLA"], trade_bus=self.bus)
+        self.tape = TradeTape(self.registry)
+        self.fills = FillNotifier()
+        self.bus.subscribe(self.tape.on_trade)
+        self.bus.subscribe(self.fills.on_trade)
+
+    async def asyncTearDown(self):
+        for feed in (self.tape, self.fills):
+            for websocket in list(feed.active_connections):
+                feed.disconnect(websocket)
+        await self.registry.stop()
+
+    async def drain(self):
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+    async def trade(self, ticker="AAPL", price=101.0, quantity=1):
+        engine = self.registry.engine(ticker)
+        await engine.process_order(order(OrderSide.SELL, price, quantity, ticker, "s1"))
+        await engine.process_order(order(OrderSide.BUY, price, quantity, ticker, "b1"))
+        await self.drain()
+
+    async def test_tape_per_ticker_and_all(self):
+        aapl, everything = FakeWebSocket(), FakeWebSocket()
+        await self.tape.connect(aapl)
+        await self.tape.connect(everything)
+        self.assertEqual(self.tape.subscribe(aapl, ["AAPL", "NOPE"]), ["AAPL"])
+        self.tape.subscribe(everything, ["*"])
+
+        await self.trade("AAPL", 101.0, 2)
+        await self.trade("TSLA", 250.0)
+
+        self.assertEqual(
+            [(m["instrumentId"], m["price"], m["quantity"]) for m in aapl.sent],
+            [("AAPL", 101.0, 2)],
+        )
+        self.assertEqual([m["instrumentId"] for m in everything.sent], ["AAPL", "TSLA"])
+        self.assertEqual(aapl.sent[0]["aggressorSide"], "buy")
+
+    async def test_fills_go_to_both_users_only(self):
+        buyer, seller, other = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        await self.fills.connect(buyer, "b1")
+        await self.fills.connect(seller, "s1")
+        await self.fills.connect(other, "x1")
+
+        await self.trade("AAPL", 101.0, 2)
+
+        self.assertEqual([(m["side"], m["quantity"]) for m in buyer.sent], [("buy", 2)])
+        self.assertEqual([m["side"] for m in seller.sent], ["sell"])
+        self.assertEqual(other.sent, [])
+        self.assertEqual(buyer.sent[0]["tradeId"], seller.sent[0]["tradeId"])
+
+    async def test_fill_connection_cleanup(self):
+        websocket = FakeWebSocket()
+        await self.fills.connect(websocket, "b1")
+        self.fills.disconnect(websocket)
+        self.assertEqual(self.fills.users, {})
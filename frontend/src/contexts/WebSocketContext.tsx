@@ -19,6 +19,8 @@ export const WebSocketProvider: React.FC<{ children: React.ReactNode }> = ({ chi
 
   const handleMessage = useCallback((data: any) => {
     console.log(data);
+    // subscription acks / errors, not prices
+    if (data?.type) return;
     try {
       const priceData = data;
       // update the global context state for prices, maybe can create a type later ?
@@ -37,6 +39,7 @@ export const WebSocketProvider: React.FC<{ children: React.ReactNode }> = ({ chi
   const { latencyMs, isConnected, isReconnecting } = useWebSocket({
     url: 'ws://localhost:8000/ws/market',
     onMessage: handleMessage,
+    subscribe: ['*'],
     pingInterval: 5000,
     maxRetries: 5,
     initialBackoff: 500,
@@ -5,6 +5,8 @@ interface UseWebSocketOptions {
   url: string
   onMessage?: (data: any) => void
   onError?: (error: Event) => void
+  // tickers to subscribe to on every (re)connect, '*' for all
+  subscribe?: string[]
   pingInterval?: number
   maxRetries?: number
   initialBackoff?: number
@@ -24,6 +26,7 @@ export function useWebSocket({
   url,
   onMessage,
   onError,
+  subscribe,
   pingInterval = 5000,
   maxRetries = 10,
   initialBackoff = 500,
@@ -38,6 +41,8 @@ export function useWebSocket({
   })
 
   const wsRef = useRef<WebSocket | null>(null)
+  const subscribeRef = useRef(subscribe)
+  subscribeRef.current = subscribe
 
   // avoid node js issue
   const pingTimerRef = useRef<ReturnType<typeof setInterval> | null>(null)
@@ -93,6 +98,9 @@ export function useWebSocket({
           isReconnecting: false,
         }))
         retryCountRef.current = 0
+        if (subscribeRef.current?.length) {
+          ws.send(JSON.stringify({ type: 'subscribe', tickers: subscribeRef.current }))
+        }
         startPingPong()
       }
 